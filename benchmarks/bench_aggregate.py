@@ -0,0 +1,63 @@
+"""
+Per-group totals of a collection: aggregating the documents of find() in
+Python against aggregate(), which runs one GROUP BY statement.
+"""
+from collections import defaultdict
+
+from common import measure, report, temp_database
+
+from bosc.query.aggregate import Avg, Count, Sum
+
+DOCUMENTS = 100_000
+REPEAT = 5
+
+
+def main():
+    with temp_database() as db:
+        orders = db.orders
+        orders.insert_many(
+            [
+                {
+                    "customer": f"customer {number % 1000}",
+                    "country": f"country {number % 20}",
+                    "amount": number % 500,
+                    "items": [{"sku": number, "quantity": 1}] * 3,
+                }
+                for number in range(DOCUMENTS)
+            ]
+        )
+
+        def in_python():
+            groups = defaultdict(list)
+            for order in orders.find():
+                groups[order["country"]].append(order["amount"])
+            return [
+                {
+                    "country": country,
+                    "count": len(amounts),
+                    "total": sum(amounts),
+                    "average": sum(amounts) / len(amounts),
+                }
+                for country, amounts in sorted(groups.items())
+            ]
+
+        def in_sqlite():
+            return orders.aggregate(
+                group_by="country",
+                accumulators={
+                    "count": Count(),
+                    "total": Sum("amount"),
+                    "average": Avg("amount"),
+                },
+            )
+
+        assert in_python() == in_sqlite()
+        for name, aggregate in (
+            ("find() and aggregate in Python", in_python),
+            ("aggregate()", in_sqlite),
+        ):
+            report(name, measure(aggregate, REPEAT), REPEAT)
+
+
+if __name__ == "__main__":
+    main()
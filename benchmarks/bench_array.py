@@ -0,0 +1,77 @@
+"""
+Array queries.
+
+Finding the documents whose tags contain a rare tag and those with an open
+order item: filtering find() results in Python, the json_each queries, and
+the same queries with multikey indexes on the arrays.
+"""
+from common import measure, report, temp_database
+
+from bosc import Contains, ElemMatch, Eq, Index, IndexType
+
+DOCUMENTS = 50_000
+REPEAT = 20
+
+
+def document(number: int) -> dict:
+    return {
+        "tags": [f"tag {number % 1_000}", f"group {number % 10}"],
+        "items": [
+            {
+                "sku": number % 97,
+                "status": "open" if number % 2_000 == 0 else "closed",
+            }
+            for _ in range(3)
+        ],
+    }
+
+
+def python_filters(tickets):
+    def contains():
+        return [
+            ticket for ticket in tickets.find() if "tag 7" in ticket["tags"]
+        ]
+
+    def elem_match():
+        return [
+            ticket
+            for ticket in tickets.find()
+            if any(item["status"] == "open" for item in ticket["items"])
+        ]
+
+    return contains, elem_match
+
+
+def main():
+    with temp_database() as db:
+        tickets = db.tickets
+        tickets.insert_many([document(number) for number in range(DOCUMENTS)])
+        contains, elem_match = python_filters(tickets)
+        expected = len(contains()), len(elem_match())
+        queries = (
+            ("contains", Contains("tags", "tag 7")),
+            ("elem_match", ElemMatch("items", Eq("status", "open"))),
+        )
+        report("contains, python filter", measure(contains, REPEAT), REPEAT)
+        report(
+            "elem_match, python filter", measure(elem_match, REPEAT), REPEAT
+        )
+        for name, query in queries:
+            report(
+                f"{name}, json_each",
+                measure(lambda query=query: tickets.find(query), REPEAT),
+                REPEAT,
+            )
+        tickets.create_index(Index("tags", IndexType.MULTIKEY))
+        tickets.create_index(Index("items", IndexType.MULTIKEY))
+        for (name, query), count in zip(queries, expected):
+            assert len(tickets.find(query)) == count
+            report(
+                f"{name}, multikey index",
+                measure(lambda query=query: tickets.find(query), REPEAT),
+                REPEAT,
+            )
+
+
+if __name__ == "__main__":
+    main()
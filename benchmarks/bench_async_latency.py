@@ -0,0 +1,78 @@
+"""
+Latency of the asyncio API under concurrent load.
+
+Runs CLIENTS coroutines that each insert and then read back documents, once
+through the blocking Document methods called from coroutines and once
+through their async counterparts. Reports request latency percentiles and
+the worst event loop lag seen by a ticker task, which is what other
+requests served by the same loop would wait.
+"""
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from bosc import Database, Document
+
+CLIENTS = 50
+REQUESTS_PER_CLIENT = 40
+
+
+class Event(Document):
+    name: str
+    value: int
+
+
+async def ticker(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lags.append(time.perf_counter() - start - 0.001)
+
+
+async def blocking_client(latencies: list):
+    for i in range(REQUESTS_PER_CLIENT):
+        start = time.perf_counter()
+        event = Event(name="event", value=i).insert()
+        Event.get(event.id)
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0)
+
+
+async def async_client(latencies: list):
+    for i in range(REQUESTS_PER_CLIENT):
+        start = time.perf_counter()
+        event = await Event(name="event", value=i).ainsert()
+        await Event.aget(event.id)
+        latencies.append(time.perf_counter() - start)
+
+
+async def run(client) -> None:
+    latencies, lags = [], []
+    stop = asyncio.Event()
+    ticker_task = asyncio.ensure_future(ticker(stop, lags))
+    start = time.perf_counter()
+    await asyncio.gather(*[client(latencies) for _ in range(CLIENTS)])
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await ticker_task
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"{client.__name__:<16} "
+        f"{len(latencies) / elapsed:>8,.0f} req/s  "
+        f"p50 {quantiles[49] * 1e3:>7.2f} ms  "
+        f"p99 {quantiles[98] * 1e3:>7.2f} ms  "
+        f"max loop lag {max(lags) * 1e3:>7.2f} ms"
+    )
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        Event.bosc_database = Database(os.path.join(directory, "bench.db"))
+        asyncio.run(run(blocking_client))
+        asyncio.run(run(async_client))
+
+
+if __name__ == "__main__":
+    main()
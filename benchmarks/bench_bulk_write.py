@@ -0,0 +1,57 @@
+"""
+Syncing a batch of changes from upstream, a mix of inserts, field updates
+and deletes: one call per change, each committed on its own, against
+bulk_write, which runs them in one transaction.
+"""
+from common import measure, report, temp_database
+
+from bosc import DeleteOne, Eq, InsertOne, Set, UpdateOne
+
+DOCUMENTS = 10_000
+CHANGES = 3_000
+
+
+def main():
+    with temp_database() as db:
+        records = db.records
+
+        def fill():
+            records.delete()
+            records.insert_many(
+                [{"id": number, "value": 0} for number in range(DOCUMENTS)]
+            )
+
+        def changes():
+            for number in range(CHANGES):
+                kind = number % 3
+                if kind == 0:
+                    yield InsertOne({"id": DOCUMENTS + number, "value": 0})
+                elif kind == 1:
+                    yield UpdateOne(Eq("id", number), Set("value", number))
+                else:
+                    yield DeleteOne(Eq("id", number))
+
+        def one_by_one():
+            for change in changes():
+                if isinstance(change, InsertOne):
+                    records.insert(change.document)
+                elif isinstance(change, UpdateOne):
+                    records.update_one(change.query, *change.operations)
+                else:
+                    records.delete_one(change.query)
+
+        def bulk_write():
+            records.bulk_write(changes())
+
+        for name, func in (
+            ("one call per change", one_by_one),
+            ("bulk_write", bulk_write),
+        ):
+            fill()
+            seconds = measure(func, 1)
+            report(f"sync, {name}", seconds, CHANGES)
+            assert records.count() == DOCUMENTS
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Per-call overhead of resolving a collection from the database.
+
+Compares running the table/index DDL on every access (what Database did
+before collections were cached), building a Collection that only checks the
+catalog, and the cached lookup. Each variant is measured for a bare lookup
+and for a single-document point read going through it.
+"""
+from common import measure, report, temp_database
+
+from bosc import Collection
+
+REPEAT = 5_000
+
+
+def main():
+    with temp_database() as db:
+        document = db.users.insert({"name": "John", "age": 25})
+
+        def ddl():
+            connection = db.connection
+            connection.execute("PRAGMA journal_mode=WAL;")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS users (id INTEGER PRIMARY KEY, data JSON)"
+            )
+            connection.commit()
+            connection.execute(
+                'CREATE UNIQUE INDEX IF NOT EXISTS "idx_unique_id" ON "users" '
+                "(json_extract(data, '$.id'))"
+            )
+            connection.commit()
+            return Collection("users", db)
+
+        def fresh():
+            return Collection("users", db)
+
+        def cached():
+            return db.users
+
+        for name, resolve in (
+            ("DDL per call", ddl),
+            ("catalog check per call", fresh),
+            ("cached", cached),
+        ):
+            report(f"lookup, {name}", measure(resolve, REPEAT), REPEAT)
+            report(
+                f"get(), {name}",
+                measure(lambda: resolve().get(document["id"]), REPEAT),
+                REPEAT,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Queries on an indexed path: an expression index on json_extract
+(IndexType.PATH) against an index on a generated column
+(IndexType.COLUMN), which queries read instead of the JSON.
+"""
+from common import measure, report, temp_database
+
+from bosc import And, Gt, Index, IndexType, Lt
+from bosc.query.aggregate import Count
+
+DOCUMENTS = 100_000
+REPEAT = 20
+
+
+def main():
+    for index_type in (IndexType.PATH, IndexType.COLUMN):
+        with temp_database() as db:
+            users = db.users
+            users.insert_many(
+                [
+                    {
+                        "name": f"user {number}",
+                        "age": number % 90,
+                        "score": number % 1000,
+                        "bio": "x" * 500,
+                    }
+                    for number in range(DOCUMENTS)
+                ]
+            )
+            users.create_index(Index("age", index_type))
+            name = index_type.value
+            for label, run in (
+                (
+                    "count of a range",
+                    lambda: users.count(Lt("age", 30)),
+                ),
+                (
+                    "sorted page",
+                    lambda: users.find(order_by="age", offset=50_000, limit=20),
+                ),
+                (
+                    "group by the indexed path",
+                    lambda: users.aggregate(
+                        group_by="age", accumulators={"count": Count()}
+                    ),
+                ),
+                (
+                    "range and residual filter",
+                    lambda: users.count(And(Gt("age", 80), Gt("score", 500))),
+                ),
+            ):
+                report(f"{label}, {name}", measure(run, REPEAT), REPEAT)
+
+
+if __name__ == "__main__":
+    main()
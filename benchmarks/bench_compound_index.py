@@ -0,0 +1,86 @@
+"""
+Compound and partial indexes.
+
+A filter on two fields sorted by the second one, served by an index on the
+first field alone against a compound index on both. Then inserts into a
+collection with an index on a field that few documents have, indexing
+every document against a partial index on the documents that have it.
+"""
+from common import measure, report, temp_database
+
+from bosc import And, Eq, Gt, Index, Neq, OrderDirection
+
+DOCUMENTS = 100_000
+TENANTS = 20
+REPEAT = 200
+INSERT_BATCHES = 20
+BATCH_SIZE = 1_000
+
+
+def sorted_filter(index: Index):
+    with temp_database() as db:
+        events = db.events
+        events.insert_many(
+            [
+                {"tenant": number % TENANTS, "created": number}
+                for number in range(DOCUMENTS)
+            ]
+        )
+        events.create_index(index)
+        query = And(Eq("tenant", 3), Gt("created", DOCUMENTS // 2))
+
+        def run():
+            return events.find(
+                query, order_by="created", order_direction="DESC", limit=20
+            )
+
+        return measure(run, REPEAT)
+
+
+def sparse_inserts(index: Index):
+    with temp_database() as db:
+        users = db.users
+        users.create_index(index)
+        batches = [
+            [
+                (
+                    {"name": f"user {number}", "coupon": None}
+                    if number % 100
+                    else {"name": f"user {number}", "coupon": f"code {number}"}
+                )
+                for number in range(start, start + BATCH_SIZE)
+            ]
+            for start in range(0, INSERT_BATCHES * BATCH_SIZE, BATCH_SIZE)
+        ]
+        batches.reverse()
+        seconds = measure(
+            lambda: users.insert_many(batches.pop()), INSERT_BATCHES
+        )
+        pages = db.connection.execute(
+            "SELECT COUNT(*) FROM dbstat WHERE name = ?", [index.name]
+        ).fetchone()
+        return seconds, pages
+
+
+def main():
+    for name, index in (
+        ("index on tenant", Index("tenant")),
+        (
+            "compound index",
+            Index(["tenant", ("created", OrderDirection.DESC)]),
+        ),
+    ):
+        report(f"filter and sort, {name}", sorted_filter(index), REPEAT)
+
+    for name, index in (
+        ("full index", Index("coupon")),
+        ("partial index", Index("coupon", where=Neq("coupon", None))),
+    ):
+        seconds, pages = sparse_inserts(index)
+        operations = INSERT_BATCHES * BATCH_SIZE
+        report(f"sparse field inserts, {name}", seconds, operations)
+        print(f"    index pages: {pages[0]}")
+
+
+if __name__ == "__main__":
+    main()
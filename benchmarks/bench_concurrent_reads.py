@@ -0,0 +1,51 @@
+"""
+Read throughput of a shared Database as the number of threads grows.
+
+Every thread runs point reads and a small range query through its own
+pooled reader connection.
+"""
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import report
+
+from bosc import Database, Index
+from bosc.query.find import Gt
+
+DOCUMENTS = 10_000
+READS_PER_THREAD = 2_000
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        db = Database(path, pool_size=16)
+        db.users.insert_many(
+            [
+                {"id": i, "name": f"user {i}", "age": i % 90}
+                for i in range(DOCUMENTS)
+            ]
+        )
+        db.users.create_index(Index("age"))
+
+        def work(_):
+            collection = db.users
+            for i in range(READS_PER_THREAD):
+                collection.get(i % DOCUMENTS)
+                collection.find(Gt("age", 88), limit=10)
+
+        for threads in (1, 2, 4, 8, 16):
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                start = time.perf_counter()
+                list(executor.map(work, range(threads)))
+                elapsed = time.perf_counter() - start
+            report(
+                f"{threads:>2} threads", elapsed, threads * READS_PER_THREAD
+            )
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Decode throughput of stored documents into models.
+
+Compares json.loads followed by model_validate, which Document used to do,
+with validating the raw JSON text through model_validate_json, for small
+flat documents and large nested ones.
+"""
+import json
+from typing import List
+
+from common import measure, report
+from pydantic import BaseModel
+
+from bosc import Document
+from bosc.encoder import get_dict
+
+REPEAT = 20_000
+
+
+class Small(Document):
+    name: str
+    age: int
+    active: bool
+
+
+class Item(BaseModel):
+    sku: str
+    quantity: int
+    price: float
+    tags: List[str]
+
+
+class Order(BaseModel):
+    number: int
+    items: List[Item]
+
+
+class Large(Document):
+    name: str
+    orders: List[Order]
+
+
+def main():
+    small = Small(name="John", age=25, active=True)
+    large = Large(
+        name="John",
+        orders=[
+            Order(
+                number=number,
+                items=[
+                    Item(
+                        sku=f"sku-{i}",
+                        quantity=i,
+                        price=i * 1.5,
+                        tags=["a", "b", "c"],
+                    )
+                    for i in range(10)
+                ],
+            )
+            for number in range(10)
+        ],
+    )
+    for model, repeat in ((small, REPEAT), (large, REPEAT // 50)):
+        cls = type(model)
+        raw = json.dumps(get_dict(model))
+        report(
+            f"{cls.__name__}: json.loads + model_validate",
+            measure(lambda: cls.model_validate(json.loads(raw)), repeat),
+            repeat,
+        )
+        report(
+            f"{cls.__name__}: model_validate_json",
+            measure(lambda: cls.model_validate_json(raw), repeat),
+            repeat,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Encoding throughput of documents before they are written.
+
+Compares the pure Python Encoder walker with the per-class encoder compiled
+to pydantic's serializer, which get_dict uses when the document class
+allows it, and measures Document.insert_many end to end. The walker is
+also measured on a free-form payload with custom encoders registered for
+base classes, which only the walker handles.
+"""
+import datetime
+import enum
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+from uuid import UUID, uuid4
+
+from common import measure, report, temp_database
+from pydantic import BaseModel
+
+from bosc import Document
+from bosc.encoder import Encoder, get_compiled_encoder, get_dict
+
+REPEAT = 20_000
+DOCUMENTS = 100_000
+
+
+class Status(enum.Enum):
+    ACTIVE = "active"
+    BLOCKED = "blocked"
+
+
+class Address(BaseModel):
+    city: str
+    street: str
+    zip_code: Optional[str] = None
+
+
+class User(Document):
+    name: str
+    age: int
+    status: Status
+    created: datetime.datetime
+    session: UUID
+    tags: List[str]
+    addresses: List[Address]
+
+
+class Event(Document):
+    payload: Dict[str, Any]
+
+    bosc_json_encoders = {
+        enum.Enum: lambda value: value.name,
+        datetime.date: lambda value: value.isoformat(),
+        Decimal: str,
+    }
+
+
+def make_event() -> Event:
+    return Event(
+        payload={
+            "status": Status.BLOCKED,
+            "at": datetime.datetime(2024, 1, 1, 12, 0),
+            "amounts": [Decimal("1.5"), Decimal("2.25")] * 10,
+            "sessions": [uuid4() for _ in range(10)],
+            "labels": {"a": 1, "b": 2.5, "c": None},
+        }
+    )
+
+
+def make_user(number: int) -> User:
+    return User(
+        name=f"user {number}",
+        age=number % 90,
+        status=Status.ACTIVE,
+        created=datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc),
+        session=uuid4(),
+        tags=["a", "b", "c"],
+        addresses=[
+            Address(city="Berlin", street="Main st. 1"),
+            Address(city="Paris", street="Rue 2", zip_code="75001"),
+        ],
+    )
+
+
+def main():
+    user = make_user(1)
+    assert get_compiled_encoder(User) is not None
+    assert Encoder().encode(user) == get_dict(user)
+    report(
+        "Encoder walker",
+        measure(lambda: Encoder().encode(user), REPEAT),
+        REPEAT,
+    )
+    report("get_dict, compiled", measure(lambda: get_dict(user), REPEAT), REPEAT)
+
+    event = make_event()
+    assert get_compiled_encoder(Event) is None
+    report(
+        "get_dict, walker with custom encoders",
+        measure(lambda: get_dict(event), REPEAT),
+        REPEAT,
+    )
+
+    users = [make_user(number) for number in range(DOCUMENTS)]
+    with temp_database() as db:
+        User.bosc_database = db
+        report(
+            "insert_many, compiled",
+            measure(lambda: User.insert_many(users), 1),
+            DOCUMENTS,
+        )
+
+
+if __name__ == "__main__":
+    main()
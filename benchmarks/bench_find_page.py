@@ -0,0 +1,69 @@
+"""
+Cost of a page by its depth: find() with OFFSET against find_page() with
+a continuation token, on an indexed sort field.
+"""
+from common import measure, report, temp_database
+
+from bosc import Index
+
+DOCUMENTS = 200_000
+PAGE_SIZE = 20
+REPEAT = 200
+
+
+def main():
+    with temp_database() as db:
+        users = db.users
+        users.insert_many(
+            [
+                {"name": f"user {number}", "age": number % 90}
+                for number in range(DOCUMENTS)
+            ]
+        )
+        users.create_index(Index("age"))
+
+        # Tokens of the pages to measure, collected by walking the pages
+        depths = (1, 100, 10_000)
+        tokens, token = {1: None}, None
+        for page in range(1, max(depths)):
+            _, token = users.find_page(
+                order_by="age", after=token, limit=PAGE_SIZE
+            )
+            if page + 1 in depths:
+                tokens[page + 1] = token
+
+        for depth in depths:
+            offset = (depth - 1) * PAGE_SIZE
+            expected = users.find(
+                order_by="age", offset=offset, limit=PAGE_SIZE
+            )
+            page, _ = users.find_page(
+                order_by="age", after=tokens[depth], limit=PAGE_SIZE
+            )
+            assert [doc["age"] for doc in page] == [
+                doc["age"] for doc in expected
+            ]
+            report(
+                f"page {depth:,}, OFFSET",
+                measure(
+                    lambda: users.find(
+                        order_by="age", offset=offset, limit=PAGE_SIZE
+                    ),
+                    REPEAT,
+                ),
+                REPEAT,
+            )
+            report(
+                f"page {depth:,}, find_page token",
+                measure(
+                    lambda: users.find_page(
+                        order_by="age", after=tokens[depth], limit=PAGE_SIZE
+                    ),
+                    REPEAT,
+                ),
+                REPEAT,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Full-text search.
+
+Finding the articles that mention a word: substring matching in Python over
+every document, a LIKE scan in SQLite, and a Match on a full-text index,
+unsorted and ranked by relevance. Then the cost of the index on inserts.
+"""
+from common import measure, report, temp_database
+
+from bosc import Index, IndexType, Match
+
+DOCUMENTS = 50_000
+REPEAT = 20
+INSERT_BATCHES = 20
+BATCH_SIZE = 1_000
+WORDS = (
+    "sqlite index query python document search cursor page btree journal "
+    "trigger column table vacuum"
+).split()
+FIELDS = ["title", "body"]
+
+
+def article(number: int) -> dict:
+    words = [WORDS[(number * 7 + shift) % len(WORDS)] for shift in range(40)]
+    if number % 500 == 0:
+        words.append("checkpoint")
+    return {
+        "title": f"Article {number}",
+        "body": " ".join(words),
+    }
+
+
+def searches(db):
+    articles = db.articles
+    articles.insert_many([article(number) for number in range(DOCUMENTS)])
+    articles.create_index(Index(FIELDS, IndexType.FULLTEXT))
+    match = Match(FIELDS, "checkpoint")
+
+    def substring():
+        return [
+            document
+            for document in articles.iter_find(batch_size=1_000)
+            if "checkpoint" in document["body"]
+        ]
+
+    def like():
+        with articles._read_cursor() as cursor:
+            cursor.execute(
+                "SELECT data FROM articles WHERE json_extract(data, '$.body') LIKE ?",
+                ["%checkpoint%"],
+            )
+            return cursor.fetchall()
+
+    expected = len(substring())
+    assert len(like()) == expected
+    assert len(articles.find(match)) == expected
+    return (
+        ("python substring", substring),
+        ("LIKE scan", like),
+        ("Match", lambda: articles.find(match)),
+        ("Match ranked", lambda: articles.find(order_by=match)),
+    )
+
+
+def inserts(index):
+    with temp_database() as db:
+        articles = db.articles
+        if index is not None:
+            articles.create_index(index)
+        batches = [
+            [article(number) for number in range(start, start + BATCH_SIZE)]
+            for start in range(0, INSERT_BATCHES * BATCH_SIZE, BATCH_SIZE)
+        ]
+        batches.reverse()
+        return measure(
+            lambda: articles.insert_many(batches.pop()), INSERT_BATCHES
+        )
+
+
+def main():
+    with temp_database() as db:
+        for name, func in searches(db):
+            report(f"search, {name}", measure(func, REPEAT), REPEAT)
+
+    for name, index in (
+        ("no index", None),
+        ("full-text index", Index(FIELDS, IndexType.FULLTEXT)),
+    ):
+        report(
+            f"inserts, {name}",
+            inserts(index),
+            INSERT_BATCHES * BATCH_SIZE,
+        )
+
+
+if __name__ == "__main__":
+    main()
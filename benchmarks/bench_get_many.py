@@ -0,0 +1,44 @@
+"""
+Resolving a list of ids: one Document.get per id against one
+Document.get_many call.
+"""
+from common import measure, report, temp_database
+
+from bosc import Document
+
+DOCUMENTS = 10_000
+IDS = 100
+REPEAT = 100
+
+
+class User(Document):
+    name: str
+    age: int
+
+
+def main():
+    with temp_database() as db:
+        User.bosc_database = db
+        users = [
+            User(name=f"user {number}", age=number % 90)
+            for number in range(DOCUMENTS)
+        ]
+        User.insert_many(users)
+        ids = [user.id for user in users[:: DOCUMENTS // IDS]]
+
+        def get_each():
+            return [User.get(user_id) for user_id in ids]
+
+        def get_many():
+            return User.get_many(ids)
+
+        assert get_each() == get_many()
+        for name, resolve in (
+            (f"{IDS} x Document.get", get_each),
+            (f"Document.get_many({IDS} ids)", get_many),
+        ):
+            report(name, measure(resolve, REPEAT), REPEAT * IDS)
+
+
+if __name__ == "__main__":
+    main()
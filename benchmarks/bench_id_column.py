@@ -0,0 +1,96 @@
+"""
+Point lookups and inserts by document id, with the ids in the JSON only
+(the layout before the id column) and in the indexed doc_id column.
+
+The old layout is built with plain SQL, as older versions created it.
+Opening it as a collection migrates it, which is measured as well.
+"""
+
+import json
+import time
+import uuid
+
+from common import measure, report, temp_database
+
+from bosc.encoder import doc_key
+
+DOCUMENTS = 100_000
+REPEAT = 20_000
+
+
+def make_documents():
+    return [
+        {"id": uuid.uuid4().hex, "name": f"user {number}", "age": number % 90}
+        for number in range(DOCUMENTS)
+    ]
+
+
+def create_old_layout(db, documents):
+    connection = db.connection
+    connection.execute(
+        "CREATE TABLE old_users (id INTEGER PRIMARY KEY, data JSON)"
+    )
+    connection.execute(
+        'CREATE UNIQUE INDEX "idx_old_users_id" ON "old_users" '
+        "(json_extract(data, '$.id'))"
+    )
+    start = time.perf_counter()
+    connection.executemany(
+        "INSERT INTO old_users (data) VALUES (json(?))",
+        [(json.dumps(document),) for document in documents],
+    )
+    connection.commit()
+    return time.perf_counter() - start
+
+
+def main():
+    with temp_database() as db:
+        old_documents = make_documents()
+        report(
+            "insert, id in JSON",
+            create_old_layout(db, old_documents),
+            DOCUMENTS,
+        )
+        documents = make_documents()
+        start = time.perf_counter()
+        db.users.insert_many(documents)
+        report("insert, id column", time.perf_counter() - start, DOCUMENTS)
+
+        connection = db.connection
+        ids = [document["id"] for document in documents[:: DOCUMENTS // 100]]
+        old_ids = [
+            document["id"] for document in old_documents[:: DOCUMENTS // 100]
+        ]
+
+        def lookup_json():
+            for document_id in old_ids:
+                connection.execute(
+                    "SELECT data FROM old_users "
+                    "WHERE json_extract(data, '$.id') = ?",
+                    [document_id],
+                ).fetchone()
+
+        def lookup_column():
+            for document_id in ids:
+                connection.execute(
+                    "SELECT data FROM users WHERE doc_id = ?",
+                    [doc_key(document_id)],
+                ).fetchone()
+
+        def lookup_get():
+            for document_id in ids:
+                db.users.get(document_id)
+
+        repeat = REPEAT // len(ids)
+        operations = repeat * len(ids)
+        report("lookup, id in JSON", measure(lookup_json, repeat), operations)
+        report("lookup, id column", measure(lookup_column, repeat), operations)
+        report("Collection.get", measure(lookup_get, repeat), operations)
+
+        start = time.perf_counter()
+        assert db.old_users.count() == DOCUMENTS
+        report("migration", time.perf_counter() - start, DOCUMENTS)
+
+
+if __name__ == "__main__":
+    main()
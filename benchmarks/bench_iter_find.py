@@ -0,0 +1,60 @@
+"""
+Peak memory of scanning a whole collection with find() and iter_find().
+
+Each variant runs in its own process, so that the reported peak resident
+set size belongs to that variant only.
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from bosc import Database
+
+DOCUMENTS = 200_000
+PAYLOAD = "x" * 500
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / (1024 if sys.platform == "darwin" else 1)
+
+
+def scan(path: str, variant: str):
+    collection = Database(path).documents
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    if variant == "find":
+        scanned = sum(1 for _ in collection.find())
+    else:
+        scanned = sum(1 for _ in collection.iter_find(batch_size=500))
+    elapsed = time.perf_counter() - start
+    print(
+        f"{variant:<10} {scanned:>8} documents  {elapsed:>6.2f} s  "
+        f"peak RSS +{peak_rss_mb() - baseline:>7.1f} MB"
+    )
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        db = Database(path)
+        db.documents.insert_many(
+            [
+                {"id": i, "number": i, "payload": PAYLOAD}
+                for i in range(DOCUMENTS)
+            ]
+        )
+        db.close()
+        for variant in ("find", "iter_find"):
+            subprocess.run([sys.executable, __file__, path, variant], check=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3:
+        scan(sys.argv[1], sys.argv[2])
+    else:
+        main()
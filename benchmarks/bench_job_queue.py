@@ -0,0 +1,54 @@
+"""
+Claiming jobs from a queue, by priority: find_one then update_one of the
+found job, against find_one_and_update, which finds and updates it in one
+UPDATE ... RETURNING statement.
+"""
+from common import measure, report, temp_database
+
+from bosc import Eq, Index, IndexType, Set
+
+JOBS = 20_000
+CLAIMS = 2_000
+
+
+def main():
+    with temp_database() as db:
+        jobs = db.jobs
+        jobs.create_index(Index(["status", "priority"], IndexType.COLUMN))
+
+        def fill():
+            jobs.delete()
+            jobs.insert_many(
+                [
+                    {"id": number, "status": "pending", "priority": number}
+                    for number in range(JOBS)
+                ]
+            )
+
+        def find_then_update():
+            for _ in range(CLAIMS):
+                job = jobs.find_one(
+                    Eq("status", "pending"), order_by="priority"
+                )
+                jobs.update_one(Eq("id", job["id"]), Set("status", "running"))
+
+        def find_one_and_update():
+            for _ in range(CLAIMS):
+                jobs.find_one_and_update(
+                    Eq("status", "pending"),
+                    Set("status", "running"),
+                    order_by="priority",
+                )
+
+        for name, func in (
+            ("find_one, update_one", find_then_update),
+            ("find_one_and_update", find_one_and_update),
+        ):
+            fill()
+            seconds = measure(func, 1)
+            report(f"claim, {name}", seconds, CLAIMS)
+            assert jobs.count(Eq("status", "running")) == CLAIMS
+
+
+if __name__ == "__main__":
+    main()
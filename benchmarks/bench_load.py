@@ -0,0 +1,66 @@
+"""
+Loading a JSONL dump: reading every line into a list of documents and
+calling insert_many, against load, which streams the file in chunks. Peak
+memory is measured with tracemalloc, which slows every run down alike.
+"""
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from common import report, temp_database
+
+from bosc import Document
+
+DOCUMENTS = 100_000
+
+
+class Event(Document):
+    source: str
+    value: int
+    tags: list
+
+
+def measure_peak(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main():
+    with temp_database() as db, tempfile.TemporaryDirectory() as directory:
+        Event.bosc_database = db
+        path = os.path.join(directory, "events.jsonl")
+        with open(path, "w") as file:
+            for number in range(DOCUMENTS):
+                event = {"source": "s", "value": number, "tags": ["a"] * 10}
+                file.write(json.dumps(event) + "\n")
+
+        def insert_many():
+            with open(path) as file:
+                Event.insert_many(
+                    [Event.model_validate_json(line) for line in file]
+                )
+
+        for name, func in (
+            ("Document.insert_many of a list", insert_many),
+            ("Document.load", lambda: Event.load(path)),
+            (
+                "Document.load, validate=False",
+                lambda: Event.load(path, validate=False),
+            ),
+        ):
+            Event.get_collection().delete()
+            seconds, peak = measure_peak(func)
+            report(name, seconds, DOCUMENTS)
+            print(f"{'':<48} {peak / 2**20:>12,.1f} MiB peak")
+            assert Event.count() == DOCUMENTS
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Listing two fields of large documents: find() of whole documents against
+find() with a projection, which has SQLite build a JSON object of only
+those fields.
+"""
+from common import measure, report, temp_database
+from pydantic import BaseModel
+
+from bosc import Document
+
+DOCUMENTS = 2_000
+REPEAT = 20
+
+
+class User(Document):
+    name: str
+    bio: str
+    history: list
+
+
+class UserName(BaseModel):
+    id: str
+    name: str
+
+
+def main():
+    with temp_database() as db:
+        User.bosc_database = db
+        User.insert_many(
+            [
+                User(
+                    name=f"user {number}",
+                    bio="x" * 10_000,
+                    history=[{"event": "login", "at": n} for n in range(300)],
+                )
+                for number in range(DOCUMENTS)
+            ]
+        )
+        operations = REPEAT * DOCUMENTS
+        users = db[User.get_collection_name()]
+        for name, find in (
+            ("Collection.find, whole documents", lambda: users.find()),
+            (
+                "Collection.find, projection",
+                lambda: users.find(projection=["id", "name"]),
+            ),
+            ("Document.find, whole documents", lambda: User.find()),
+            (
+                "Document.find, projection",
+                lambda: User.find(projection=UserName),
+            ),
+        ):
+            report(name, measure(find, REPEAT), operations)
+
+
+if __name__ == "__main__":
+    main()
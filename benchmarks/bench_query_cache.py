@@ -0,0 +1,65 @@
+"""
+Latency of repeated queries of the same shape with changing values.
+
+Paging through a result with varying offsets, counting and updating with
+compound queries. Before query shapes were cached, every call rebuilt the
+SQL, and inlined limit and offset values made every page a new statement
+for sqlite3's statement cache. The collection is small and indexed, so
+that the time is spent on the calls rather than in SQLite.
+"""
+from common import measure, report, temp_database
+
+from bosc import And, Eq, In, Index, Lt, Or, Set
+
+DOCUMENTS = 1_000
+REPEAT = 20_000
+
+
+def main():
+    with temp_database() as db:
+        users = db.users
+        users.create_index(Index("age"))
+        users.create_index(Index("name"))
+        users.insert_many(
+            [
+                {"name": f"user {number}", "age": number % 90}
+                for number in range(DOCUMENTS)
+            ]
+        )
+        counter = iter(range(10**9))
+
+        def page():
+            number = next(counter)
+            users.find(
+                Eq("name", f"user {number % DOCUMENTS}"),
+                offset=number % 50,
+                limit=1 + number % 20,
+            )
+
+        def count():
+            number = next(counter)
+            users.count(
+                And(
+                    Or(Eq("age", number % 90), Lt("age", 3)),
+                    In("name", ["user 1", "user 2", f"user {number}"]),
+                )
+            )
+
+        def update_one():
+            number = next(counter)
+            users.update_one(
+                Eq("name", f"user {number % DOCUMENTS}"), Set("age", 1)
+            )
+
+        def find_one():
+            number = next(counter)
+            users.find_one(Eq("name", f"user {number % DOCUMENTS}"))
+
+        report("find page (offset, limit)", measure(page, REPEAT), REPEAT)
+        report("count, compound query", measure(count, REPEAT), REPEAT)
+        report("find_one by name", measure(find_one, REPEAT), REPEAT)
+        report("update_one", measure(update_one, REPEAT), REPEAT)
+
+
+if __name__ == "__main__":
+    main()
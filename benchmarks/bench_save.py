@@ -0,0 +1,54 @@
+"""
+Saving a loaded document after incrementing a counter in it: replacing the
+whole document, which SQLite rewrites together with every index, against
+save(), which only sets the changed field.
+"""
+from common import measure, report, temp_database
+
+from bosc import Document
+from bosc.collection import OnConflict
+
+DOCUMENTS = 1_000
+REPEAT = 5
+
+
+class User(Document):
+    name: str
+    logins: int = 0
+    bio: str
+    history: list
+
+
+def main():
+    with temp_database() as db:
+        User.bosc_database = db
+        User.insert_many(
+            [
+                User(
+                    name=f"user {number}",
+                    bio="x" * 10_000,
+                    history=[{"event": "login", "at": n} for n in range(300)],
+                )
+                for number in range(DOCUMENTS)
+            ]
+        )
+        users = User.find()
+
+        def replace():
+            for user in users:
+                user.logins += 1
+                user.insert(OnConflict.REPLACE)
+
+        def save():
+            for user in users:
+                user.logins += 1
+                user.save()
+
+        for name, func in (("insert REPLACE", replace), ("save", save)):
+            seconds = measure(func, REPEAT)
+            report(f"Document, {name}", seconds, REPEAT * DOCUMENTS)
+        assert User.get(users[0].id).logins == 2 * REPEAT
+
+
+if __name__ == "__main__":
+    main()
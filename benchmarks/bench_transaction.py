@@ -0,0 +1,46 @@
+"""
+Per-document insert throughput with and without a transaction.
+
+Outside a transaction every insert is its own WAL commit. Inside one, the
+inserts share a single commit at the end.
+"""
+from common import measure, report, temp_database
+
+from bosc import Document
+
+DOCUMENTS = 5_000
+
+
+class User(Document):
+    name: str
+    age: int
+
+
+def insert_users():
+    for number in range(DOCUMENTS):
+        User(name=f"user {number}", age=number % 90).insert()
+
+
+def main():
+    with temp_database() as db:
+        User.bosc_database = db
+        report(
+            "Document.insert, commit per call",
+            measure(insert_users, 1),
+            DOCUMENTS,
+        )
+
+        def in_transaction():
+            with User.transaction():
+                insert_users()
+
+        report(
+            "Document.insert, one transaction",
+            measure(in_transaction, 1),
+            DOCUMENTS,
+        )
+        assert User.count() == 2 * DOCUMENTS
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Update operators.
+
+Appending an event to a capped list and counting it in every document:
+loading each document, editing it in Python and saving it, against one
+UPDATE statement with Push and Inc.
+"""
+from common import measure, report, temp_database
+
+from bosc import Inc
+from bosc.collection import OnConflict
+from bosc.query.update import Push
+
+DOCUMENTS = 10_000
+REPEAT = 5
+
+
+def main():
+    with temp_database() as db:
+        users = db.users
+        users.insert_many(
+            [
+                {"id": number, "events": list(range(10)), "count": 0}
+                for number in range(DOCUMENTS)
+            ]
+        )
+
+        def python_edit():
+            documents = users.find()
+            for document in documents:
+                document["events"] = [*document["events"], "login"][-10:]
+                document["count"] += 1
+            users.insert_many(documents, OnConflict.REPLACE)
+
+        def operators():
+            users.update(
+                None, Push("events", "login", max_length=10), Inc("count")
+            )
+
+        for name, func in (
+            ("find, edit and save", python_edit),
+            ("Push and Inc", operators),
+        ):
+            seconds = measure(func, REPEAT)
+            report(f"update, {name}", seconds, REPEAT * DOCUMENTS)
+        assert users.get(0)["count"] == 2 * REPEAT
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Idempotent ingest keyed on (source, external_id), half of the records new
+and half updating stored ones: a find_one on the key and a save of the
+merged document per record, against a single upsert_many.
+"""
+from common import measure, report, temp_database
+
+from bosc import And, Eq, Index, IndexType
+from bosc.collection import OnConflict
+
+STORED = 10_000
+RECORDS = 5_000
+KEY = ["source", "external_id"]
+
+
+def main():
+    with temp_database() as db:
+        records = db.records
+        records.create_index(Index(KEY, IndexType.UNIQUE))
+
+        def fill():
+            records.delete()
+            records.insert_many(
+                [
+                    {"source": "feed", "external_id": number, "seen": 1}
+                    for number in range(STORED)
+                ]
+            )
+
+        def batch():
+            return [
+                {"source": "feed", "external_id": number, "seen": 2}
+                for number in range(
+                    STORED - RECORDS // 2, STORED + RECORDS // 2
+                )
+            ]
+
+        def find_and_save():
+            for record in batch():
+                stored = records.find_one(
+                    And(
+                        Eq("source", record["source"]),
+                        Eq("external_id", record["external_id"]),
+                    )
+                )
+                if stored is not None:
+                    record = {**stored, **record, "id": stored["id"]}
+                records.insert(record, OnConflict.REPLACE)
+
+        def upsert_many():
+            records.upsert_many(batch(), key=KEY)
+
+        for name, func in (
+            ("find_one and save", find_and_save),
+            ("upsert_many", upsert_many),
+        ):
+            fill()
+            seconds = measure(func, 1)
+            report(f"upsert, {name}", seconds, RECORDS)
+            assert records.count() == STORED + RECORDS // 2
+            assert records.count(Eq("seen", 2)) == RECORDS
+
+
+if __name__ == "__main__":
+    main()
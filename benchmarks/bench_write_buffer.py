@@ -0,0 +1,77 @@
+"""
+Throughput of small inserts issued one at a time by many producer threads.
+
+Compares Document.insert, which commits every document, with
+Document.insert_buffered, which queues them in the collection's write
+buffer. Buffered producers either wait for the commit of every document or
+only for all of them at the end.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from common import measure, report, temp_database
+
+from bosc import Document
+
+PRODUCERS = 16
+DOCUMENTS = 5_000
+
+
+class Event(Document):
+    source: str
+    value: float
+
+
+def produce(insert):
+    def run():
+        with ThreadPoolExecutor(max_workers=PRODUCERS) as executor:
+            list(executor.map(insert, range(DOCUMENTS)))
+
+    return run
+
+
+def insert(number):
+    Event(source=f"sensor {number % 100}", value=number / 10).insert()
+
+
+def insert_buffered(number):
+    event = Event(source=f"sensor {number % 100}", value=number / 10)
+    event.insert_buffered().result()
+
+
+def insert_without_waiting(futures):
+    def insert(number):
+        event = Event(source=f"sensor {number % 100}", value=number / 10)
+        futures.append(event.insert_buffered())
+
+    def run():
+        produce(insert)()
+        for future in futures:
+            future.result()
+
+    return run
+
+
+def main():
+    with temp_database() as db:
+        Event.bosc_database = db
+        report(
+            f"Document.insert, {PRODUCERS} threads",
+            measure(produce(insert), 1),
+            DOCUMENTS,
+        )
+        report(
+            f"Document.insert_buffered, {PRODUCERS} threads",
+            measure(produce(insert_buffered), 1),
+            DOCUMENTS,
+        )
+        report(
+            f"Document.insert_buffered, {PRODUCERS} threads, no wait",
+            measure(insert_without_waiting([]), 1),
+            DOCUMENTS,
+        )
+        assert Event.count() == 3 * DOCUMENTS
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
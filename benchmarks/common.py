@@ -0,0 +1,26 @@
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+from bosc import Database
+
+
+@contextmanager
+def temp_database():
+    with tempfile.TemporaryDirectory() as directory:
+        yield Database(os.path.join(directory, "bench.db"))
+
+
+def measure(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return time.perf_counter() - start
+
+
+def report(name: str, seconds: float, operations: int):
+    print(
+        f"{name:<48} {operations / seconds:>12,.0f} ops/s "
+        f"{seconds / operations * 1e6:>10.1f} us/op"
+    )
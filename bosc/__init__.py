@@ -1,9 +1,51 @@
+from bosc.aio import AsyncCollection, AsyncDatabase
+from bosc.buffer import WriteBuffer
+from bosc.bulk import (
+    BulkWriteResult,
+    DeleteMany,
+    DeleteOne,
+    InsertOne,
+    ReplaceOne,
+    UpdateMany,
+    UpdateOne,
+)
 from bosc.collection import Collection, OrderDirection
+from bosc.connection import TransactionMode
 from bosc.database import Database
 from bosc.document import Document
 from bosc.index import Index, IndexType
-from bosc.query.find import And, Eq, Gt, Gte, In, Lt, Lte, Neq, Nin, Or
-from bosc.query.update import Inc, Now, RemoveField, Set
+from bosc.query.find import (
+    All,
+    And,
+    Contains,
+    ElemMatch,
+    Eq,
+    Gt,
+    Gte,
+    In,
+    Lt,
+    Lte,
+    Match,
+    Neq,
+    Nin,
+    Or,
+    Size,
+)
+from bosc.query.update import (
+    AddToSet,
+    Inc,
+    Max,
+    Merge,
+    Min,
+    Mul,
+    Now,
+    Pull,
+    Push,
+    RemoveField,
+    Rename,
+    Set,
+    Unset,
+)
 
 __version__ = "0.0.7"
 __all__ = [
@@ -11,6 +53,19 @@ __all__ = [
     "Database",
     "Collection",
     "OrderDirection",
+    "TransactionMode",
+    "WriteBuffer",
+    # Bulk writes
+    "BulkWriteResult",
+    "InsertOne",
+    "ReplaceOne",
+    "UpdateOne",
+    "UpdateMany",
+    "DeleteOne",
+    "DeleteMany",
+    # Asyncio
+    "AsyncDatabase",
+    "AsyncCollection",
     # Index
     "Index",
     "IndexType",
@@ -27,9 +82,25 @@ __all__ = [
     "Nin",
     "And",
     "Or",
+    "Match",
+    "Contains",
+    "All",
+    "Size",
+    "ElemMatch",
     # Update Queries
     "Set",
     "Inc",
     "RemoveField",
     "Now",
+    "Push",
+    "Pull",
+    "AddToSet",
+    "Merge",
+    "Min",
+    "Max",
+    "Mul",
+    "Rename",
+    "Unset",
+    # Accumulators of aggregations are in bosc.query.aggregate, as some are
+    # named like update operators
 ]
@@ -0,0 +1,366 @@
+import asyncio
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import (
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+from bosc.bulk import BulkOperation, BulkWriteResult
+from bosc.collection import Collection, OnConflict, OrderDirection
+from bosc.database import Database
+from bosc.index import Index
+from bosc.query.base import Accumulator, Query, UpdateOperation
+from bosc.query.find.fulltext import Match
+
+T = TypeVar("T")
+
+
+class AsyncDatabase:
+    """
+    Asyncio interface to a Database.
+
+    Every call runs on a dedicated thread pool sized to the connection pool:
+    one thread per reader connection plus one for the writer.
+    """
+
+    def __init__(
+        self,
+        database: Union[str, Database],
+        pool_size: int = 8,
+        busy_timeout: float = 5.0,
+        cached_statements: int = 128,
+    ):
+        if isinstance(database, Database):
+            self.database = database
+        else:
+            self.database = Database(
+                database, pool_size, busy_timeout, cached_statements
+            )
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.database.pool.pool_size + 1,
+            thread_name_prefix="bosc",
+        )
+        self._collections: Dict[str, AsyncCollection] = {}
+
+    def __getattr__(self, collection_name: str):
+        if collection_name.startswith("_"):
+            raise AttributeError(collection_name)
+        return self[collection_name]
+
+    def __getitem__(self, collection_name: str):
+        collection = self._collections.get(collection_name)
+        if collection is None:
+            collection = AsyncCollection(collection_name, self)
+            self._collections[collection_name] = collection
+        return collection
+
+    async def run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, partial(func, *args, **kwargs)
+        )
+
+    async def iterate(self, batches: Iterator[List[T]]) -> AsyncIterator[T]:
+        """
+        Drive a generator of batches on the executor, one batch per call,
+        and yield its items. The generator is closed when the iteration
+        stops, including on an early break.
+        """
+        try:
+            while True:
+                batch = await self.run(next, batches, None)
+                if batch is None:
+                    return
+                for item in batch:
+                    yield item
+        finally:
+            await self.run(batches.close)
+
+    async def drop_collection(self, collection_name: str):
+        await self.run(self.database.drop_collection, collection_name)
+
+    async def drop_all_collections(self):
+        await self.run(self.database.drop_all_collections)
+
+    async def drop_all_indexes(self):
+        await self.run(self.database.drop_all_indexes)
+
+    async def close(self):
+        await self.run(self.database.close)
+        self.executor.shutdown()
+
+
+class _InsertBatcher:
+    """
+    Collects inserts issued by concurrent coroutines during one event loop
+    iteration and writes them with a single insert_many call per conflict
+    mode, so they share one statement and one commit.
+    """
+
+    def __init__(self, collection: "AsyncCollection"):
+        self.collection = collection
+        self._pending: List[Tuple[Dict, OnConflict, asyncio.Future]] = []
+        self._writes: Set[asyncio.Task] = set()
+
+    async def insert(self, document: Dict, on_conflict: OnConflict) -> Dict:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if not self._pending:
+            loop.call_soon(self._flush)
+        self._pending.append((document, on_conflict, future))
+        return await future
+
+    def _flush(self):
+        pending, self._pending = self._pending, []
+        batches: Dict[OnConflict, List[Tuple[Dict, asyncio.Future]]] = {}
+        for document, on_conflict, future in pending:
+            batches.setdefault(on_conflict, []).append((document, future))
+        for on_conflict, batch in batches.items():
+            task = asyncio.ensure_future(self._write(on_conflict, batch))
+            self._writes.add(task)
+            task.add_done_callback(self._writes.discard)
+
+    async def _write(
+        self, on_conflict: OnConflict, batch: List[Tuple[Dict, asyncio.Future]]
+    ):
+        documents = [document for document, _ in batch]
+        try:
+            results = await self.collection.database.run(
+                self.collection.get_collection()._insert_batch,
+                documents,
+                on_conflict,
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+class AsyncCollection:
+    def __init__(self, collection_name: str, database: AsyncDatabase):
+        self.collection_name = collection_name
+        self.database = database
+        self._insert_batcher = _InsertBatcher(self)
+
+    def get_collection(self) -> Collection:
+        return self.database.database[self.collection_name]
+
+    async def _run(self, method_name: str, *args, **kwargs):
+        def call():
+            method = getattr(self.get_collection(), method_name)
+            return method(*args, **kwargs)
+
+        return await self.database.run(call)
+
+    async def insert(
+        self, document: dict, on_conflict: OnConflict = OnConflict.RAISE
+    ) -> Dict:
+        if not isinstance(document, dict):
+            raise ValueError("Document must be a dictionary")
+        if "id" not in document:
+            document["id"] = uuid.uuid4().hex
+        return await self._insert_batcher.insert(document, on_conflict)
+
+    async def insert_many(
+        self, documents: list, on_conflict: OnConflict = OnConflict.RAISE
+    ) -> None:
+        await self._run("insert_many", documents, on_conflict)
+
+    async def load(
+        self,
+        source: Union[str, os.PathLike, Iterable[Union[Dict, str]]],
+        chunk_size: int = 1000,
+        on_conflict: OnConflict = OnConflict.RAISE,
+        progress: Optional[Callable[[int, float], None]] = None,
+    ) -> int:
+        return await self._run(
+            "load", source, chunk_size, on_conflict, progress
+        )
+
+    async def upsert_many(
+        self,
+        documents: List[Dict],
+        key: Union[str, Sequence[str]],
+        merge: bool = True,
+    ) -> None:
+        await self._run("upsert_many", documents, key, merge)
+
+    async def bulk_write(
+        self, operations: Iterable[BulkOperation], ordered: bool = True
+    ) -> BulkWriteResult:
+        return await self._run("bulk_write", list(operations), ordered)
+
+    async def find(
+        self,
+        query: Optional[Query] = None,
+        order_by: Union[str, Match, None] = None,
+        order_direction: OrderDirection = OrderDirection.ASC,
+        offset: Optional[int] = None,
+        limit: Optional[int] = None,
+        raw: bool = False,
+        projection: Optional[Sequence[str]] = None,
+    ) -> Union[List[Dict], List[str]]:
+        return await self._run(
+            "find",
+            query,
+            order_by,
+            order_direction,
+            offset,
+            limit,
+            raw,
+            projection,
+        )
+
+    async def find_page(
+        self,
+        query: Optional[Query] = None,
+        order_by: Union[str, Sequence[str], None] = None,
+        order_direction: OrderDirection = OrderDirection.ASC,
+        after: Optional[str] = None,
+        limit: int = 100,
+        raw: bool = False,
+    ) -> Tuple[Union[List[Dict], List[str]], Optional[str]]:
+        return await self._run(
+            "find_page", query, order_by, order_direction, after, limit, raw
+        )
+
+    async def iter_find(
+        self,
+        query: Optional[Query] = None,
+        order_by: Union[str, Match, None] = None,
+        order_direction: OrderDirection = OrderDirection.ASC,
+        offset: Optional[int] = None,
+        limit: Optional[int] = None,
+        batch_size: int = 100,
+        raw: bool = False,
+        projection: Optional[Sequence[str]] = None,
+    ) -> Union[AsyncIterator[Dict], AsyncIterator[str]]:
+        batches = await self._run(
+            "_find_batches",
+            query,
+            order_by,
+            order_direction,
+            offset,
+            limit,
+            batch_size,
+            raw,
+            projection,
+        )
+        async for document in self.database.iterate(batches):
+            yield document
+
+    async def find_one(
+        self,
+        query: Optional[Query] = None,
+        order_by: Union[str, Match, None] = None,
+        order_direction: OrderDirection = OrderDirection.ASC,
+        raw: bool = False,
+        projection: Optional[Sequence[str]] = None,
+    ) -> Union[Dict, str, None]:
+        return await self._run(
+            "find_one", query, order_by, order_direction, raw, projection
+        )
+
+    async def get(
+        self, document_id, raw: bool = False
+    ) -> Union[Dict, str, None]:
+        return await self._run("get", document_id, raw)
+
+    async def get_many(
+        self, document_ids: Iterable, raw: bool = False
+    ) -> Union[List[Optional[Dict]], List[Optional[str]]]:
+        return await self._run("get_many", document_ids, raw)
+
+    async def count(self, query: Optional[Query] = None) -> int:
+        return await self._run("count", query)
+
+    async def aggregate(
+        self,
+        query: Optional[Query] = None,
+        group_by: Union[str, Sequence[str], None] = None,
+        accumulators: Optional[Dict[str, Accumulator]] = None,
+        raw: bool = False,
+    ) -> Union[List[Dict], List[str]]:
+        return await self._run("aggregate", query, group_by, accumulators, raw)
+
+    async def update(
+        self, query: Optional[Query] = None, *operations: UpdateOperation
+    ) -> int:
+        return await self._run("update", query, *operations)
+
+    async def update_one(
+        self, query: Optional[Query] = None, *operations: UpdateOperation
+    ) -> int:
+        return await self._run("update_one", query, *operations)
+
+    async def find_one_and_update(
+        self,
+        query: Optional[Query] = None,
+        *operations: UpdateOperation,
+        order_by: Optional[str] = None,
+        order_direction: OrderDirection = OrderDirection.ASC,
+        return_new: bool = True,
+        raw: bool = False,
+    ) -> Union[Dict, str, None]:
+        return await self._run(
+            "find_one_and_update",
+            query,
+            *operations,
+            order_by=order_by,
+            order_direction=order_direction,
+            return_new=return_new,
+            raw=raw,
+        )
+
+    async def delete(self, query: Optional[Query] = None):
+        await self._run("delete", query)
+
+    async def delete_one(self, query: Optional[Query] = None):
+        await self._run("delete_one", query)
+
+    async def find_one_and_delete(
+        self,
+        query: Optional[Query] = None,
+        order_by: Optional[str] = None,
+        order_direction: OrderDirection = OrderDirection.ASC,
+        raw: bool = False,
+    ) -> Union[Dict, str, None]:
+        return await self._run(
+            "find_one_and_delete", query, order_by, order_direction, raw
+        )
+
+    async def get_indexes(self) -> List[Index]:
+        return await self._run("get_indexes")
+
+    async def create_index(self, index: Index):
+        await self._run("create_index", index)
+
+    async def drop_index(self, index: Union[str, Index]):
+        await self._run("drop_index", index)
+
+    async def drop_all_indexes(self):
+        await self._run("drop_all_indexes")
+
+    async def sync_indexes(self, indexes: List[Index]):
+        await self._run("sync_indexes", indexes)
@@ -0,0 +1,192 @@
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any, Callable, List, Optional, Tuple
+
+from bosc.collection import OnConflict
+from bosc.query.base import Query, UpdateOperation
+
+if TYPE_CHECKING:
+    from bosc.collection import Collection
+
+_INSERT = "insert"
+
+
+class WriteBuffer:
+    """
+    Write-behind buffer of a collection.
+
+    Writes from any number of threads are queued and written by a background
+    thread in one transaction. A batch is written when max_size writes are
+    pending or the oldest one waited max_delay seconds. With no delay, the
+    batch is whatever was queued while the previous one was committing.
+    Consecutive inserts with the same conflict mode share an executemany
+    statement. Every write returns a future that resolves once the
+    transaction is committed, or fails with the error of that write alone.
+    """
+
+    def __init__(
+        self,
+        collection: "Collection",
+        max_size: int = 1000,
+        max_delay: float = 0.0,
+    ):
+        if max_size < 1:
+            raise ValueError("Buffer size must be at least 1")
+        self.collection = collection
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self.closed = False
+        self._pending: List[Tuple[str, tuple, Future]] = []
+        self._first_at = 0.0
+        self._condition = threading.Condition()
+        # Held while a batch is taken and written, so that batches are
+        # committed in the order they were queued.
+        self._write_lock = threading.Lock()
+        self._flusher = threading.Thread(
+            target=self._run,
+            name=f"bosc-buffer-{collection.collection_name}",
+            daemon=True,
+        )
+        self._flusher.start()
+
+    def insert(
+        self, document: dict, on_conflict: OnConflict = OnConflict.RAISE
+    ) -> Future:
+        if not isinstance(document, dict):
+            raise ValueError("Document must be a dictionary")
+        if "id" not in document:
+            document["id"] = uuid.uuid4().hex
+        return self._add(_INSERT, (document, on_conflict))
+
+    def save(self, document: dict) -> Future:
+        return self.insert(document, OnConflict.REPLACE)
+
+    def update(
+        self, query: Optional[Query] = None, *operations: UpdateOperation
+    ) -> Future:
+        return self._add("update", (query, *operations))
+
+    def update_one(
+        self, query: Optional[Query] = None, *operations: UpdateOperation
+    ) -> Future:
+        return self._add("update_one", (query, *operations))
+
+    def delete(self, query: Optional[Query] = None) -> Future:
+        return self._add("delete", (query,))
+
+    def delete_one(self, query: Optional[Query] = None) -> Future:
+        return self._add("delete_one", (query,))
+
+    def _check_transaction(self, action: str):
+        if self.collection.database.pool.in_transaction():
+            # The background thread may be waiting for the writer, which
+            # the transaction holds until it ends
+            raise RuntimeError(f"Write buffer can't {action} in a transaction")
+
+    def _add(self, operation: str, args: tuple) -> Future:
+        # Waiting for the future in the transaction would never end
+        self._check_transaction("queue writes")
+        future: Future = Future()
+        with self._condition:
+            if self.closed:
+                raise RuntimeError("Write buffer is closed")
+            if not self._pending:
+                self._first_at = time.monotonic()
+            self._pending.append((operation, args, future))
+            if len(self._pending) in (1, self.max_size):
+                self._condition.notify()
+        return future
+
+    def flush(self):
+        """
+        Write the pending writes now and wait until they are committed.
+        """
+        self._check_transaction("flush")
+        with self._write_lock:
+            with self._condition:
+                batch, self._pending = self._pending, []
+            self._write(batch)
+
+    def close(self):
+        """
+        Write the pending writes and stop the background thread.
+        """
+        with self._condition:
+            self.closed = True
+            self._condition.notify()
+        self._flusher.join()
+        self.flush()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self.closed:
+                    self._condition.wait()
+                if self.closed:
+                    return
+                deadline = self._first_at + self.max_delay
+                while (
+                    len(self._pending) < self.max_size
+                    and not self.closed
+                    and self._wait_time(deadline) > 0
+                ):
+                    self._condition.wait(self._wait_time(deadline))
+            self.flush()
+
+    @staticmethod
+    def _wait_time(deadline: float) -> float:
+        return deadline - time.monotonic()
+
+    def _write(self, batch: List[Tuple[str, tuple, Future]]):
+        if not batch:
+            return
+        results: List[Any] = []
+        try:
+            with self.collection.database.transaction():
+                start = 0
+                while start < len(batch):
+                    end = self._group_end(batch, start)
+                    results.extend(self._write_group(batch[start:end]))
+                    start = end
+        except BaseException as e:
+            for _, _, future in batch:
+                future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+            return
+        for (_, _, future), result in zip(batch, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    @staticmethod
+    def _group_end(batch: List[Tuple[str, tuple, Future]], start: int) -> int:
+        operation, args, _ = batch[start]
+        end = start + 1
+        if operation != _INSERT:
+            return end
+        while (
+            end < len(batch)
+            and batch[end][0] == _INSERT
+            and batch[end][1][1] == args[1]
+        ):
+            end += 1
+        return end
+
+    def _write_group(self, group: List[Tuple[str, tuple, Future]]) -> List:
+        operation, args, _ = group[0]
+        collection = self.collection
+        if operation != _INSERT:
+            return [self._call(getattr(collection, operation), *args)]
+        documents = [write[1][0] for write in group]
+        return collection._insert_batch(documents, args[1])
+
+    @staticmethod
+    def _call(method: Callable, *args) -> Any:
+        try:
+            return method(*args)
+        except Exception as e:
+            return e
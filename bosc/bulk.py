@@ -0,0 +1,120 @@
+import dataclasses as dc
+import json
+import uuid
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+from bosc.encoder import doc_key
+from bosc.query.base import Query, UpdateOperation
+from bosc.query.find.comparison import ID_COLUMN
+
+if TYPE_CHECKING:
+    from bosc.collection import Collection
+
+
+class BulkOperation:
+    """
+    Write of Collection.bulk_write.
+    """
+
+    # Writes of exactly one document. Their counts are known without
+    # running them one by one, so they are run with executemany.
+    single = False
+
+    def statement(self, collection: "Collection") -> Tuple[str, List]:
+        raise NotImplementedError(
+            "This method should be implemented by subclasses."
+        )
+
+
+def _document_params(document: dict) -> List:
+    if not isinstance(document, dict):
+        raise ValueError("Document must be a dictionary")
+    if "id" not in document:
+        document["id"] = uuid.uuid4().hex
+    return [doc_key(document["id"]), json.dumps(document)]
+
+
+class InsertOne(BulkOperation):
+    single = True
+
+    def __init__(self, document: dict):
+        self.document = document
+
+    def statement(self, collection):
+        return (
+            f"INSERT INTO {collection.collection_name} ({ID_COLUMN}, data) VALUES (?, json(?))",
+            _document_params(self.document),
+        )
+
+
+class ReplaceOne(BulkOperation):
+    """
+    Replace the stored document with the id of the document. With upsert,
+    the document is inserted when there is none.
+    """
+
+    def __init__(self, document: dict, upsert: bool = True):
+        self.document = document
+        self.upsert = upsert
+        self.single = upsert
+
+    def statement(self, collection):
+        document_key, data = _document_params(self.document)
+        if self.upsert:
+            return (
+                f"INSERT OR REPLACE INTO {collection.collection_name} ({ID_COLUMN}, data) VALUES (?, json(?))",
+                [document_key, data],
+            )
+        return (
+            f"UPDATE {collection.collection_name} SET data = json(?) WHERE {ID_COLUMN} = ?",
+            [data, document_key],
+        )
+
+
+class UpdateMany(BulkOperation):
+    def __init__(
+        self, query: Optional[Query] = None, *operations: UpdateOperation
+    ):
+        self.query = query
+        self.operations = operations
+
+    def statement(self, collection):
+        return collection._update_statement(
+            self.query, self.operations, one=False
+        )
+
+
+class UpdateOne(UpdateMany):
+    def statement(self, collection):
+        return collection._update_statement(
+            self.query, self.operations, one=True
+        )
+
+
+class DeleteMany(BulkOperation):
+    def __init__(self, query: Optional[Query] = None):
+        self.query = query
+
+    def statement(self, collection):
+        return collection._delete_statement(self.query, one=False)
+
+
+class DeleteOne(DeleteMany):
+    def statement(self, collection):
+        return collection._delete_statement(self.query, one=True)
+
+
+@dc.dataclass
+class BulkWriteResult:
+    """
+    Outcome of Collection.bulk_write. counts holds the number of documents
+    written by each operation, in the order they were given. Documents
+    inserted by upserting replaces are in upserted_count, not in
+    updated_count.
+    """
+
+    counts: List[int] = dc.field(default_factory=list)
+    inserted_count: int = 0
+    updated_count: int = 0
+    deleted_count: int = 0
+    upserted_count: int = 0
@@ -1,16 +1,120 @@
+import base64
+import binascii
 import json
 import logging
+import os
+import re
+import time
 import uuid
 from contextlib import contextmanager
 from enum import Enum
-from typing import Dict, List, Optional, Union
+from itertools import islice
+from sqlite3 import IntegrityError, OperationalError
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
-from bosc.index import Index, IndexType
-from bosc.query.base import Query, UpdateOperation
-from bosc.query.find.comparison import Eq
+from bosc.bulk import (
+    BulkOperation,
+    BulkWriteResult,
+    DeleteMany,
+    InsertOne,
+    ReplaceOne,
+)
+from bosc.connection import TransactionMode
+from bosc.encoder import doc_key, encode
+from bosc.index import Index, IndexType, column_name
+from bosc.query.base import (
+    Accumulator,
+    Query,
+    UpdateOperation,
+    json_value_sql,
+)
+from bosc.query.find.array import elements_head
+from bosc.query.find.comparison import ID_COLUMN, ID_FIELD, Eq
+from bosc.query.find.fulltext import Match
+
+if TYPE_CHECKING:
+    from bosc.buffer import WriteBuffer
 
 logger = logging.getLogger(__name__)
 
+# Ids per statement of get_many, well below SQLite's default limit of 999
+# variables in older versions
+GET_MANY_CHUNK_SIZE = 500
+
+# Statements of distinct shapes kept per collection
+STATEMENT_CACHE_SIZE = 256
+
+# Name of the id index of every collection in older versions. Index names
+# are global to the database, so only the first collection got one.
+_LEGACY_ID_INDEX = "idx_unique_id"
+
+# Stands for the update expression while the rest of a statement is
+# rewritten to read generated columns, see Collection._compile
+_UPDATE_MARK = "/* update */"
+
+
+def _projection_sql(projection: Optional[Sequence[str]]) -> str:
+    """
+    Selected column of a find: the whole document, or a JSON object of the
+    projected fields, built by SQLite so that the rest of the document is
+    never parsed in Python. Fields missing from a document are null.
+    """
+    if projection is None:
+        return "data"
+    pairs = ", ".join(
+        f"'{field}', {json_value_sql(field)}" for field in projection
+    )
+    return f"json_object({pairs})"
+
+
+def trigger_indexes(cursor, collection_name: Optional[str] = None) -> Dict:
+    """
+    Indexes kept in tables of their own by triggers on the collection, of
+    one collection or of all of them: the SQL of the FTS5 table of a
+    full-text index, or of the insert trigger of a multikey index, by
+    index name.
+    """
+    sql = (
+        "SELECT side.name, side.sql, trigger.sql FROM sqlite_master AS side "
+        "JOIN sqlite_master AS trigger ON trigger.name = side.name || '_insert' "
+        "WHERE side.type = 'table' AND trigger.type = 'trigger'"
+    )
+    params = []
+    if collection_name is not None:
+        sql += " AND trigger.tbl_name = ?"
+        params.append(collection_name)
+    cursor.execute(sql + " ORDER BY side.name", params)
+    return {
+        name: (
+            table_sql
+            if table_sql.startswith("CREATE VIRTUAL TABLE")
+            else trigger_sql
+        )
+        for name, table_sql, trigger_sql in cursor.fetchall()
+    }
+
+
+def drop_trigger_index(cursor, index_name: str):
+    """
+    Drop the table of a full-text or multikey index, the content view of
+    a full-text one and the triggers keeping it in sync.
+    """
+    for suffix in ("insert", "delete", "update"):
+        cursor.execute(f'DROP TRIGGER IF EXISTS "{index_name}_{suffix}"')
+    cursor.execute(f'DROP TABLE IF EXISTS "{index_name}"')
+    cursor.execute(f'DROP VIEW IF EXISTS "{index_name}_content"')
+
 
 class OrderDirection(str, Enum):
     ASC = "ASC"
@@ -23,29 +127,285 @@ class OnConflict(str, Enum):
     RAISE = "RAISE"
 
 
+_INSERT_VERBS = {
+    OnConflict.REPLACE: "INSERT OR REPLACE",
+    OnConflict.IGNORE: "INSERT OR IGNORE",
+    OnConflict.RAISE: "INSERT",
+}
+
+
+def iter_source(source: Union[str, os.PathLike, Iterable]) -> Iterator:
+    """
+    Items of an iterable, or the lines of the JSONL file at a path,
+    skipping blank lines.
+    """
+    if not isinstance(source, (str, os.PathLike)):
+        yield from source
+        return
+    with open(source, encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                yield line
+
+
+def _load_row(item: Union[Dict, str]) -> Tuple:
+    """
+    doc_id and data of a loaded document. JSON text is only parsed to read
+    its id, and is stored as it is when it has one.
+    """
+    if isinstance(item, str):
+        document = json.loads(item)
+        if isinstance(document, dict) and "id" in document:
+            return doc_key(document["id"]), item
+    else:
+        document = item
+    if not isinstance(document, dict):
+        raise ValueError("Document must be a dictionary")
+    if "id" not in document:
+        document["id"] = uuid.uuid4().hex
+    return doc_key(document["id"]), json.dumps(document)
+
+
+def _keyset_condition(
+    keys: List[str], nulls: Tuple[bool, ...], order_direction: OrderDirection
+) -> str:
+    """
+    Condition matching the rows sorted after the row whose sort keys are
+    given as parameters. The last key is the row id, which is never NULL.
+    """
+    ascending = order_direction == OrderDirection.ASC
+    # SQLite doesn't seek an index for a row value or an OR of keys. A
+    # redundant bound on the first key does, and only the rows sharing its
+    # value are skipped by scanning. In descending order NULLs sort last
+    # and can't be bounded.
+    bound = (
+        f"{keys[0]} >= ? AND " if _has_bound(nulls, order_direction) else ""
+    )
+    if ascending and not any(nulls):
+        # NULLs sort first, so no row after the last one has a NULL key
+        # where the last row has a value, and a row value comparison is
+        # exact.
+        placeholders = ", ".join(["?"] * len(keys))
+        return f"{bound}({', '.join(keys)}) > ({placeholders})"
+    # Lexicographic comparison, with NULL as the smallest value
+    alternatives = []
+    for position, (key, is_null) in enumerate(zip(keys, nulls)):
+        equal = [f"{prefix} IS ?" for prefix in keys[:position]]
+        if ascending:
+            after = f"{key} IS NOT NULL" if is_null else f"{key} > ?"
+        elif is_null:
+            # Nothing sorts before NULL
+            continue
+        else:
+            after = f"({key} < ? OR {key} IS NULL)"
+        alternatives.append(" AND ".join([*equal, after]))
+    expansion = " OR ".join(f"({part})" for part in alternatives)
+    return f"{bound}({expansion})"
+
+
+def _has_bound(nulls: Tuple[bool, ...], order_direction: OrderDirection):
+    return (
+        order_direction == OrderDirection.ASC
+        and len(nulls) > 1
+        and not nulls[0]
+    )
+
+
+def _keyset_params(last: List, order_direction: OrderDirection) -> List:
+    """
+    Parameters of the condition made by _keyset_condition.
+    """
+    params = []
+    if _has_bound(tuple(value is None for value in last), order_direction):
+        params.append(last[0])
+    if order_direction == OrderDirection.ASC and None not in last:
+        return params + list(last)
+    for position, value in enumerate(last):
+        if value is None and order_direction == OrderDirection.DESC:
+            continue
+        params.extend(last[:position])
+        if value is not None:
+            params.append(value)
+    return params
+
+
 class Collection:
-    def __init__(self, collection_name, connection, database):
-        self.connection = connection
-        self.connection.execute("PRAGMA journal_mode=WAL;")
+    def __init__(self, collection_name, database):
         self.collection_name = collection_name
         self.database = database
+        self._write_buffer: Optional["WriteBuffer"] = None
+        # Statement SQL by statement and query shape, see _compile
+        self._statements: Dict[Tuple, str] = {}
+        # Generated columns by path, see IndexType.COLUMN
+        self._columns: Dict[str, str] = {}
+        # Tables of the multikey indexes by path, see IndexType.MULTIKEY
+        self._multikeys: Dict[str, str] = {}
         self._create_table()
 
+    @property
+    def connection(self):
+        return self.database.connection
+
     @contextmanager
-    def _cursor(self):
-        cursor = self.connection.cursor()
-        try:
-            yield cursor
-        finally:
-            cursor.close()
+    def _read_cursor(self):
+        with self.database.pool.reader() as connection:
+            cursor = connection.cursor()
+            try:
+                yield cursor
+            except OperationalError as e:
+                self._check_schema_error(e)
+                raise
+            finally:
+                cursor.close()
+
+    @contextmanager
+    def _write_cursor(self):
+        with self.database.pool.writer() as connection:
+            cursor = connection.cursor()
+            try:
+                yield cursor
+            except OperationalError as e:
+                self._check_schema_error(e)
+                raise
+            finally:
+                cursor.close()
+
+    def _check_schema_error(self, error: OperationalError):
+        # The table or a generated column may have been dropped by another
+        # connection since the schema was last checked
+        if str(error).startswith(("no such table", "no such column")):
+            self.database._forget_schema()
 
     def _create_table(self):
-        with self._cursor() as cursor:
-            cursor.execute(
-                f"CREATE TABLE IF NOT EXISTS {self.collection_name} (id INTEGER PRIMARY KEY, data JSON)"
+        # Look the table and its id index up in the catalog first, so that
+        # opening an existing collection doesn't run any DDL or commit.
+        id_index = Index(
+            ID_FIELD,
+            IndexType.UNIQUE,
+            name=f"idx_{self.collection_name}_unique_id",
+        )
+        with self._read_cursor() as cursor:
+            existing = self._get_catalog(cursor, id_index)
+            self._load_multikeys(cursor)
+        table_sql = existing.get(self.collection_name)
+        self._load_columns(table_sql)
+        if table_sql is None:
+            with self._write_cursor() as cursor:
+                cursor.execute(
+                    f"CREATE TABLE IF NOT EXISTS {self.collection_name} (id INTEGER PRIMARY KEY, {ID_COLUMN}, data JSON)"
+                )
+                self.database.pool.commit()
+        elif ID_COLUMN not in table_sql:
+            self._migrate_id_column(id_index)
+            return
+        if id_index.name not in existing:
+            with self.database.transaction():
+                if _LEGACY_ID_INDEX in existing:
+                    with self._write_cursor() as cursor:
+                        cursor.execute(f'DROP INDEX "{_LEGACY_ID_INDEX}"')
+                self.create_index(id_index)
+
+    def _get_catalog(self, cursor, id_index: Index) -> Dict[str, str]:
+        """
+        SQL of the table, of its id index and of the id index of older
+        versions, if it is on this table, by name.
+        """
+        cursor.execute(
+            "SELECT name, sql FROM sqlite_master WHERE tbl_name = ? AND name IN (?, ?, ?)",
+            [
+                self.collection_name,
+                self.collection_name,
+                id_index.name,
+                _LEGACY_ID_INDEX,
+            ],
+        )
+        return dict(cursor.fetchall())
+
+    def _load_columns(self, table_sql: Optional[str]):
+        """
+        Read the generated columns from the SQL of the table, and forget
+        the statements compiled without them.
+        """
+        paths = re.findall(r'"\$\.([^"]+)" GENERATED', table_sql or "")
+        columns = {path: column_name(path) for path in paths}
+        if columns != self._columns:
+            self._columns = columns
+            self._statements.clear()
+
+    def _load_multikeys(self, cursor):
+        """
+        Read the tables of the multikey indexes from the catalog, and
+        forget the statements compiled without them.
+        """
+        multikeys = {
+            index.paths[0]: index.name
+            for index in (
+                Index.from_sql(name, sql)
+                for name, sql in trigger_indexes(
+                    cursor, self.collection_name
+                ).items()
             )
-            self.connection.commit()
-        self.create_index(Index("id", IndexType.UNIQUE))
+            if index.index_type == IndexType.MULTIKEY
+        }
+        if multikeys != self._multikeys:
+            self._multikeys = multikeys
+            self._statements.clear()
+
+    def _refresh_columns(self, cursor):
+        cursor.execute(
+            "SELECT sql FROM sqlite_master WHERE type='table' AND name = ?",
+            [self.collection_name],
+        )
+        self._load_columns(cursor.fetchone()[0])
+        self._load_multikeys(cursor)
+
+    def _use_columns(self, sql: str) -> str:
+        """
+        Read the paths that have a generated column from the column. It has
+        the same value and can be read from its index. Likewise, look the
+        elements of the arrays with a multikey index up in its table.
+        """
+        for path, column in self._columns.items():
+            # Qualified, as an unknown quoted name would be read as a string
+            sql = sql.replace(
+                f"json_extract(data, '$.{path}')",
+                f"{self.collection_name}.{column}",
+            )
+        for path, table in self._multikeys.items():
+            sql = sql.replace(
+                elements_head(path),
+                f'{self.collection_name}.id IN (SELECT doc FROM "{table}" AS element WHERE ',
+            )
+        return sql
+
+    def _migrate_id_column(self, id_index: Index):
+        """
+        Move the document ids of a table created by an older version, which
+        only kept them in the JSON, to the indexed id column.
+        """
+        with self.database.transaction(TransactionMode.IMMEDIATE):
+            with self._write_cursor() as cursor:
+                # Another connection may have migrated it meanwhile
+                existing = self._get_catalog(cursor, id_index)
+                if ID_COLUMN in existing[self.collection_name]:
+                    return
+                cursor.execute(
+                    f"ALTER TABLE {self.collection_name} ADD COLUMN {ID_COLUMN}"
+                )
+                cursor.execute(
+                    f"SELECT id, json_extract(data, '$.id') FROM {self.collection_name}"
+                )
+                cursor.executemany(
+                    f"UPDATE {self.collection_name} SET {ID_COLUMN} = ? WHERE id = ?",
+                    [
+                        (doc_key(document_id), row_id)
+                        for row_id, document_id in cursor.fetchall()
+                    ],
+                )
+                for name in (id_index.name, _LEGACY_ID_INDEX):
+                    if name in existing:
+                        cursor.execute(f'DROP INDEX "{name}"')
+            self.create_index(id_index)
 
     def insert(
         self, document: dict, on_conflict: OnConflict = OnConflict.RAISE
@@ -55,35 +415,35 @@ class Collection:
         if "id" not in document:
             document["id"] = uuid.uuid4().hex
 
-        with self._cursor() as cursor:
+        with self._write_cursor() as cursor:
             if on_conflict == OnConflict.REPLACE:
                 cursor.execute(
-                    f"INSERT OR REPLACE INTO {self.collection_name} (data) "
-                    f"VALUES (json(?)) "
+                    f"INSERT OR REPLACE INTO {self.collection_name} ({ID_COLUMN}, data) "
+                    f"VALUES (?, json(?)) "
                     f"RETURNING data",
-                    [json.dumps(document)],
+                    [doc_key(document["id"]), json.dumps(document)],
                 )
 
             elif on_conflict == OnConflict.IGNORE:
                 cursor.execute(
-                    f"INSERT OR IGNORE INTO {self.collection_name} (data) "
-                    f"VALUES (json(?)) "
+                    f"INSERT OR IGNORE INTO {self.collection_name} ({ID_COLUMN}, data) "
+                    f"VALUES (?, json(?)) "
                     f"RETURNING data",
-                    [json.dumps(document)],
+                    [doc_key(document["id"]), json.dumps(document)],
                 )
             else:
                 try:
                     cursor.execute(
-                        f"INSERT INTO {self.collection_name} (data) "
-                        f"VALUES (json(?)) "
+                        f"INSERT INTO {self.collection_name} ({ID_COLUMN}, data) "
+                        f"VALUES (?, json(?)) "
                         f"RETURNING data",
-                        [json.dumps(document)],
+                        [doc_key(document["id"]), json.dumps(document)],
                     )
                 except Exception as e:
-                    self.connection.rollback()
+                    self.database.pool.rollback()
                     raise e
             inserted_document = cursor.fetchone()
-            self.connection.commit()
+            self.database.pool.commit()
 
         if inserted_document is None and on_conflict == OnConflict.IGNORE:
             logger.warning(
@@ -96,234 +456,1090 @@ class Collection:
     def insert_many(
         self, documents: list, on_conflict: OnConflict = OnConflict.RAISE
     ) -> None:
-        documents_as_json = [(json.dumps(doc),) for doc in documents]
-        with self._cursor() as cursor:
+        for document in documents:
+            if "id" not in document:
+                document["id"] = uuid.uuid4().hex
+        documents_as_json = [
+            (doc_key(document["id"]), json.dumps(document))
+            for document in documents
+        ]
+        with self._write_cursor() as cursor:
             if on_conflict == OnConflict.REPLACE:
                 cursor.executemany(
-                    f"INSERT OR REPLACE INTO {self.collection_name} (data) VALUES (json(?))",
+                    f"INSERT OR REPLACE INTO {self.collection_name} ({ID_COLUMN}, data) VALUES (?, json(?))",
                     documents_as_json,
                 )
             elif on_conflict == OnConflict.IGNORE:
                 cursor.executemany(
-                    f"INSERT OR IGNORE INTO {self.collection_name} (data) VALUES (json(?))",
+                    f"INSERT OR IGNORE INTO {self.collection_name} ({ID_COLUMN}, data) VALUES (?, json(?))",
                     documents_as_json,
                 )
             else:
                 try:
                     cursor.executemany(
-                        f"INSERT INTO {self.collection_name} (data) VALUES (json(?))",
+                        f"INSERT INTO {self.collection_name} ({ID_COLUMN}, data) VALUES (?, json(?))",
                         documents_as_json,
                     )
                 except Exception as e:
-                    self.connection.rollback()
+                    self.database.pool.rollback()
                     raise e
-            self.connection.commit()
+            self.database.pool.commit()
+
+    def _insert_batch(
+        self, documents: List[Dict], on_conflict: OnConflict
+    ) -> List[Union[Dict, Exception]]:
+        """
+        Insert the documents with one insert_many, or one by one if it
+        fails, so that only the conflicting documents fail. The result has
+        the inserted document or the error of each document.
+        """
+        if len(documents) > 1 and on_conflict != OnConflict.IGNORE:
+            # IGNORE returns the stored document, which needs a lookup per
+            # document anyway.
+            try:
+                with self.database.transaction():
+                    self.insert_many(documents, on_conflict)
+                return documents
+            except IntegrityError:
+                # The transaction or savepoint is rolled back
+                pass
+        results: List[Union[Dict, Exception]] = []
+        for document in documents:
+            try:
+                results.append(self.insert(document, on_conflict))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def load(
+        self,
+        source: Union[str, os.PathLike, Iterable[Union[Dict, str]]],
+        chunk_size: int = 1000,
+        on_conflict: OnConflict = OnConflict.RAISE,
+        progress: Optional[Callable[[int, float], None]] = None,
+    ) -> int:
+        """
+        Insert the documents of an iterable of dicts or JSON strings, or of
+        the JSONL file at a path, with one executemany per chunk of
+        chunk_size documents, all in one transaction. The source is read
+        as the chunks are written, so only one chunk is held in memory.
+        After every chunk, progress is called with the number of documents
+        written so far and the seconds elapsed. Returns the number of
+        written documents, which leaves out those ignored on conflict.
+        """
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be at least 1")
+        sql = f"{_INSERT_VERBS[OnConflict(on_conflict)]} INTO {self.collection_name} ({ID_COLUMN}, data) VALUES (?, json(?))"
+        rows = map(_load_row, iter_source(source))
+        written = 0
+        start = time.perf_counter()
+        with self.database.transaction(), self._write_cursor() as cursor:
+            while True:
+                chunk = list(islice(rows, chunk_size))
+                if not chunk:
+                    break
+                cursor.executemany(sql, chunk)
+                written += cursor.rowcount
+                if progress is not None:
+                    progress(written, time.perf_counter() - start)
+        return written
+
+    def upsert_many(
+        self,
+        documents: list,
+        key: Union[str, Sequence[str]],
+        merge: bool = True,
+    ) -> None:
+        """
+        Insert the documents, or update the stored documents with the same
+        values at the key paths. The key needs a unique index on exactly
+        these paths, such as Index(key, IndexType.UNIQUE). With merge, the
+        fields of the document are merged into the stored one as a JSON
+        merge patch: objects are merged field by field and fields set to
+        None are removed. Otherwise the document replaces the stored one.
+        Stored documents keep their ids either way. Documents missing a key
+        path are always inserted, as unique indexes allow repeated nulls.
+        """
+        if isinstance(key, str):
+            key = [key]
+        if not key:
+            raise ValueError("Upsert needs at least one key path")
+        target = ", ".join(
+            (
+                ID_COLUMN
+                if path == ID_FIELD
+                else f"json_extract(data, '$.{path}')"
+            )
+            for path in key
+        )
+        if merge:
+            update_sql = "json_patch(data, json_remove(excluded.data, '$.id'))"
+        else:
+            update_sql = (
+                "json_set(excluded.data, '$.id', json_extract(data, '$.id'))"
+            )
+        for document in documents:
+            if "id" not in document:
+                document["id"] = uuid.uuid4().hex
+        with self._write_cursor() as cursor:
+            try:
+                cursor.executemany(
+                    f"INSERT INTO {self.collection_name} ({ID_COLUMN}, data) VALUES (?, json(?)) "
+                    f"ON CONFLICT ({target}) DO UPDATE SET data = {update_sql}",
+                    [
+                        (doc_key(document["id"]), json.dumps(document))
+                        for document in documents
+                    ],
+                )
+            except Exception as e:
+                self.database.pool.rollback()
+                raise e
+            self.database.pool.commit()
+
+    def bulk_write(
+        self, operations: Iterable[BulkOperation], ordered: bool = True
+    ) -> BulkWriteResult:
+        """
+        Run the writes in one transaction, committed once. Consecutive
+        writes of the same statement run together, the inserts and
+        upserts with a single executemany. Unordered, writes of the same
+        statement run together wherever they are in the list, which may
+        change the outcome of writes to the same documents. An error rolls
+        all the writes back.
+        """
+        operations = list(operations)
+        statements = [operation.statement(self) for operation in operations]
+        # Statements with the positions of their writes, in running order
+        groups: List[Tuple[str, List[int]]] = []
+        positions_by_sql: Dict[str, List[int]] = {}
+        for position, (sql, _) in enumerate(statements):
+            if ordered:
+                last = groups[-1] if groups else None
+                positions = last[1] if last and last[0] == sql else None
+            else:
+                positions = positions_by_sql.get(sql)
+            if positions is None:
+                positions = positions_by_sql[sql] = []
+                groups.append((sql, positions))
+            positions.append(position)
+        result = BulkWriteResult([0] * len(operations))
+        if not operations:
+            return result
+        # Positions of the upserts that insert their document
+        upserted = set()
+        with self.database.transaction(), self._write_cursor() as cursor:
+            for sql, positions in groups:
+                if operations[positions[0]].single:
+                    if isinstance(operations[positions[0]], ReplaceOne):
+                        # INSERT OR REPLACE counts one row either way
+                        keys = [statements[p][1][0] for p in positions]
+                        upserted.update(
+                            position
+                            for position, new in zip(
+                                positions, self._new_keys(cursor, keys)
+                            )
+                            if new
+                        )
+                    cursor.executemany(
+                        sql,
+                        [statements[position][1] for position in positions],
+                    )
+                    for position in positions:
+                        result.counts[position] = 1
+                    continue
+                # executemany only reports the total count. The statement
+                # stays prepared between the executions anyway.
+                for position in positions:
+                    cursor.execute(sql, statements[position][1])
+                    result.counts[position] = cursor.rowcount
+        for position, (operation, count) in enumerate(
+            zip(operations, result.counts)
+        ):
+            if isinstance(operation, InsertOne):
+                result.inserted_count += count
+            elif position in upserted:
+                result.upserted_count += count
+            elif isinstance(operation, DeleteMany):
+                result.deleted_count += count
+            else:
+                result.updated_count += count
+        return result
+
+    def _new_keys(self, cursor, keys: List) -> List[bool]:
+        """
+        Whether each document key is not stored yet. Of repeated keys, only
+        the first is new.
+        """
+        stored = set()
+        unique = list(dict.fromkeys(keys))
+        for start in range(0, len(unique), GET_MANY_CHUNK_SIZE):
+            chunk = unique[start : start + GET_MANY_CHUNK_SIZE]
+            placeholders = ", ".join(["?"] * len(chunk))
+            cursor.execute(
+                f"SELECT {ID_COLUMN} FROM {self.collection_name} WHERE {ID_COLUMN} IN ({placeholders})",
+                chunk,
+            )
+            stored.update(key for key, in cursor.fetchall())
+        new = []
+        for key in keys:
+            new.append(key not in stored)
+            stored.add(key)
+        return new
+
+    def get_write_buffer(
+        self, max_size: int = 1000, max_delay: float = 0.0
+    ) -> "WriteBuffer":
+        """
+        Write buffer of the collection. It is created with the given
+        thresholds on first use and reused until it is closed.
+        """
+        if self._write_buffer is None or self._write_buffer.closed:
+            from bosc.buffer import WriteBuffer
+
+            self._write_buffer = WriteBuffer(self, max_size, max_delay)
+        return self._write_buffer
 
     def find(
         self,
         query: Optional[Query] = None,
-        order_by: str = None,
+        order_by: Union[str, Match, None] = None,
         order_direction: OrderDirection = OrderDirection.ASC,
         offset: Optional[int] = None,
         limit: Optional[int] = None,
-    ) -> List[Dict]:
-        with self._cursor() as cursor:
-            if query:
-                where_clause, query_val = query.to_sql()
-                sql = f"SELECT data FROM {self.collection_name} WHERE {where_clause}"
-            else:
-                sql = f"SELECT data FROM {self.collection_name}"
-                query_val = ()
-            if order_by:
+        raw: bool = False,
+        projection: Optional[Sequence[str]] = None,
+    ) -> Union[List[Dict], List[str]]:
+        """
+        Found documents. With a projection, only the listed fields of each
+        document are returned. Ordering by a Match query finds the
+        documents matching it too, best matches first.
+        """
+        sql, query_val = self._find_sql(
+            query, order_by, order_direction, offset, limit, projection
+        )
+        with self._read_cursor() as cursor:
+            cursor.execute(sql, query_val)
+            if raw:
+                return [row[0] for row in cursor.fetchall()]
+            return [json.loads(row[0]) for row in cursor.fetchall()]
+
+    def _find_sql(
+        self,
+        query: Optional[Query],
+        order_by: Union[str, Match, None],
+        order_direction: OrderDirection,
+        offset: Optional[int],
+        limit: Optional[int],
+        projection: Optional[Sequence[str]] = None,
+    ) -> Tuple[str, List]:
+        order_direction = OrderDirection(order_direction)
+        if projection is not None:
+            projection = tuple(str(field) for field in projection)
+
+        ranked = isinstance(order_by, Match)
+        if order_by is not None and not ranked:
+            order_by = str(order_by)
+
+        def render(where_clause: Optional[str], _) -> str:
+            column = _projection_sql(projection)
+            sql = f"SELECT {column} FROM {self.collection_name}"
+            if ranked:
+                sql += f" JOIN ({order_by.search_sql()}) AS fulltext ON fulltext.rowid = {self.collection_name}.id"
+            if where_clause:
+                sql += f" WHERE {where_clause}"
+            if ranked:
+                sql += f" ORDER BY fulltext.rank {order_direction.value}"
+            elif order_by:
                 sql += f" ORDER BY json_extract(data, '$.{order_by}') {order_direction.value}"
             if limit is not None:
-                sql += f" LIMIT {limit}"
-            elif offset is not None:
+                sql += " LIMIT ?"
+            elif offset:
                 sql += " LIMIT -1"
             if offset:
-                sql += f" OFFSET {offset}"
-            cursor.execute(sql, query_val)
-            return [json.loads(row[0]) for row in cursor.fetchall()]
+                sql += " OFFSET ?"
+            return sql
 
-    def find_one(
+        sql, params = self._compile(
+            (
+                "find",
+                order_by.shape() if ranked else order_by,
+                order_direction,
+                limit is None,
+                not offset,
+                projection,
+            ),
+            render,
+            query,
+        )
+        if ranked:
+            params[:0] = order_by.params()
+        if limit is not None:
+            params.append(limit)
+        if offset:
+            params.append(offset)
+        return sql, params
+
+    def find_page(
         self,
         query: Optional[Query] = None,
-        order_by: str = None,
+        order_by: Union[str, Sequence[str], None] = None,
         order_direction: OrderDirection = OrderDirection.ASC,
-    ) -> Optional[Dict]:
-        with self._cursor() as cursor:
-            if query:
-                where_clause, query_params = query.to_sql()
-                sql = f"SELECT data FROM {self.collection_name} WHERE {where_clause}"
+        after: Optional[str] = None,
+        limit: int = 100,
+        raw: bool = False,
+    ) -> Tuple[Union[List[Dict], List[str]], Optional[str]]:
+        """
+        One page of the found documents, sorted by the order_by fields and
+        the row id as a tiebreaker, and the token of the next page, or None
+        for the last page. Pass the token as after to get the next page.
+
+        Pages continue after the sort keys of the last row instead of
+        skipping rows with OFFSET, so every page costs the same when an
+        index covers the order_by fields.
+        """
+        if limit < 1:
+            raise ValueError("Page limit must be at least 1")
+        if isinstance(order_by, str):
+            order_by = [order_by]
+        order_by = [str(field) for field in order_by or []]
+        order_direction = OrderDirection(order_direction)
+        keys = [f"json_extract(data, '$.{field}')" for field in order_by]
+        last = None
+        if after is not None:
+            last = self._decode_page_token(after, order_by, order_direction)
+        nulls = None if last is None else tuple(v is None for v in last)
+
+        def render(where_clause: Optional[str], _) -> str:
+            columns = ", ".join(["id", "data", *keys])
+            sql = f"SELECT {columns} FROM {self.collection_name}"
+            conditions = []
+            if where_clause:
+                conditions.append(f"({where_clause})")
+            if nulls is not None:
+                conditions.append(
+                    _keyset_condition([*keys, "id"], nulls, order_direction)
+                )
+            if conditions:
+                sql += f" WHERE {' AND '.join(conditions)}"
+            direction = order_direction.value
+            order = ", ".join(f"{key} {direction}" for key in [*keys, "id"])
+            return f"{sql} ORDER BY {order} LIMIT ?"
+
+        sql, params = self._compile(
+            ("page", tuple(order_by), order_direction, nulls), render, query
+        )
+        if last is not None:
+            params.extend(_keyset_params(last, order_direction))
+        params.append(limit + 1)
+        with self._read_cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        token = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last_row = rows[-1]
+            token = self._encode_page_token(
+                [*last_row[2:], last_row[0]], order_by, order_direction
+            )
+        if raw:
+            return [row[1] for row in rows], token
+        return [json.loads(row[1]) for row in rows], token
+
+    @staticmethod
+    def _encode_page_token(
+        values: List, order_by: List[str], order_direction: OrderDirection
+    ) -> str:
+        payload = json.dumps([order_by, order_direction.value, values])
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    @staticmethod
+    def _decode_page_token(
+        token: str, order_by: List[str], order_direction: OrderDirection
+    ) -> List:
+        try:
+            payload = base64.urlsafe_b64decode(token.encode())
+            token_order_by, token_direction, values = json.loads(payload)
+        except (binascii.Error, UnicodeError, TypeError, ValueError):
+            raise ValueError("Invalid page token")
+        if (
+            token_order_by != order_by
+            or token_direction != order_direction.value
+            or len(values) != len(order_by) + 1
+        ):
+            raise ValueError("Page token was made for another sort order")
+        return values
+
+    def iter_find(
+        self,
+        query: Optional[Query] = None,
+        order_by: Union[str, Match, None] = None,
+        order_direction: OrderDirection = OrderDirection.ASC,
+        offset: Optional[int] = None,
+        limit: Optional[int] = None,
+        batch_size: int = 100,
+        raw: bool = False,
+        projection: Optional[Sequence[str]] = None,
+    ) -> Union[Iterator[Dict], Iterator[str]]:
+        """
+        Lazily iterate over the found documents, fetching batch_size rows
+        at a time. The cursor is closed once the generator is exhausted or
+        closed, e.g. when the loop consuming it breaks.
+        """
+        batches = self._find_batches(
+            query,
+            order_by,
+            order_direction,
+            offset,
+            limit,
+            batch_size,
+            raw,
+            projection,
+        )
+        try:
+            for batch in batches:
+                yield from batch
+        finally:
+            batches.close()
+
+    def _find_batches(
+        self,
+        query: Optional[Query] = None,
+        order_by: Union[str, Match, None] = None,
+        order_direction: OrderDirection = OrderDirection.ASC,
+        offset: Optional[int] = None,
+        limit: Optional[int] = None,
+        batch_size: int = 100,
+        raw: bool = False,
+        projection: Optional[Sequence[str]] = None,
+    ) -> Union[Iterator[List[Dict]], Iterator[List[str]]]:
+        sql, query_val = self._find_sql(
+            query, order_by, order_direction, offset, limit, projection
+        )
+        for rows in self._row_batches(sql, query_val, batch_size):
+            if raw:
+                yield [row[0] for row in rows]
             else:
-                sql = f"SELECT data FROM {self.collection_name}"
-                query_params = []
-            if order_by:
-                sql += f" ORDER BY json_extract(data, '$.{order_by}') {order_direction.value}"
-            sql += " LIMIT 1"
+                yield [json.loads(row[0]) for row in rows]
+
+    def _row_batches(
+        self, sql: str, params: List, batch_size: int
+    ) -> Iterator[List[Tuple]]:
+        if self.database.pool.in_memory:
+            # Reads of in-memory databases hold the writer. It can't stay
+            # locked between batches, which async iteration fetches on
+            # different threads, so all rows are fetched at once.
+            with self._read_cursor() as cursor:
+                rows = cursor.execute(sql, params).fetchall()
+            for start in range(0, len(rows), batch_size):
+                yield rows[start : start + batch_size]
+            return
+        with self._read_cursor() as cursor:
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield rows
 
-            cursor.execute(sql, query_params)
+    def find_one(
+        self,
+        query: Optional[Query] = None,
+        order_by: Union[str, Match, None] = None,
+        order_direction: OrderDirection = OrderDirection.ASC,
+        raw: bool = False,
+        projection: Optional[Sequence[str]] = None,
+    ) -> Union[Dict, str, None]:
+        sql, params = self._find_sql(
+            query, order_by, order_direction, None, 1, projection
+        )
+        with self._read_cursor() as cursor:
+            cursor.execute(sql, params)
             row = cursor.fetchone()
-            if row:
-                return json.loads(row[0])
-            return None
+            if row is None:
+                return None
+            if raw:
+                return row[0]
+            return json.loads(row[0])
 
-    def get(self, document_id) -> Optional[Dict]:
-        return self.find_one(Eq("id", document_id))
+    def get(self, document_id, raw: bool = False) -> Union[Dict, str, None]:
+        return self.find_one(Eq("id", document_id), raw=raw)
+
+    def get_many(
+        self, document_ids: Iterable, raw: bool = False
+    ) -> Union[List[Optional[Dict]], List[Optional[str]]]:
+        """
+        Look several documents up by id with one IN query per chunk of ids.
+        The result is aligned with document_ids, with None for the ids that
+        weren't found.
+        """
+        keys = [doc_key(encode(document_id)) for document_id in document_ids]
+        found = {}
+        with self._read_cursor() as cursor:
+            for start in range(0, len(keys), GET_MANY_CHUNK_SIZE):
+                chunk = keys[start : start + GET_MANY_CHUNK_SIZE]
+                placeholders = ", ".join(["?"] * len(chunk))
+                cursor.execute(
+                    f"SELECT {ID_COLUMN}, data FROM {self.collection_name} WHERE {ID_COLUMN} IN ({placeholders})",
+                    chunk,
+                )
+                found.update(cursor.fetchall())
+        if raw:
+            return [found.get(key) for key in keys]
+        return [
+            None if data is None else json.loads(data)
+            for data in map(found.get, keys)
+        ]
 
     def count(self, query: Optional[Query] = None) -> int:
-        with self._cursor() as cursor:
-            if query:
-                where_clause, query_val = query.to_sql()
-                sql = f"SELECT COUNT(*) FROM {self.collection_name} WHERE {where_clause}"
-            else:
-                sql = f"SELECT COUNT(*) FROM {self.collection_name}"
-                query_val = ()
-            cursor.execute(sql, query_val)
+        def render(where_clause: Optional[str], _) -> str:
+            sql = f"SELECT COUNT(*) FROM {self.collection_name}"
+            if where_clause:
+                sql += f" WHERE {where_clause}"
+            return sql
+
+        sql, params = self._compile(("count",), render, query)
+        with self._read_cursor() as cursor:
+            cursor.execute(sql, params)
             return cursor.fetchone()[0]
 
-    def update(
-        self, query: Optional[Query] = None, *operations: UpdateOperation
-    ):
-        with self._cursor() as cursor:
-
-            # Initialize where_clause and query_params
-            where_clause, query_params = ("", [])
-            if query:
-                # Convert query to SQL only if query is not None
-                where_clause, query_params = query.to_sql()
-                where_clause = f"WHERE {where_clause}"  # Prefix with WHERE only if there's a query
-
-            # Prepare SQL update expressions and parameters from operations
-            update_expressions = []
-            update_params = []
-            for op in operations:
-                sql_part, params = op.to_sql_update()
-                update_expressions.append(sql_part)
-                update_params.extend(params)
-
-            # Combine update expressions into a single SQL statement
-            update_sql = ", ".join(update_expressions)
+    def aggregate(
+        self,
+        query: Optional[Query] = None,
+        group_by: Union[str, Sequence[str], None] = None,
+        accumulators: Optional[Dict[str, Accumulator]] = None,
+        raw: bool = False,
+    ) -> Union[List[Dict], List[str]]:
+        """
+        Group the found documents by the group_by fields and compute the
+        accumulators of every group in a single statement. Each result holds
+        the values of the group_by fields and of the accumulators by name,
+        and the results are sorted by the group_by fields. Without group_by
+        all the documents form one group.
+        """
+        if isinstance(group_by, str):
+            group_by = [group_by]
+        group_by = tuple(str(field) for field in group_by or ())
+        accumulators = list((accumulators or {}).items())
+        for name, _ in accumulators:
+            if name in group_by:
+                raise ValueError(
+                    f"{name} is both a group_by field and an accumulator"
+                )
+        keys = ", ".join(
+            f"json_extract(data, '$.{field}')" for field in group_by
+        )
+
+        def render(where_clause: Optional[str], _) -> str:
+            pairs = [
+                f"'{field}', {json_value_sql(field)}" for field in group_by
+            ]
+            pairs.extend(
+                f"'{name}', {accumulator.to_sql_aggregate()}"
+                for name, accumulator in accumulators
+            )
+            sql = f"SELECT json_object({', '.join(pairs)}) FROM {self.collection_name}"
             if where_clause:
-                sql = f"UPDATE {self.collection_name} SET data = {update_sql} {where_clause}"
-            else:
-                sql = f"UPDATE {self.collection_name} SET data = {update_sql}"
+                sql += f" WHERE {where_clause}"
+            if keys:
+                sql += f" GROUP BY {keys} ORDER BY {keys}"
+            return sql
 
-            # Execute the update query with the combined parameters (if any)
-            if query_params:
-                cursor.execute(sql, update_params + query_params)
-            else:
-                cursor.execute(sql, update_params)
-            self.connection.commit()
+        shapes = tuple(accumulator.shape() for _, accumulator in accumulators)
+        key = None
+        if None not in shapes:
+            names = tuple(name for name, _ in accumulators)
+            key = ("aggregate", group_by, names, shapes)
+        sql, params = self._compile(key, render, query)
+        with self._read_cursor() as cursor:
+            cursor.execute(sql, params)
+            if raw:
+                return [row[0] for row in cursor.fetchall()]
+            return [json.loads(row[0]) for row in cursor.fetchall()]
+
+    def update(
+        self, query: Optional[Query] = None, *operations: UpdateOperation
+    ) -> int:
+        """
+        Apply the operations to the found documents. Returns the number of
+        updated documents.
+        """
+        return self._update(query, operations, one=False)
 
     def update_one(
         self,
         query: Optional[Query] = None,
         *operations: UpdateOperation,
-    ):
-        with self._cursor() as cursor:
-            # Initialize where_clause and query_params
-            where_clause, query_params = ("", [])
-            if query:
-                # Convert query to SQL only if query is not None
-                where_clause, query_params = query.to_sql()
-                where_clause = f"WHERE {where_clause}"
-
-            # Prepare SQL update expressions and parameters from operations
-            update_expressions = []
-            update_params = []
-            for op in operations:
-                sql_part, params = op.to_sql_update()
-                update_expressions.append(sql_part)
-                update_params.extend(params)
-
-            # Combine update expressions into a single SQL statement
-            update_sql = ", ".join(update_expressions)
+    ) -> int:
+        return self._update(query, operations, one=True)
+
+    def _update(
+        self,
+        query: Optional[Query],
+        operations: Tuple[UpdateOperation, ...],
+        one: bool,
+        order_by: Optional[str] = None,
+        order_direction: OrderDirection = OrderDirection.ASC,
+        returning: bool = False,
+    ) -> Union[int, Optional[str]]:
+        """
+        Update the found documents, or the first of them. Returns the number
+        of updated documents, or with returning the updated document, None
+        if none was found.
+        """
+        sql, params = self._update_statement(
+            query, operations, one, order_by, order_direction, returning
+        )
+        with self._write_cursor() as cursor:
+            cursor.execute(sql, params)
+            if not returning:
+                self.database.pool.commit()
+                return cursor.rowcount
+            row = cursor.fetchone()
+            self.database.pool.commit()
+        return None if row is None else row[0]
+
+    def _update_statement(
+        self,
+        query: Optional[Query],
+        operations: Tuple[UpdateOperation, ...],
+        one: bool,
+        order_by: Optional[str] = None,
+        order_direction: OrderDirection = OrderDirection.ASC,
+        returning: bool = False,
+    ) -> Tuple[str, List]:
+        if order_by is not None:
+            order_by = str(order_by)
+        order_direction = OrderDirection(order_direction)
+
+        def render(where_clause: Optional[str], update_sql: str) -> str:
+            sql = f"UPDATE {self.collection_name} SET data = {update_sql}"
+            if one:
+                first_sql = self._first_sql(
+                    where_clause, order_by, order_direction
+                )
+                where_clause = f"id = ({first_sql})"
             if where_clause:
-                sql = f"UPDATE {self.collection_name} SET data = {update_sql} {where_clause} LIMIT 1"
-            else:
-                sql = f"UPDATE {self.collection_name} SET data = {update_sql} LIMIT 1"
+                sql += f" WHERE {where_clause}"
+            if returning:
+                sql += " RETURNING data"
+            return sql
 
-            # Execute the update query with the combined parameters (if any)
-            if query_params:
-                cursor.execute(sql, update_params + query_params)
-            else:
-                cursor.execute(sql, update_params)
-            self.connection.commit()
+        return self._compile(
+            ("update", one, order_by, order_direction, returning),
+            render,
+            query,
+            operations,
+        )
+
+    def find_one_and_update(
+        self,
+        query: Optional[Query] = None,
+        *operations: UpdateOperation,
+        order_by: Optional[str] = None,
+        order_direction: OrderDirection = OrderDirection.ASC,
+        return_new: bool = True,
+        raw: bool = False,
+    ) -> Union[Dict, str, None]:
+        """
+        Apply the operations to the first found document, in the order of
+        order_by, and return it as updated, or as it was before with
+        return_new=False. None if no document was found. Finding and
+        updating the document can't be interleaved with other writes, even
+        from other processes, so concurrent callers never get the same
+        document.
+        """
+        if return_new:
+            data = self._update(
+                query,
+                operations,
+                one=True,
+                order_by=order_by,
+                order_direction=order_direction,
+                returning=True,
+            )
+        else:
+            data = self._find_and_update_old(
+                query, operations, order_by, order_direction
+            )
+        if data is None or raw:
+            return data
+        return json.loads(data)
+
+    def _find_and_update_old(
+        self,
+        query: Optional[Query],
+        operations: Tuple[UpdateOperation, ...],
+        order_by: Optional[str],
+        order_direction: OrderDirection,
+    ) -> Optional[str]:
+        # RETURNING only sees the new values, so the document is read first,
+        # holding the write lock until it is updated
+        if order_by is not None:
+            order_by = str(order_by)
+        order_direction = OrderDirection(order_direction)
+
+        def render_find(where_clause: Optional[str], _) -> str:
+            return self._first_sql(
+                where_clause, order_by, order_direction, "id, data"
+            )
+
+        def render_update(_, update_sql: str) -> str:
+            return f"UPDATE {self.collection_name} SET data = {update_sql} WHERE id = ?"
+
+        find_sql, find_params = self._compile(
+            ("find_first", order_by, order_direction), render_find, query
+        )
+        update_sql, update_params = self._compile(
+            ("update_by_rowid",), render_update, None, operations
+        )
+        with self.database.transaction(
+            TransactionMode.IMMEDIATE
+        ), self._write_cursor() as cursor:
+            cursor.execute(find_sql, find_params)
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            cursor.execute(update_sql, [*update_params, row[0]])
+        return row[1]
 
     def delete(self, query: Optional[Query] = None):
-        with self._cursor() as cursor:
-            if query:
-                where_clause, query_val = query.to_sql()
-                sql = (
-                    f"DELETE FROM {self.collection_name} WHERE {where_clause}"
-                )
-            else:
-                sql = f"DELETE FROM {self.collection_name}"
-                query_val = ()
-            cursor.execute(sql, query_val)
-            self.connection.commit()
+        self._delete(query, one=False)
 
     def delete_one(self, query: Optional[Query] = None):
-        with self._cursor() as cursor:
-            if query:
-                where_clause, query_val = query.to_sql()
-                sql = f"DELETE FROM {self.collection_name} WHERE {where_clause} LIMIT 1"
+        self._delete(query, one=True)
+
+    def find_one_and_delete(
+        self,
+        query: Optional[Query] = None,
+        order_by: Optional[str] = None,
+        order_direction: OrderDirection = OrderDirection.ASC,
+        raw: bool = False,
+    ) -> Union[Dict, str, None]:
+        """
+        Delete the first found document, in the order of order_by, and
+        return it. None if no document was found.
+        """
+        data = self._delete(
+            query,
+            one=True,
+            order_by=order_by,
+            order_direction=order_direction,
+            returning=True,
+        )
+        if data is None or raw:
+            return data
+        return json.loads(data)
+
+    def _delete(
+        self,
+        query: Optional[Query],
+        one: bool,
+        order_by: Optional[str] = None,
+        order_direction: OrderDirection = OrderDirection.ASC,
+        returning: bool = False,
+    ) -> Optional[str]:
+        sql, params = self._delete_statement(
+            query, one, order_by, order_direction, returning
+        )
+        with self._write_cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone() if returning else None
+            self.database.pool.commit()
+        return None if row is None else row[0]
+
+    def _delete_statement(
+        self,
+        query: Optional[Query],
+        one: bool,
+        order_by: Optional[str] = None,
+        order_direction: OrderDirection = OrderDirection.ASC,
+        returning: bool = False,
+    ) -> Tuple[str, List]:
+        if order_by is not None:
+            order_by = str(order_by)
+        order_direction = OrderDirection(order_direction)
+
+        def render(where_clause: Optional[str], _) -> str:
+            sql = f"DELETE FROM {self.collection_name}"
+            if one:
+                first_sql = self._first_sql(
+                    where_clause, order_by, order_direction
+                )
+                where_clause = f"id = ({first_sql})"
+            if where_clause:
+                sql += f" WHERE {where_clause}"
+            if returning:
+                sql += " RETURNING data"
+            return sql
+
+        return self._compile(
+            ("delete", one, order_by, order_direction, returning),
+            render,
+            query,
+        )
+
+    def _first_sql(
+        self,
+        where_clause: Optional[str],
+        order_by: Optional[str],
+        order_direction: OrderDirection,
+        columns: str = "id",
+    ) -> str:
+        """
+        Query of the first found document. Statements on a single document
+        select it by rowid with it, as UPDATE and DELETE only take a LIMIT
+        in SQLite builds with SQLITE_ENABLE_UPDATE_DELETE_LIMIT.
+        """
+        sql = f"SELECT {columns} FROM {self.collection_name}"
+        if where_clause:
+            sql += f" WHERE {where_clause}"
+        if order_by:
+            sql += f" ORDER BY json_extract(data, '$.{order_by}') {order_direction.value}"
+        return sql + " LIMIT 1"
+
+    def _compile(
+        self,
+        key: Optional[Tuple],
+        render: Callable[[Optional[str], str], str],
+        query: Optional[Query],
+        operations: Tuple[UpdateOperation, ...] = (),
+    ) -> Tuple[str, List]:
+        """
+        SQL and parameters of a statement on the collection. render builds
+        the SQL from the WHERE clause of the query and the update
+        expression of the operations. The SQL is cached by key and the
+        shapes of the query and the operations, so that running a statement
+        of a known shape only collects the parameters. A key of None means
+        the statement isn't cached.
+
+        Each operation updates the document produced by the previous ones,
+        read as the data column of a subquery around their expression. The
+        parameters of an operation come before those of the previous ones.
+        """
+        shapes = tuple(
+            part.shape() for part in (query, *operations) if part is not None
+        )
+        cacheable = key is not None and None not in shapes
+        if cacheable:
+            sql = self._statements.get((key, shapes))
+            if sql is not None:
+                params = [
+                    param
+                    for operation in reversed(operations)
+                    for param in operation.params()
+                ]
+                if query:
+                    params.extend(query.params())
+                return sql, params
+
+        update_sql, params = "", []
+        for operation in operations:
+            expression, operation_params = operation.to_sql_update()
+            if update_sql:
+                expression = (
+                    f"(SELECT {expression} FROM (SELECT {update_sql} AS data))"
+                )
             else:
-                sql = f"DELETE FROM {self.collection_name} LIMIT 1"
-                query_val = ()
-            cursor.execute(sql, query_val)
-            self.connection.commit()
+                # Only the first operation reads the columns of the table
+                expression = self._use_columns(expression)
+            update_sql = expression
+            params[:0] = operation_params
+        where_clause = None
+        if query:
+            where_clause, query_params = query.to_sql()
+            params.extend(query_params)
+        sql = self._use_columns(render(where_clause, _UPDATE_MARK)).replace(
+            _UPDATE_MARK, update_sql
+        )
+        if cacheable:
+            if len(self._statements) >= STATEMENT_CACHE_SIZE:
+                self._statements.clear()
+            self._statements[(key, shapes)] = sql
+        return sql, params
 
     def get_indexes(self) -> List[Index]:
-        with self._cursor() as cursor:
-            indexes = []
+        with self._read_cursor() as cursor:
             cursor.execute(
                 f"SELECT name, sql FROM sqlite_master WHERE type='index' AND tbl_name='{self.collection_name}' AND sql NOT NULL order by name"
             )
-            for name, sql in cursor.fetchall():
-                index_type = Index.extract_type(sql)
-                index_value = Index.extract_value(sql)
-                indexes.append(
-                    Index(
-                        index_type=index_type,
-                        value=index_value,
-                        name=name,
-                    )
-                )
-            return indexes
+            indexes = cursor.fetchall()
+            indexes.extend(
+                trigger_indexes(cursor, self.collection_name).items()
+            )
+            return [Index.from_sql(name, sql) for name, sql in indexes]
 
     def create_index(self, index):
-        with self._cursor() as cursor:
+        if index.index_type == IndexType.FULLTEXT:
+            self._create_fulltext_index(index)
+            return
+        if index.index_type == IndexType.MULTIKEY:
+            self._create_multikey_index(index)
+            return
+        with self._write_cursor() as cursor:
             index_name_quoted = f'"{index.name}"'
             collection_name_quoted = f'"{self.collection_name}"'
 
-            if index.index_type == IndexType.PATH:
-                index_sql = f"CREATE INDEX IF NOT EXISTS {index_name_quoted} ON {collection_name_quoted} (json_extract(data, '$.{index.value}'))"
-            elif index.index_type == IndexType.UNIQUE:
-                index_sql = f"CREATE UNIQUE INDEX IF NOT EXISTS {index_name_quoted} ON {collection_name_quoted} (json_extract(data, '$.{index.value}'))"
+            columns = []
+            for path, direction in index.fields:
+                if path == ID_FIELD:
+                    if index.index_type == IndexType.COLUMN:
+                        raise ValueError("Document ids have their own column")
+                    # Document ids have their own column
+                    column = ID_COLUMN
+                elif index.index_type == IndexType.COLUMN:
+                    column = column_name(path)
+                    if path not in self._columns:
+                        # VIRTUAL, as ALTER TABLE can't add STORED columns.
+                        # The values are kept in the index anyway.
+                        cursor.execute(
+                            f"ALTER TABLE {collection_name_quoted} ADD COLUMN {column} GENERATED ALWAYS AS (json_extract(data, '$.{path}')) VIRTUAL"
+                        )
+                else:
+                    column = f"json_extract(data, '$.{path}')"
+                if direction != "ASC":
+                    column += f" {direction}"
+                columns.append(column)
+
+            unique = "UNIQUE " if index.index_type == IndexType.UNIQUE else ""
+            index_sql = f"CREATE {unique}INDEX IF NOT EXISTS {index_name_quoted} ON {collection_name_quoted} ({', '.join(columns)})"
+            where = index.where_sql()
+            if where is not None:
+                index_sql += f" WHERE {where}"
 
             cursor.execute(index_sql)
-            self.connection.commit()
+            self.database.pool.commit()
+            self._refresh_columns(cursor)
+
+    def _create_fulltext_index(self, index: Index):
+        """
+        FTS5 table over the text of the paths. It is external content: the
+        text is read from a view of the collection, and triggers on the
+        collection keep the FTS index in sync with the documents.
+        """
+        name = index.name
+        quoted = ", ".join(f'"{path}"' for path in index.paths)
+        new_values, old_values = (
+            ", ".join(
+                f"json_extract({row}.data, '$.{path}')" for path in index.paths
+            )
+            for row in ("new", "old")
+        )
+        insert = f'INSERT INTO "{name}"(rowid, {quoted}) VALUES (new.id, {new_values});'
+        delete = f"""INSERT INTO "{name}"("{name}", rowid, {quoted}) VALUES ('delete', old.id, {old_values});"""
+        with self.database.transaction(), self._write_cursor() as cursor:
+            cursor.execute(
+                "SELECT tbl_name FROM sqlite_master WHERE type = 'trigger' AND name = ?",
+                [f"{name}_insert"],
+            )
+            row = cursor.fetchone()
+            if row is not None:
+                if row[0] != self.collection_name:
+                    raise ValueError(
+                        f"Index {name} exists on collection {row[0]}"
+                    )
+                return
+            columns = ", ".join(
+                f"json_extract(data, '$.{path}') AS \"{path}\""
+                for path in index.paths
+            )
+            cursor.execute(
+                f'CREATE VIEW "{name}_content" AS SELECT id, {columns} FROM "{self.collection_name}"'
+            )
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE "{name}" USING fts5({quoted}, content="{name}_content", content_rowid="id")'
+            )
+            cursor.execute(
+                f'CREATE TRIGGER "{name}_insert" AFTER INSERT ON "{self.collection_name}" BEGIN {insert} END'
+            )
+            cursor.execute(
+                f'CREATE TRIGGER "{name}_delete" AFTER DELETE ON "{self.collection_name}" BEGIN {delete} END'
+            )
+            cursor.execute(
+                f'CREATE TRIGGER "{name}_update" AFTER UPDATE OF data ON "{self.collection_name}" BEGIN {delete} {insert} END'
+            )
+            # Index the documents already in the collection
+            cursor.execute(
+                f"""INSERT INTO "{name}"("{name}") VALUES ('rebuild')"""
+            )
+
+    def _create_multikey_index(self, index: Index):
+        """
+        Table of the elements of the array at the path, one row per distinct
+        element of each document, kept in sync by triggers on the
+        collection. Its primary key serves the lookups of elements by value.
+        Null elements never match and aren't kept.
+        """
+        name, path = index.name, index.paths[0]
+        insert = f"""INSERT OR IGNORE INTO "{name}"(value, type, doc) SELECT value, type, new.id FROM json_each(new.data, '$.{path}') WHERE value IS NOT NULL;"""
+        delete = f"""DELETE FROM "{name}" WHERE doc = old.id AND value IN (SELECT value FROM json_each(old.data, '$.{path}'));"""
+        with self.database.transaction(), self._write_cursor() as cursor:
+            cursor.execute(
+                "SELECT tbl_name FROM sqlite_master WHERE type = 'trigger' AND name = ?",
+                [f"{name}_insert"],
+            )
+            row = cursor.fetchone()
+            if row is not None:
+                if row[0] != self.collection_name:
+                    raise ValueError(
+                        f"Index {name} exists on collection {row[0]}"
+                    )
+                return
+            cursor.execute(
+                f'CREATE TABLE "{name}" (value NOT NULL, type TEXT, doc INTEGER, PRIMARY KEY (value, doc)) WITHOUT ROWID'
+            )
+            cursor.execute(
+                f'CREATE TRIGGER "{name}_insert" AFTER INSERT ON "{self.collection_name}" BEGIN {insert} END'
+            )
+            cursor.execute(
+                f'CREATE TRIGGER "{name}_delete" AFTER DELETE ON "{self.collection_name}" BEGIN {delete} END'
+            )
+            cursor.execute(
+                f'CREATE TRIGGER "{name}_update" AFTER UPDATE OF data ON "{self.collection_name}" BEGIN {delete} {insert} END'
+            )
+            # Index the documents already in the collection
+            cursor.execute(
+                f"""INSERT OR IGNORE INTO "{name}"(value, type, doc) SELECT element.value, element.type, {self.collection_name}.id FROM "{self.collection_name}", json_each({self.collection_name}.data, '$.{path}') AS element WHERE element.value IS NOT NULL"""
+            )
+            self._load_multikeys(cursor)
 
     def drop_index(self, index: Union[str, Index]):
-        with self._cursor() as cursor:
-            if isinstance(index, str):
+        with self._write_cursor() as cursor:
+            trigger_indexed = trigger_indexes(cursor, self.collection_name)
+            if isinstance(index, Index):
+                index = next(
+                    (idx.name for idx in self.get_indexes() if idx == index),
+                    None,
+                )
+            if index in trigger_indexed:
+                drop_trigger_index(cursor, index)
+            elif index is not None:
                 cursor.execute(f"DROP INDEX IF EXISTS {index}")
-            else:
-                indexes = self.get_indexes()
-                for idx in indexes:
-                    if idx == index:
-                        cursor.execute(f"DROP INDEX IF EXISTS {idx.name}")
-                        break
-            self.connection.commit()
+            self._drop_unindexed_columns(cursor)
+            self.database.pool.commit()
+
+    def _drop_unindexed_columns(self, cursor):
+        indexed = {
+            path
+            for index in self.get_indexes()
+            if index.index_type == IndexType.COLUMN
+            for path in index.paths
+        }
+        for path, column in self._columns.items():
+            if path not in indexed:
+                cursor.execute(
+                    f'ALTER TABLE "{self.collection_name}" DROP COLUMN {column}'
+                )
+        self._refresh_columns(cursor)
 
     def drop_all_indexes(self):
-        with self._cursor() as cursor:
+        with self._write_cursor() as cursor:
+            for name in trigger_indexes(cursor, self.collection_name):
+                drop_trigger_index(cursor, name)
+            self._load_multikeys(cursor)
             cursor.execute(
                 f"DELETE FROM sqlite_master WHERE type='index' AND tbl_name='{self.collection_name}'"
             )
-            self.connection.commit()
+            self.database.pool.commit()
 
     def sync_indexes(self, indexes: List[Index]):
         existing_indexes = self.get_indexes()
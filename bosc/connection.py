@@ -0,0 +1,175 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from enum import Enum
+from typing import Iterator, List
+
+
+class TransactionMode(str, Enum):
+    DEFERRED = "DEFERRED"
+    IMMEDIATE = "IMMEDIATE"
+    EXCLUSIVE = "EXCLUSIVE"
+
+
+class ConnectionPool:
+    """
+    SQLite connections shared by the collections of one database.
+
+    Writes are serialized through a single writer connection guarded by a
+    re-entrant lock. Reads check a connection out of a bounded pool, so
+    that threads can read concurrently under WAL. A thread that currently
+    holds the writer reads through it as well, to see its own changes.
+
+    A transaction keeps the writer for its whole duration. Commits requested
+    inside it are skipped, and the transaction commits once at the end.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        pool_size: int = 8,
+        busy_timeout: float = 5.0,
+        cached_statements: int = 128,
+    ):
+        if pool_size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self.busy_timeout = busy_timeout
+        self.cached_statements = cached_statements
+        self._writer = self._connect()
+        self._writer.execute("PRAGMA journal_mode=WAL;")
+        self._writer_lock = threading.RLock()
+        self._local = threading.local()
+        self._readers: "queue.LifoQueue[sqlite3.Connection]" = (
+            queue.LifoQueue()
+        )
+        self._reader_slots = threading.BoundedSemaphore(pool_size)
+        self._all_readers: List[sqlite3.Connection] = []
+        self._all_readers_lock = threading.Lock()
+
+    @property
+    def in_memory(self) -> bool:
+        # Every connection to an in-memory database opens its own database,
+        # so readers can't be separate connections.
+        return self.db_path in (":memory:", "")
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+        )
+        # Rows deleted by INSERT OR REPLACE fire the delete triggers only
+        # with recursive triggers, which full-text indexes rely on.
+        connection.execute("PRAGMA recursive_triggers = ON")
+        return connection
+
+    def holds_writer(self) -> bool:
+        return getattr(self._local, "writer_depth", 0) > 0
+
+    @property
+    def writer_connection(self) -> sqlite3.Connection:
+        return self._writer
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        with self._writer_lock:
+            self._local.writer_depth = getattr(self._local, "writer_depth", 0)
+            self._local.writer_depth += 1
+            try:
+                yield self._writer
+            finally:
+                self._local.writer_depth -= 1
+
+    def in_transaction(self) -> bool:
+        return getattr(self._local, "transaction_depth", 0) > 0
+
+    @contextmanager
+    def transaction(
+        self, mode: TransactionMode = TransactionMode.DEFERRED
+    ) -> Iterator[sqlite3.Connection]:
+        """
+        Commit everything done inside on exit, or roll it back on an
+        exception. Nested transactions are savepoints of the outer one, and
+        the mode only applies to the outermost transaction.
+        """
+        mode = TransactionMode(mode)
+        with self.writer() as connection:
+            depth = getattr(self._local, "transaction_depth", 0)
+            savepoint = f"bosc_savepoint_{depth}"
+            if depth:
+                connection.execute(f"SAVEPOINT {savepoint}")
+            else:
+                connection.execute(f"BEGIN {mode.value}")
+            self._local.transaction_depth = depth + 1
+            try:
+                yield connection
+            except BaseException:
+                self._local.transaction_depth = depth
+                if depth:
+                    connection.execute(f"ROLLBACK TO {savepoint}")
+                    connection.execute(f"RELEASE {savepoint}")
+                else:
+                    connection.rollback()
+                raise
+            self._local.transaction_depth = depth
+            if depth:
+                connection.execute(f"RELEASE {savepoint}")
+                return
+            try:
+                connection.commit()
+            except BaseException:
+                connection.rollback()
+                raise
+
+    def commit(self):
+        """
+        Commit the writer, unless the calling thread is in a transaction.
+        """
+        if not self.in_transaction():
+            self._writer.commit()
+
+    def rollback(self):
+        """
+        Roll the writer back, unless the calling thread is in a transaction.
+        A failed statement is undone by SQLite itself, and the transaction
+        decides what happens to the rest.
+        """
+        if not self.in_transaction():
+            self._writer.rollback()
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        if self.in_memory or self.holds_writer():
+            with self.writer() as connection:
+                yield connection
+            return
+        self._reader_slots.acquire()
+        try:
+            connection = self._checkout()
+            try:
+                yield connection
+            finally:
+                self._readers.put(connection)
+        finally:
+            self._reader_slots.release()
+
+    def _checkout(self) -> sqlite3.Connection:
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            connection = self._connect()
+            with self._all_readers_lock:
+                self._all_readers.append(connection)
+            return connection
+
+    def close(self):
+        with self._writer_lock:
+            self._writer.close()
+        with self._all_readers_lock:
+            for connection in self._all_readers:
+                connection.close()
+            self._all_readers.clear()
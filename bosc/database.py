@@ -1,48 +1,210 @@
-import sqlite3
+import threading
+import time
 from contextlib import contextmanager
 from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Optional
 
-from bosc.collection import Collection
+from bosc.collection import (
+    Collection,
+    drop_trigger_index,
+    trigger_indexes,
+)
+from bosc.connection import ConnectionPool, TransactionMode
+
+if TYPE_CHECKING:
+    from bosc.aio import AsyncDatabase
+
+# Seconds between checks for schema changes made by other connections
+SCHEMA_CHECK_INTERVAL = 1.0
 
 
 class Database:
-    def __init__(self, db_path: str):
+    def __init__(
+        self,
+        db_path: str,
+        pool_size: int = 8,
+        busy_timeout: float = 5.0,
+        cached_statements: int = 128,
+    ):
         self.db_path = db_path
-        self.connection = sqlite3.connect(db_path)
-        self.connection.execute("PRAGMA journal_mode=WAL;")
+        self.pool = ConnectionPool(
+            db_path, pool_size, busy_timeout, cached_statements
+        )
         self.name = Path(db_path).stem
+        self._collections: Dict[str, Collection] = {}
+        # Guards the changes of _collections, which threads share
+        self._collections_lock = threading.Lock()
+        self._schema_version: Optional[int] = None
+        self._schema_checked_at = 0.0
+        self._async_database: Optional["AsyncDatabase"] = None
 
     def __getattr__(self, collection_name: str):
-        return Collection(collection_name, self.connection, self)
+        if collection_name.startswith("_"):
+            raise AttributeError(collection_name)
+        return self[collection_name]
 
     def __getitem__(self, collection_name: str):
-        return self.__getattr__(collection_name)
+        self._refresh_collections()
+        collection = self._collections.get(collection_name)
+        if collection is None:
+            # Created outside of the lock, as it writes to the database
+            created = Collection(collection_name, self)
+            with self._collections_lock:
+                collection = self._collections.setdefault(
+                    collection_name, created
+                )
+        return collection
+
+    def get_async_database(self) -> "AsyncDatabase":
+        """
+        Asyncio interface of the database. It is created on first use and
+        shared, so that its thread pool is, and closed with the database.
+        """
+        if self._async_database is None:
+            from bosc.aio import AsyncDatabase
+
+            self._async_database = AsyncDatabase(self)
+        return self._async_database
+
+    @property
+    def connection(self):
+        return self.pool.writer_connection
+
+    @contextmanager
+    def _read_cursor(self):
+        with self.pool.reader() as connection:
+            cursor = connection.cursor()
+            try:
+                yield cursor
+            finally:
+                cursor.close()
 
     @contextmanager
-    def _cursor(self):
-        cursor = self.connection.cursor()
+    def _write_cursor(self):
+        with self.pool.writer() as connection:
+            cursor = connection.cursor()
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+
+    @contextmanager
+    def transaction(self, mode: TransactionMode = TransactionMode.DEFERRED):
+        """
+        Group the writes of this thread into one transaction, committed on
+        exit or rolled back on an exception. Transactions can be nested,
+        the inner ones are savepoints. Use IMMEDIATE mode to take the write
+        lock up front, when other processes write to the same database.
+        """
         try:
-            yield cursor
-        finally:
-            cursor.close()
+            with self.pool.transaction(mode):
+                yield self
+        except BaseException:
+            # Tables created inside were dropped by the rollback
+            self._forget_schema()
+            raise
+
+    def close(self):
+        with self._collections_lock:
+            collections = list(self._collections.values())
+        for collection in collections:
+            if collection._write_buffer is not None:
+                collection._write_buffer.close()
+        self.pool.close()
+        with self._collections_lock:
+            self._collections.clear()
+        if self._async_database is not None:
+            # Without waiting, as AsyncDatabase.close runs this on its pool
+            self._async_database.executor.shutdown(wait=False)
+            self._async_database = None
+
+    def _get_schema_version(self) -> int:
+        with self._read_cursor() as cursor:
+            cursor.execute("PRAGMA schema_version")
+            return cursor.fetchone()[0]
+
+    def _get_tables(self) -> Dict[str, str]:
+        with self._read_cursor() as cursor:
+            cursor.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type='table'"
+            )
+            return dict(cursor.fetchall())
+
+    def _forget_schema(self):
+        """
+        Check for schema changes on the next access to a collection, after
+        a statement failed on a table or column that doesn't exist.
+        """
+        self._schema_version = None
+
+    def _refresh_collections(self):
+        """
+        Forget cached collections whose tables were dropped, possibly by
+        another connection, and reload the generated columns and multikey
+        indexes of the others.
+        SQLite bumps the schema version on every DDL statement, so the
+        catalog is only re-read after a schema change. The version itself
+        is read at most every SCHEMA_CHECK_INTERVAL seconds, unless the
+        schema was forgotten.
+        """
+        now = time.monotonic()
+        if (
+            self._schema_version is not None
+            and now - self._schema_checked_at < SCHEMA_CHECK_INTERVAL
+        ):
+            return
+        self._schema_checked_at = now
+        schema_version = self._get_schema_version()
+        if schema_version == self._schema_version:
+            return
+        if self._collections:
+            # Collections added meanwhile have their tables anyway
+            names = list(self._collections)
+            tables = self._get_tables()
+            with self._collections_lock:
+                for collection_name in names:
+                    if collection_name not in tables:
+                        self._collections.pop(collection_name, None)
+                collections = [
+                    (name, self._collections[name])
+                    for name in names
+                    if name in self._collections
+                ]
+            with self._read_cursor() as cursor:
+                for collection_name, collection in collections:
+                    collection._load_columns(tables[collection_name])
+                    collection._load_multikeys(cursor)
+        self._schema_version = schema_version
 
     def drop_collection(self, collection_name: str):
-        with self._cursor() as cursor:
+        with self._write_cursor() as cursor:
+            for name in trigger_indexes(cursor, collection_name):
+                drop_trigger_index(cursor, name)
             cursor.execute(f"DROP TABLE IF EXISTS {collection_name}")
-            self.connection.commit()
+            self.pool.commit()
+        with self._collections_lock:
+            self._collections.pop(collection_name, None)
 
     def drop_all_collections(self):
-        with self._cursor() as cursor:
+        with self._write_cursor() as cursor:
+            for name in trigger_indexes(cursor):
+                drop_trigger_index(cursor, name)
             cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
             result = cursor.fetchall()
             for table in result:
                 cursor.execute(f"DROP TABLE IF EXISTS {table[0]}")
-            self.connection.commit()
+            self.pool.commit()
+        with self._collections_lock:
+            self._collections.clear()
 
     def drop_all_indexes(self):
-        with self._cursor() as cursor:
+        with self._write_cursor() as cursor:
+            for name in trigger_indexes(cursor):
+                drop_trigger_index(cursor, name)
             cursor.execute("SELECT name FROM sqlite_master WHERE type='index'")
             result = cursor.fetchall()
             for index in result:
                 cursor.execute(f"DROP INDEX {index[0]}")
-            self.connection.commit()
+            self.pool.commit()
+        with self._collections_lock:
+            self._collections.clear()
@@ -1,20 +1,121 @@
-from typing import ClassVar, List, Optional, TypeVar
+import json
+import os
+import re
+import threading
+from concurrent.futures import Future
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    ClassVar,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
 from uuid import uuid4
 
-from pydantic import UUID4, BaseModel, Field
+from pydantic import UUID4, BaseModel, Field, PrivateAttr
 
-from bosc.collection import Collection, OnConflict, OrderDirection
+from bosc.aio import AsyncCollection, AsyncDatabase
+from bosc.buffer import WriteBuffer
+from bosc.collection import (
+    Collection,
+    OnConflict,
+    OrderDirection,
+    iter_source,
+)
+from bosc.connection import TransactionMode
 from bosc.database import Database
 from bosc.encoder import get_dict
 from bosc.fields import ExpressionField
 from bosc.index import Index, IndexType
-from bosc.query.base import Query, UpdateOperation
+from bosc.query.base import Accumulator, Query, UpdateOperation
 from bosc.query.find.comparison import Eq
+from bosc.query.find.fulltext import Match
 from bosc.query.find.logical import And
+from bosc.query.update.values import SetPaths
 
 BaseModelMetaclass = type(BaseModel)
 
+# Databases of the document classes, shared by the classes with the same
+# path
+_databases: Dict[str, Database] = {}
+_databases_lock = threading.Lock()
+
+# Keys that can be written in a JSON path without quotes
+_PLAIN_KEY = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
 DocType = TypeVar("DocType", bound="Document")
+ModelType = TypeVar("ModelType", bound=BaseModel)
+
+
+def _path_key(key: str) -> str:
+    if _PLAIN_KEY.fullmatch(key):
+        return key
+    return f'"{key}"'
+
+
+def _changed_paths(
+    stored: Dict, current: Dict, prefix: str = ""
+) -> Optional[Tuple[Dict[str, Any], List[str]]]:
+    """
+    Paths whose values differ between the stored and the current data of
+    a document, with their current values, and paths that were removed.
+    Objects are compared field by field, anything else as a whole. None
+    when a changed key has a double quote, which JSON paths can't escape,
+    so the object holding it has to be written as a whole.
+    """
+    changed: Dict[str, Any] = {}
+    removed: List[str] = []
+    for key, value in current.items():
+        path = prefix + _path_key(key)
+        old = stored.get(key)
+        if key in stored and isinstance(value, dict) and isinstance(old, dict):
+            nested = _changed_paths(old, value, path + ".")
+            if nested is not None:
+                changed.update(nested[0])
+                removed.extend(nested[1])
+                continue
+        elif key in stored and type(value) is type(old) and value == old:
+            continue
+        if '"' in key:
+            return None
+        changed[path] = value
+    for key in stored:
+        if key not in current:
+            if '"' in key:
+                return None
+            removed.append(prefix + _path_key(key))
+    return changed, removed
+
+
+class _Stored:
+    """
+    Data of a document as last loaded or saved, as JSON or as a dict. It
+    equals any other, so that it doesn't take part in comparing documents.
+    """
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: Union[str, Dict]):
+        self.data = data
+
+    def __eq__(self, other):
+        return other is None or isinstance(other, _Stored)
+
+    __hash__ = None
+
+    def load(self) -> Dict:
+        if isinstance(self.data, str):
+            return json.loads(self.data)
+        return self.data
 
 
 class CombinedMeta(BaseModelMetaclass):
@@ -32,21 +133,52 @@ class Document(BaseModel, metaclass=CombinedMeta):
     bosc_indexes: ClassVar[List[Index]] = Field(default_factory=list)
     bosc_json_encoders: ClassVar[Optional[dict]] = None
     bosc_database: ClassVar[Optional[Database]] = None
+    bosc_write_buffer_size: ClassVar[int] = 1000
+    bosc_write_buffer_delay: ClassVar[float] = 0.0
+    # To find the fields the next save has to write
+    _bosc_stored: Optional[_Stored] = PrivateAttr(default=None)
 
     @classmethod
     def get_collection(cls) -> Collection:
-        if cls.bosc_collection_name is None:
-            return cls.get_database()[cls.__name__]
-        return cls.get_database()[cls.bosc_collection_name]
+        return cls.get_database()[cls.get_collection_name()]
 
     @classmethod
     def get_database(cls) -> Database:
         if cls.bosc_database is None:
             if cls.bosc_database_path is None:
                 raise ValueError("Database path is not set")
-            cls.bosc_database = Database(cls.bosc_database_path)
+            with _databases_lock:
+                database = _databases.get(cls.bosc_database_path)
+                if database is None:
+                    database = Database(cls.bosc_database_path)
+                    _databases[cls.bosc_database_path] = database
+            cls.bosc_database = database
         return cls.bosc_database
 
+    @classmethod
+    def transaction(cls, mode: TransactionMode = TransactionMode.DEFERRED):
+        return cls.get_database().transaction(mode)
+
+    @classmethod
+    def get_async_database(cls) -> AsyncDatabase:
+        return cls.get_database().get_async_database()
+
+    @classmethod
+    def get_async_collection(cls) -> AsyncCollection:
+        return cls.get_async_database()[cls.get_collection_name()]
+
+    @classmethod
+    def get_write_buffer(cls) -> WriteBuffer:
+        return cls.get_collection().get_write_buffer(
+            cls.bosc_write_buffer_size, cls.bosc_write_buffer_delay
+        )
+
+    @classmethod
+    def get_collection_name(cls) -> str:
+        if cls.bosc_collection_name is None:
+            return cls.__name__
+        return cls.bosc_collection_name
+
     @classmethod
     def _get_indexes_to_sync(cls):
         id_index = Index("id", IndexType.UNIQUE)
@@ -59,18 +191,59 @@ class Document(BaseModel, metaclass=CombinedMeta):
 
     # ENTITY METHODS
 
+    @classmethod
+    def _from_stored(cls, data: str) -> "DocType":
+        document = cls.model_validate_json(data)
+        document._bosc_stored = _Stored(data)
+        return document
+
     def insert(self, on_conflict: OnConflict = OnConflict.RAISE) -> "DocType":
         document_data = get_dict(self)
         result = self.get_collection().insert(document_data, on_conflict)
         self.id = result["id"]
+        # Ignored inserts return the stored document
+        self._bosc_stored = _Stored(result)
         return self
 
     def save(self) -> "DocType":
-        return self.insert(OnConflict.REPLACE)
+        """
+        Write the document. A document that was loaded or saved before only
+        has the fields changed since written, with a single UPDATE, so the
+        rest of the document and its indexes are left alone. Others replace
+        the stored document with the same id.
+        """
+        if self._bosc_stored is None:
+            return self.insert(OnConflict.REPLACE)
+        document_data = get_dict(self)
+        paths = _changed_paths(self._bosc_stored.load(), document_data)
+        if paths is None or "id" in paths[0]:
+            return self.insert(OnConflict.REPLACE)
+        changed, removed = paths
+        if changed or removed:
+            updated = self.get_collection().update(
+                Eq("id", self.id), SetPaths(changed, removed)
+            )
+            if not updated:
+                # Deleted since it was loaded
+                return self.insert(OnConflict.REPLACE)
+        self._bosc_stored = _Stored(document_data)
+        return self
 
     def delete(self) -> None:
         self.get_collection().delete(Eq("id", self.id))
 
+    def insert_buffered(
+        self, on_conflict: OnConflict = OnConflict.RAISE
+    ) -> Future:
+        """
+        Queue the insert in the collection's write buffer. The returned
+        future resolves to the stored data once it is committed.
+        """
+        return self.get_write_buffer().insert(get_dict(self), on_conflict)
+
+    def save_buffered(self) -> Future:
+        return self.insert_buffered(OnConflict.REPLACE)
+
     # CLASS METHODS
     @classmethod
     def insert_many(
@@ -78,55 +251,186 @@ class Document(BaseModel, metaclass=CombinedMeta):
     ) -> None:
         document_data = [get_dict(document) for document in documents]
         cls.get_collection().insert_many(document_data, on_conflict)
+        if on_conflict != OnConflict.IGNORE:
+            for document, data in zip(documents, document_data):
+                document._bosc_stored = _Stored(data)
+
+    @classmethod
+    def load(
+        cls,
+        source: Union[str, os.PathLike, Iterable],
+        chunk_size: int = 1000,
+        on_conflict: OnConflict = OnConflict.RAISE,
+        validate: bool = True,
+        progress: Optional[Callable[[int, float], None]] = None,
+    ) -> int:
+        """
+        Insert documents from an iterable of documents, dicts or JSON
+        strings, or from the JSONL file at a path, in chunks, see
+        Collection.load. Dicts and JSON strings are validated as documents
+        of the class first. Without validate they are inserted as they
+        are, for trusted data.
+        """
+        items = (
+            cls._load_data(item, validate) for item in iter_source(source)
+        )
+        return cls.get_collection().load(
+            items, chunk_size, on_conflict, progress
+        )
+
+    @classmethod
+    def _load_data(cls, item, validate: bool) -> Union[Dict, str]:
+        if isinstance(item, Document):
+            return get_dict(item)
+        if not validate:
+            return item
+        if isinstance(item, str):
+            return get_dict(cls.model_validate_json(item))
+        return get_dict(cls.model_validate(item))
 
     @classmethod
     def get(cls, id) -> Optional["DocType"]:
-        data = cls.get_collection().get(id)
+        data = cls.get_collection().get(id, raw=True)
         if data is None:
             return None
-        return cls.model_validate(data)
+        return cls._from_stored(data)
+
+    @classmethod
+    def get_many(cls, ids) -> List[Optional["DocType"]]:
+        """
+        Documents with the given ids, in the same order, with None for the
+        missing ones.
+        """
+        return [
+            None if data is None else cls._from_stored(data)
+            for data in cls.get_collection().get_many(ids, raw=True)
+        ]
 
     @classmethod
     def find(
         cls,
         *queries,
-        order_by: str = None,
+        order_by: Union[str, Match, None] = None,
         order_direction: OrderDirection = OrderDirection.ASC,
         offset: Optional[int] = None,
         limit: Optional[int] = None,
-    ) -> List["DocType"]:
-        query = (
-            And(*queries)
-            if len(queries) > 1
-            else queries[0]
-            if len(queries) == 1
-            else None
-        )
+        projection: Optional[Type["ModelType"]] = None,
+    ) -> Union[List["DocType"], List["ModelType"]]:
+        """
+        Found documents. With a projection model, only its fields are
+        fetched and the documents are validated into it.
+        """
+        query = cls._combine_queries(queries)
         result = cls.get_collection().find(
-            query, order_by, order_direction, offset, limit
+            query,
+            order_by,
+            order_direction,
+            offset,
+            limit,
+            raw=True,
+            projection=cls._projection_fields(projection),
+        )
+        load = (
+            cls._from_stored
+            if projection is None
+            else projection.model_validate_json
         )
-        return [cls.model_validate(data) for data in result]
+        return [load(data) for data in result]
 
     @classmethod
-    def find_one(
+    def find_page(
         cls,
         *queries,
-        order_by: str = None,
+        order_by: Union[str, Sequence[str], None] = None,
         order_direction: OrderDirection = OrderDirection.ASC,
-    ) -> Optional["DocType"]:
-        query = (
-            And(*queries)
-            if len(queries) > 1
-            else queries[0]
-            if len(queries) == 1
-            else None
+        after: Optional[str] = None,
+        limit: int = 100,
+    ) -> Tuple[List["DocType"], Optional[str]]:
+        query = cls._combine_queries(queries)
+        result, token = cls.get_collection().find_page(
+            query, order_by, order_direction, after, limit, raw=True
+        )
+        return [cls._from_stored(data) for data in result], token
+
+    @classmethod
+    def iter_find(
+        cls,
+        *queries,
+        order_by: Union[str, Match, None] = None,
+        order_direction: OrderDirection = OrderDirection.ASC,
+        offset: Optional[int] = None,
+        limit: Optional[int] = None,
+        batch_size: int = 100,
+        projection: Optional[Type["ModelType"]] = None,
+    ) -> Union[Iterator["DocType"], Iterator["ModelType"]]:
+        batches = cls._find_batches(
+            *queries,
+            order_by=order_by,
+            order_direction=order_direction,
+            offset=offset,
+            limit=limit,
+            batch_size=batch_size,
+            projection=projection,
+        )
+        try:
+            for batch in batches:
+                yield from batch
+        finally:
+            batches.close()
+
+    @classmethod
+    def _find_batches(
+        cls,
+        *queries,
+        order_by: Union[str, Match, None] = None,
+        order_direction: OrderDirection = OrderDirection.ASC,
+        offset: Optional[int] = None,
+        limit: Optional[int] = None,
+        batch_size: int = 100,
+        projection: Optional[Type["ModelType"]] = None,
+    ) -> Union[Iterator[List["DocType"]], Iterator[List["ModelType"]]]:
+        batches = cls.get_collection()._find_batches(
+            cls._combine_queries(queries),
+            order_by,
+            order_direction,
+            offset,
+            limit,
+            batch_size,
+            raw=True,
+            projection=cls._projection_fields(projection),
+        )
+        load = (
+            cls._from_stored
+            if projection is None
+            else projection.model_validate_json
         )
+        try:
+            for batch in batches:
+                yield [load(data) for data in batch]
+        finally:
+            batches.close()
+
+    @classmethod
+    def find_one(
+        cls,
+        *queries,
+        order_by: Union[str, Match, None] = None,
+        order_direction: OrderDirection = OrderDirection.ASC,
+        projection: Optional[Type["ModelType"]] = None,
+    ) -> Union["DocType", "ModelType", None]:
+        query = cls._combine_queries(queries)
         result = cls.get_collection().find_one(
-            query, order_by, order_direction
+            query,
+            order_by,
+            order_direction,
+            raw=True,
+            projection=cls._projection_fields(projection),
         )
         if result is None:
             return None
-        return cls.model_validate(result)
+        if projection is None:
+            return cls._from_stored(result)
+        return projection.model_validate_json(result)
 
     @classmethod
     def count(cls, *queries) -> int:
@@ -137,6 +441,40 @@ class Document(BaseModel, metaclass=CombinedMeta):
         else:
             return cls.get_collection().count(And(*queries))
 
+    @classmethod
+    def aggregate(
+        cls,
+        *queries,
+        group_by: Union[str, Sequence[str], None] = None,
+        **accumulators: Accumulator,
+    ) -> List[Dict]:
+        """
+        Group the found documents and compute the accumulators, given by
+        name, of every group. See Collection.aggregate.
+        """
+        return cls.get_collection().aggregate(
+            cls._combine_queries(queries), group_by, accumulators
+        )
+
+    @staticmethod
+    def _projection_fields(
+        projection: Optional[Type[BaseModel]],
+    ) -> Optional[List[str]]:
+        if projection is None:
+            return None
+        return [
+            field.alias or name
+            for name, field in projection.model_fields.items()
+        ]
+
+    @staticmethod
+    def _combine_queries(queries) -> Optional[Query]:
+        if len(queries) == 0:
+            return None
+        if len(queries) == 1:
+            return queries[0]
+        return And(*queries)
+
     @staticmethod
     def _extract_queries(queries):
         find_queries = [query for query in queries if isinstance(query, Query)]
@@ -161,6 +499,53 @@ class Document(BaseModel, metaclass=CombinedMeta):
         find_query, update_queries = cls._extract_queries(queries)
         cls.get_collection().update_one(find_query, *update_queries)
 
+    @classmethod
+    def find_one_and_update(
+        cls,
+        *queries,
+        order_by: Optional[str] = None,
+        order_direction: OrderDirection = OrderDirection.ASC,
+        return_new: bool = True,
+    ) -> Optional["DocType"]:
+        """
+        Update the first found document and return it, as updated or as it
+        was before. See Collection.find_one_and_update.
+        """
+        find_query, update_queries = cls._extract_queries(queries)
+        result = cls.get_collection().find_one_and_update(
+            find_query,
+            *update_queries,
+            order_by=order_by,
+            order_direction=order_direction,
+            return_new=return_new,
+            raw=True,
+        )
+        if result is None:
+            return None
+        if return_new:
+            return cls._from_stored(result)
+        return cls.model_validate_json(result)
+
+    @classmethod
+    def find_one_and_delete(
+        cls,
+        *queries,
+        order_by: Optional[str] = None,
+        order_direction: OrderDirection = OrderDirection.ASC,
+    ) -> Optional["DocType"]:
+        """
+        Delete the first found document and return it.
+        """
+        result = cls.get_collection().find_one_and_delete(
+            cls._combine_queries(queries),
+            order_by,
+            order_direction,
+            raw=True,
+        )
+        if result is None:
+            return None
+        return cls.model_validate_json(result)
+
     @classmethod
     def delete_many(cls, *queries) -> None:
         if len(queries) == 0:
@@ -169,3 +554,190 @@ class Document(BaseModel, metaclass=CombinedMeta):
             cls.get_collection().delete(queries[0])
         else:
             cls.get_collection().delete(And(*queries))
+
+    # ASYNC METHODS
+
+    async def ainsert(
+        self, on_conflict: OnConflict = OnConflict.RAISE
+    ) -> "DocType":
+        document_data = get_dict(self)
+        result = await self.get_async_collection().insert(
+            document_data, on_conflict
+        )
+        self.id = result["id"]
+        self._bosc_stored = _Stored(result)
+        return self
+
+    async def asave(self) -> "DocType":
+        if self._bosc_stored is None:
+            # Batched with the inserts of other coroutines
+            return await self.ainsert(OnConflict.REPLACE)
+        return await self.get_async_database().run(self.save)
+
+    async def adelete(self) -> None:
+        await self.get_async_database().run(self.delete)
+
+    @classmethod
+    async def ainsert_many(
+        cls, documents, on_conflict: OnConflict = OnConflict.RAISE
+    ) -> None:
+        await cls.get_async_database().run(
+            cls.insert_many, documents, on_conflict
+        )
+
+    @classmethod
+    async def aload(
+        cls,
+        source: Union[str, os.PathLike, Iterable],
+        chunk_size: int = 1000,
+        on_conflict: OnConflict = OnConflict.RAISE,
+        validate: bool = True,
+        progress: Optional[Callable[[int, float], None]] = None,
+    ) -> int:
+        return await cls.get_async_database().run(
+            cls.load, source, chunk_size, on_conflict, validate, progress
+        )
+
+    @classmethod
+    async def aget(cls, id) -> Optional["DocType"]:
+        return await cls.get_async_database().run(cls.get, id)
+
+    @classmethod
+    async def aget_many(cls, ids) -> List[Optional["DocType"]]:
+        return await cls.get_async_database().run(cls.get_many, ids)
+
+    @classmethod
+    async def afind(
+        cls,
+        *queries,
+        order_by: Union[str, Match, None] = None,
+        order_direction: OrderDirection = OrderDirection.ASC,
+        offset: Optional[int] = None,
+        limit: Optional[int] = None,
+        projection: Optional[Type["ModelType"]] = None,
+    ) -> Union[List["DocType"], List["ModelType"]]:
+        return await cls.get_async_database().run(
+            cls.find,
+            *queries,
+            order_by=order_by,
+            order_direction=order_direction,
+            offset=offset,
+            limit=limit,
+            projection=projection,
+        )
+
+    @classmethod
+    async def afind_page(
+        cls,
+        *queries,
+        order_by: Union[str, Sequence[str], None] = None,
+        order_direction: OrderDirection = OrderDirection.ASC,
+        after: Optional[str] = None,
+        limit: int = 100,
+    ) -> Tuple[List["DocType"], Optional[str]]:
+        return await cls.get_async_database().run(
+            cls.find_page,
+            *queries,
+            order_by=order_by,
+            order_direction=order_direction,
+            after=after,
+            limit=limit,
+        )
+
+    @classmethod
+    async def aiter_find(
+        cls,
+        *queries,
+        order_by: Union[str, Match, None] = None,
+        order_direction: OrderDirection = OrderDirection.ASC,
+        offset: Optional[int] = None,
+        limit: Optional[int] = None,
+        batch_size: int = 100,
+        projection: Optional[Type["ModelType"]] = None,
+    ) -> Union[AsyncIterator["DocType"], AsyncIterator["ModelType"]]:
+        database = cls.get_async_database()
+        batches = await database.run(
+            cls._find_batches,
+            *queries,
+            order_by=order_by,
+            order_direction=order_direction,
+            offset=offset,
+            limit=limit,
+            batch_size=batch_size,
+            projection=projection,
+        )
+        async for document in database.iterate(batches):
+            yield document
+
+    @classmethod
+    async def afind_one(
+        cls,
+        *queries,
+        order_by: Union[str, Match, None] = None,
+        order_direction: OrderDirection = OrderDirection.ASC,
+        projection: Optional[Type["ModelType"]] = None,
+    ) -> Union["DocType", "ModelType", None]:
+        return await cls.get_async_database().run(
+            cls.find_one,
+            *queries,
+            order_by=order_by,
+            order_direction=order_direction,
+            projection=projection,
+        )
+
+    @classmethod
+    async def acount(cls, *queries) -> int:
+        return await cls.get_async_database().run(cls.count, *queries)
+
+    @classmethod
+    async def aaggregate(
+        cls,
+        *queries,
+        group_by: Union[str, Sequence[str], None] = None,
+        **accumulators: Accumulator,
+    ) -> List[Dict]:
+        return await cls.get_async_database().run(
+            cls.aggregate, *queries, group_by=group_by, **accumulators
+        )
+
+    @classmethod
+    async def aupdate(cls, *queries) -> None:
+        await cls.get_async_database().run(cls.update, *queries)
+
+    @classmethod
+    async def aupdate_one(cls, *queries) -> None:
+        await cls.get_async_database().run(cls.update_one, *queries)
+
+    @classmethod
+    async def afind_one_and_update(
+        cls,
+        *queries,
+        order_by: Optional[str] = None,
+        order_direction: OrderDirection = OrderDirection.ASC,
+        return_new: bool = True,
+    ) -> Optional["DocType"]:
+        return await cls.get_async_database().run(
+            cls.find_one_and_update,
+            *queries,
+            order_by=order_by,
+            order_direction=order_direction,
+            return_new=return_new,
+        )
+
+    @classmethod
+    async def afind_one_and_delete(
+        cls,
+        *queries,
+        order_by: Optional[str] = None,
+        order_direction: OrderDirection = OrderDirection.ASC,
+    ) -> Optional["DocType"]:
+        return await cls.get_async_database().run(
+            cls.find_one_and_delete,
+            *queries,
+            order_by=order_by,
+            order_direction=order_direction,
+        )
+
+    @classmethod
+    async def adelete_many(cls, *queries) -> None:
+        await cls.get_async_database().run(cls.delete_many, *queries)
@@ -19,6 +19,7 @@ from typing import (
 from uuid import UUID
 
 import pydantic
+import pydantic_core
 from pydantic import SecretStr
 
 import bosc
@@ -55,6 +56,103 @@ SCALAR_TYPES = (
 )
 
 
+# Kinds of encoding resolved for a type by _EncoderDispatch
+_SCALAR = 0
+_CUSTOM = 1
+_STRUCTURAL = 2
+_UNSUPPORTED = 3
+
+
+class _EncoderDispatch:
+    """
+    Per-type resolution of the encoding Encoder.encode applies, for one
+    mapping of custom encoders. Custom and default encoders are resolved
+    along the MRO, so the most specific registered class wins, and types
+    without an encoder are cached too, so the isinstance checks run once
+    per type instead of once per value.
+    """
+
+    def __init__(self, custom_encoders: Mapping[type, SingleArgCallable]):
+        self.custom_encoders = custom_encoders
+        self.custom_snapshot = tuple(custom_encoders.items())
+        self.default_snapshot = tuple(DEFAULT_CUSTOM_ENCODERS.items())
+        self.table: MutableMapping[type, Tuple[int, Any]] = {}
+
+    def is_current(self, custom_encoders: Mapping) -> bool:
+        return (
+            self.custom_encoders is custom_encoders
+            and self.custom_snapshot == tuple(custom_encoders.items())
+            and self.default_snapshot == tuple(DEFAULT_CUSTOM_ENCODERS.items())
+        )
+
+    def resolve(self, cls: type) -> Tuple[int, Any]:
+        try:
+            return self.table[cls]
+        except KeyError:
+            resolved = self.table[cls] = self._resolve(cls)
+            return resolved
+
+    def _resolve(self, cls: type) -> Tuple[int, Any]:
+        encoder = _get_type_encoder(cls, self.custom_encoders)
+        if encoder is not None:
+            return _CUSTOM, encoder
+        if issubclass(cls, SCALAR_TYPES):
+            return _SCALAR, None
+        encoder = _get_type_encoder(cls, DEFAULT_CUSTOM_ENCODERS)
+        if encoder is not None:
+            return _CUSTOM, encoder
+        if issubclass(cls, bosc.Document):
+            return _STRUCTURAL, Encoder._encode_document
+        if issubclass(cls, pydantic.RootModel):
+            return _STRUCTURAL, Encoder._encode_root_model
+        if issubclass(cls, pydantic.BaseModel):
+            return _STRUCTURAL, Encoder._encode_model
+        if issubclass(cls, Mapping):
+            return _STRUCTURAL, Encoder._encode_mapping
+        if issubclass(cls, Iterable) and not issubclass(cls, (str, bytes)):
+            return _STRUCTURAL, Encoder._encode_iterable
+        return _UNSUPPORTED, None
+
+
+def _get_type_encoder(
+    cls: type, custom_encoders: Mapping[type, SingleArgCallable]
+) -> Optional[SingleArgCallable]:
+    if not custom_encoders:
+        return None
+    for base in cls.__mro__:
+        encoder = custom_encoders.get(base)
+        if encoder is not None:
+            return encoder
+    # Virtual subclasses of registered ABCs are not in the MRO
+    for encoder_cls, encoder in custom_encoders.items():
+        if issubclass(cls, encoder_cls):
+            return encoder
+    return None
+
+
+_NO_ENCODERS: Mapping[type, SingleArgCallable] = {}
+_MAX_DISPATCHES = 128
+_dispatches: MutableMapping[int, _EncoderDispatch] = {}
+
+
+def _get_dispatch(
+    custom_encoders: Optional[Mapping[type, SingleArgCallable]],
+) -> _EncoderDispatch:
+    """
+    Dispatch shared by all encoders using the same custom encoders mapping.
+    It is rebuilt when the mapping or DEFAULT_CUSTOM_ENCODERS change.
+    """
+    if not custom_encoders:
+        custom_encoders = _NO_ENCODERS
+    dispatch = _dispatches.get(id(custom_encoders))
+    if dispatch is None or not dispatch.is_current(custom_encoders):
+        if len(_dispatches) >= _MAX_DISPATCHES:
+            _dispatches.clear()
+        dispatch = _EncoderDispatch(custom_encoders)
+        _dispatches[id(custom_encoders)] = dispatch
+    return dispatch
+
+
 @dc.dataclass
 class Encoder:
     """
@@ -67,6 +165,12 @@ class Encoder:
     )
     to_db: bool = False
     keep_nulls: bool = True
+    _dispatch: _EncoderDispatch = dc.field(
+        init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self):
+        self._dispatch = _get_dispatch(self.custom_encoders)
 
     def _encode_document(self, obj: "Document") -> Mapping[str, Any]:
         obj_dict = {}
@@ -81,34 +185,30 @@ class Encoder:
             obj_dict[key] = sub_encoder.encode(value)
         return obj_dict
 
-    def encode(self, obj: Any) -> Any:
-        if self.custom_encoders:
-            encoder = _get_encoder(obj, self.custom_encoders)
-            if encoder is not None:
-                return encoder(obj)
+    def _encode_root_model(self, obj: pydantic.RootModel) -> Any:
+        return self.encode(obj.root)
 
-        if isinstance(obj, SCALAR_TYPES):
-            return obj
+    def _encode_model(self, obj: pydantic.BaseModel) -> Mapping[str, Any]:
+        items = self._iter_model_items(obj)
+        return {key: self.encode(value) for key, value in items}
 
-        encoder = _get_encoder(obj, DEFAULT_CUSTOM_ENCODERS)
-        if encoder is not None:
-            return encoder(obj)
+    def _encode_mapping(self, obj: Mapping) -> Mapping[str, Any]:
+        return {
+            key if isinstance(key, Enum) else str(key): self.encode(value)
+            for key, value in obj.items()
+        }
 
-        if isinstance(obj, bosc.Document):
-            return self._encode_document(obj)
-        if isinstance(obj, pydantic.RootModel):
-            return self.encode(obj.root)
-        if isinstance(obj, pydantic.BaseModel):
-            items = self._iter_model_items(obj)
-            return {key: self.encode(value) for key, value in items}
-        if isinstance(obj, Mapping):
-            return {
-                key if isinstance(key, Enum) else str(key): self.encode(value)
-                for key, value in obj.items()
-            }
-        if isinstance(obj, Iterable) and not isinstance(obj, (str, bytes)):
-            return [self.encode(value) for value in obj]
+    def _encode_iterable(self, obj: Iterable) -> Any:
+        return [self.encode(value) for value in obj]
 
+    def encode(self, obj: Any) -> Any:
+        kind, encoder = self._dispatch.resolve(type(obj))
+        if kind == _SCALAR:
+            return obj
+        if kind == _CUSTOM:
+            return encoder(obj)
+        if kind == _STRUCTURAL:
+            return encoder(self, obj)
         raise ValueError(f"Cannot encode {obj!r}")
 
     def _iter_model_items(
@@ -123,18 +223,6 @@ class Encoder:
                 yield key, value
 
 
-def _get_encoder(
-    obj: Any, custom_encoders: Mapping[type, SingleArgCallable]
-) -> Optional[SingleArgCallable]:
-    encoder = custom_encoders.get(type(obj))
-    if encoder is not None:
-        return encoder
-    for cls, encoder in custom_encoders.items():
-        if isinstance(obj, cls):
-            return encoder
-    return None
-
-
 def get_dict(
     document: "Document",
     to_db: bool = False,
@@ -145,6 +233,10 @@ def get_dict(
         exclude = set()
     if document.id is None:
         exclude.add("id")
+    if keep_nulls:
+        compiled = get_compiled_encoder(type(document))
+        if compiled is not None:
+            return compiled.encode(document, exclude)
     encoder = Encoder(exclude=exclude, to_db=to_db, keep_nulls=keep_nulls)
     return encoder.encode(document)
 
@@ -155,5 +247,314 @@ def encode(
     to_db: bool = False,
     keep_nulls: bool = True,
 ) -> Any:
+    if type(obj) in SCALAR_TYPES:
+        # Field names and values of queries are mostly plain scalars
+        return obj
     encoder = Encoder(exclude=exclude, to_db=to_db, keep_nulls=keep_nulls)
     return encoder.encode(obj)
+
+
+def doc_key(document_id: Any) -> Any:
+    """
+    Value of the doc_id column for a document id. UUIDs written in their
+    canonical hyphenated or hex form are stored as 16-byte blobs, so both
+    forms find the same document. Other ids are stored as they are.
+    """
+    if not isinstance(document_id, str):
+        return document_id
+    if len(document_id) == 36 and document_id[8:24:5] == "----":
+        hex_id = document_id.replace("-", "", 4)
+    elif len(document_id) == 32:
+        hex_id = document_id
+    else:
+        return document_id
+    try:
+        key = bytes.fromhex(hex_id)
+    except ValueError:
+        return document_id
+    # fromhex skips whitespace and accepts upper case
+    if len(key) != 16 or key.hex() != hex_id:
+        return document_id
+    return key
+
+
+# Python types of the core schema nodes that describe a single type
+_SCHEMA_TYPES = {
+    "none": type(None),
+    "bool": bool,
+    "int": int,
+    "float": float,
+    "str": str,
+    "bytes": bytes,
+    "date": datetime.date,
+    "time": datetime.time,
+    "datetime": datetime.datetime,
+    "timedelta": datetime.timedelta,
+    "uuid": UUID,
+    "list": list,
+    "tuple": tuple,
+    "set": set,
+    "frozenset": frozenset,
+    "dict": dict,
+}
+
+
+class _NotCompilable(Exception):
+    pass
+
+
+def _find_instance_cls(schema: Any) -> Optional[type]:
+    if isinstance(schema, dict):
+        if schema.get("type") == "is-instance":
+            return schema["cls"]
+        children = schema.values()
+    elif isinstance(schema, (list, tuple)):
+        children = schema
+    else:
+        return None
+    for child in children:
+        cls = _find_instance_cls(child)
+        if cls is not None:
+            return cls
+    return None
+
+
+class _SchemaCompiler:
+    """
+    Rewrites the pydantic core schema of a document class, so that
+    pydantic's serializer produces what Encoder.encode would: bosc encoders
+    replace the serialization of the types they handle, and pydantic
+    serialization customizations, which Encoder ignores, are dropped.
+    Raises _NotCompilable for anything Encoder would encode differently.
+
+    Models are compiled to typed dict schemas over their __dict__, as
+    pydantic serializes model instances with their own class serializer.
+    """
+
+    def __init__(self, document_cls: type):
+        self.document_cls = document_cls
+        self.custom_encoders = document_cls.bosc_json_encoders or {}
+        self.dispatch = _get_dispatch(document_cls.bosc_json_encoders)
+        self.definitions: MutableMapping[str, dict] = {}
+        self.compiling: Set[str] = set()
+
+    def compile(self) -> pydantic_core.SchemaSerializer:
+        schema = self.document_cls.__pydantic_core_schema__
+        if schema["type"] == "definitions":
+            for definition in schema["definitions"]:
+                self.definitions[definition["ref"]] = definition
+            schema = schema["schema"]
+        if schema["type"] != "model" or schema.get("root_model"):
+            raise _NotCompilable(schema["type"])
+        return pydantic_core.SchemaSerializer(self._model_fields(schema))
+
+    @staticmethod
+    def _encoded(schema: dict, encoder: SingleArgCallable) -> dict:
+        schema["serialization"] = (
+            pydantic_core.core_schema.plain_serializer_function_ser_schema(
+                encoder
+            )
+        )
+        return schema
+
+    def _rewrite(self, schema: dict) -> dict:
+        schema = dict(schema)
+        schema.pop("serialization", None)
+        schema_type = schema["type"]
+
+        cls = _SCHEMA_TYPES.get(schema_type)
+        if schema_type in ("is-instance", "enum", "model"):
+            cls = schema["cls"]
+        elif schema_type in ("lax-or-strict", "json-or-python"):
+            cls = _find_instance_cls(schema)
+            if cls is None:
+                raise _NotCompilable(schema_type)
+        if cls is not None:
+            kind, encoder = self.dispatch.resolve(cls)
+            if kind == _SCALAR:
+                return schema
+            if kind == _CUSTOM:
+                return self._encoded(schema, encoder)
+
+        handler = getattr(
+            self, "_rewrite_" + schema_type.replace("-", "_"), None
+        )
+        if handler is None:
+            raise _NotCompilable(schema_type)
+        return handler(schema)
+
+    def _rewrite_definition_ref(self, schema: dict) -> dict:
+        ref = schema["schema_ref"]
+        if ref in self.compiling:
+            raise _NotCompilable("recursive schema")
+        self.compiling.add(ref)
+        try:
+            return self._rewrite(self.definitions[ref])
+        finally:
+            self.compiling.discard(ref)
+
+    def _rewrite_model(self, schema: dict) -> dict:
+        cls = schema["cls"]
+        if schema.get("root_model"):
+            serializer = pydantic_core.SchemaSerializer(
+                self._rewrite(schema["schema"])
+            )
+
+            def encode_root_model(value):
+                return serializer.to_python(value.root, mode="json")
+
+            return self._encoded({"type": "any"}, encode_root_model)
+
+        serializer = pydantic_core.SchemaSerializer(self._model_fields(schema))
+        encoder = Encoder(custom_encoders=self.custom_encoders)
+
+        def encode_model(value):
+            if type(value) is not cls:
+                return encoder.encode(value)
+            return serializer.to_python(
+                value.__dict__, mode="json", by_alias=True
+            )
+
+        return self._encoded({"type": "any"}, encode_model)
+
+    def _model_fields(self, schema: dict) -> dict:
+        cls = schema["cls"]
+        if cls.model_config.get("extra") == "allow":
+            raise _NotCompilable("extra fields")
+        if (
+            issubclass(cls, bosc.Document)
+            and (cls.bosc_json_encoders or {}) != self.custom_encoders
+        ):
+            # Encoder switches to the encoders of nested documents
+            raise _NotCompilable("nested document encoders")
+        fields_schema = schema["schema"]
+        if fields_schema["type"] != "model-fields" or fields_schema.get(
+            "computed_fields"
+        ):
+            raise _NotCompilable("model fields")
+        fields = {}
+        for name, field in fields_schema["fields"].items():
+            if field.get("serialization_exclude") or field.get(
+                "serialization_exclude_if"
+            ):
+                raise _NotCompilable("excluded field")
+            alias = cls.model_fields[name].alias or name
+            if field.get("serialization_alias", name) != alias:
+                raise _NotCompilable("serialization alias")
+            fields[name] = pydantic_core.core_schema.typed_dict_field(
+                self._rewrite(field["schema"]),
+                required=True,
+                serialization_alias=alias,
+            )
+        return pydantic_core.core_schema.typed_dict_schema(fields)
+
+    def _rewrite_default(self, schema: dict) -> dict:
+        schema["schema"] = self._rewrite(schema["schema"])
+        return schema
+
+    _rewrite_nullable = _rewrite_default
+    _rewrite_function_after = _rewrite_default
+    _rewrite_function_before = _rewrite_default
+    _rewrite_function_wrap = _rewrite_default
+
+    def _rewrite_list(self, schema: dict) -> dict:
+        if "items_schema" in schema:
+            items_schema = schema["items_schema"]
+            if isinstance(items_schema, list):
+                schema["items_schema"] = [
+                    self._rewrite(item) for item in items_schema
+                ]
+            else:
+                schema["items_schema"] = self._rewrite(items_schema)
+        return schema
+
+    _rewrite_tuple = _rewrite_list
+    _rewrite_set = _rewrite_list
+    _rewrite_frozenset = _rewrite_list
+
+    def _rewrite_dict(self, schema: dict) -> dict:
+        # Encoder stringifies keys, so only keys that pydantic serializes
+        # the same way are supported.
+        keys_schema = schema.get("keys_schema")
+        if keys_schema is None or keys_schema["type"] not in ("str", "int"):
+            raise _NotCompilable("dict keys")
+        if "values_schema" not in schema:
+            raise _NotCompilable("dict values")
+        schema["keys_schema"] = self._rewrite(keys_schema)
+        schema["values_schema"] = self._rewrite(schema["values_schema"])
+        return schema
+
+    def _rewrite_union(self, schema: dict) -> dict:
+        schema["choices"] = [
+            (
+                (self._rewrite(choice[0]), choice[1])
+                if isinstance(choice, tuple)
+                else self._rewrite(choice)
+            )
+            for choice in schema["choices"]
+        ]
+        return schema
+
+    def _rewrite_tagged_union(self, schema: dict) -> dict:
+        schema["choices"] = {
+            tag: self._rewrite(choice)
+            for tag, choice in schema["choices"].items()
+        }
+        return schema
+
+    def _rewrite_literal(self, schema: dict) -> dict:
+        for value in schema["expected"]:
+            if type(value) not in SCALAR_TYPES:
+                raise _NotCompilable("literal")
+        return schema
+
+
+class CompiledEncoder:
+    """
+    Encoder for the instances of one document class, backed by pydantic's
+    serializer. Produces the same result as Encoder with nulls kept.
+    """
+
+    def __init__(self, document_cls: type):
+        self.document_cls = document_cls
+        self.serializer = _SchemaCompiler(document_cls).compile()
+        self.field_names = {
+            field_info.alias or name: name
+            for name, field_info in document_cls.model_fields.items()
+        }
+
+    def encode(
+        self, document: "Document", exclude: Container[str] = frozenset()
+    ) -> Mapping[str, Any]:
+        field_exclude = {
+            name for key, name in self.field_names.items() if key in exclude
+        }
+        return self.serializer.to_python(
+            document.__dict__,
+            mode="json",
+            by_alias=True,
+            exclude=field_exclude or None,
+        )
+
+
+_compiled_encoders: MutableMapping[
+    type, Tuple[_EncoderDispatch, Optional[CompiledEncoder]]
+] = {}
+
+
+def get_compiled_encoder(document_cls: type) -> Optional[CompiledEncoder]:
+    """
+    Compiled encoder of the document class, built on first use and rebuilt
+    when its bosc_json_encoders or the default encoders change. None if the
+    class has types that pydantic can't serialize like Encoder does.
+    """
+    dispatch = _get_dispatch(document_cls.bosc_json_encoders)
+    cached = _compiled_encoders.get(document_cls)
+    if cached is not None and cached[0] is dispatch:
+        return cached[1]
+    try:
+        compiled = CompiledEncoder(document_cls)
+    except (_NotCompilable, AttributeError, KeyError, TypeError):
+        compiled = None
+    _compiled_encoders[document_cls] = (dispatch, compiled)
+    return compiled
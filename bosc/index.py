@@ -1,25 +1,164 @@
 import re
+import zlib
 from enum import Enum
+from typing import List, Optional, Sequence, Tuple, Union
+
+from bosc.query.base import Query
 
 
 class IndexType(str, Enum):
     PATH = "path"
     UNIQUE = "unique"
+    # Index on a generated column holding the value of the path. Queries
+    # on the path read the column instead of extracting it from the JSON.
+    COLUMN = "column"
+    # FTS5 table over the text of the paths, searched with Match queries
+    FULLTEXT = "fulltext"
+    # Table of the elements of the array at the path and of the documents
+    # having them, read by the Contains, All and ElemMatch queries
+    MULTIKEY = "multikey"
+
+
+def column_name(path: str) -> str:
+    """
+    Quoted name of the generated column of a path.
+    """
+    return f'"$.{path}"'
+
+
+def sql_literal(value) -> str:
+    """
+    SQL literal of a query parameter, for the WHERE clause of a partial
+    index, which can't have parameters.
+    """
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    if isinstance(value, bytes):
+        return f"X'{value.hex()}'"
+    raise ValueError(f"Cannot use {value!r} in an index")
+
+
+def _split_sql(sql: str, separator: str) -> List[str]:
+    """
+    Split SQL at the separator characters that are outside of quotes and
+    parentheses. The separators are kept as parts of their own, and a
+    closing parenthesis at the top level ends the last part.
+    """
+    parts, start, depth, quote = [], 0, 0, None
+    for position, char in enumerate(sql):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "'\"":
+            quote = char
+        elif char == separator and depth == 0:
+            parts.extend([sql[start:position], char])
+            start = position + 1
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth < 0:
+                break
+    else:
+        position = len(sql)
+    parts.append(sql[start:position])
+    return parts
 
 
 class Index:
+    """
+    Index on one path or, compound, on several paths, each sorted in its
+    own direction. A partial index only covers the documents matching its
+    where query, given as a Query or as SQL.
+    """
+
     def __init__(
-        self, value, index_type: IndexType = IndexType.PATH, name=None
+        self,
+        value: Union[str, Sequence[Union[str, Tuple[str, str]]]],
+        index_type: IndexType = IndexType.PATH,
+        name=None,
+        where: Union[Query, str, None] = None,
     ):
         self.index_type = index_type
-        self.value = value
+        if isinstance(value, str):
+            value = [value]
+        self.fields: Tuple[Tuple[str, str], ...] = tuple(
+            self._parse_field(field) for field in value
+        )
+        if not self.fields:
+            raise ValueError("Index needs at least one path")
+        if index_type == IndexType.FULLTEXT and where is not None:
+            raise ValueError("Full-text indexes can't be partial")
+        if index_type == IndexType.MULTIKEY:
+            if where is not None:
+                raise ValueError("Multikey indexes can't be partial")
+            if len(self.fields) > 1:
+                raise ValueError("Multikey indexes have a single path")
+        self.where = where
         self.name = name or self.generate_name()
 
+    @staticmethod
+    def _parse_field(field: Union[str, Tuple[str, str]]) -> Tuple[str, str]:
+        path, direction = (field, "ASC") if isinstance(field, str) else field
+        direction = getattr(direction, "value", direction).upper()
+        if direction not in ("ASC", "DESC"):
+            raise ValueError(f"Invalid index direction {direction}")
+        return str(path), direction
+
+    @property
+    def paths(self) -> List[str]:
+        return [path for path, _ in self.fields]
+
+    @property
+    def value(self) -> Union[str, Tuple[str, ...]]:
+        """
+        The path of a single path index, or the paths of a compound one.
+        """
+        paths = self.paths
+        return paths[0] if len(paths) == 1 else tuple(paths)
+
+    def where_sql(self) -> Optional[str]:
+        if self.where is None or isinstance(self.where, str):
+            return self.where
+        sql, params = self.where.to_sql()
+        params = iter(params)
+        # Placeholders, skipping quoted strings and names
+        return re.sub(
+            r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|\?",
+            lambda match: (
+                sql_literal(next(params))
+                if match.group() == "?"
+                else match.group()
+            ),
+            sql,
+        )
+
     def generate_name(self):
-        return f"idx_{self.index_type.value}_{self.value}".replace(".", "_")
+        name = f"idx_{self.index_type.value}_" + "_".join(
+            path if direction == "ASC" else f"{path}_desc"
+            for path, direction in self.fields
+        )
+        if len(self.fields) > 1 or self.fields[0][1] != "ASC":
+            # Paths are joined like the parts of nested paths, and a
+            # descending path like a path ending in _desc
+            fields = ",".join(
+                f"{path} {direction}" for path, direction in self.fields
+            )
+            name += f"_{zlib.crc32(fields.encode()):08x}"
+        where = self.where_sql()
+        if where is not None:
+            name += f"_where_{zlib.crc32(where.encode()):08x}"
+        return name.replace(".", "_")
 
     def index_signature(self):
-        return self.index_type, self.value
+        return self.index_type, self.fields, self.where_sql()
 
     def __eq__(self, other):
         return self.index_signature() == other.index_signature()
@@ -30,15 +169,91 @@ class Index:
     def __repr__(self):
         return self.__str__()
 
+    @classmethod
+    def from_sql(cls, name: str, sql: str) -> "Index":
+        """
+        Index of a CREATE INDEX statement, of the CREATE VIRTUAL TABLE
+        statement of a full-text index or of the insert trigger of a
+        multikey index, as stored in sqlite_master.
+        """
+        match = re.search(r"json_each\(new\.data, '\$\.(.+?)'\)", sql)
+        if sql.startswith("CREATE TRIGGER") and match:
+            return cls(match.group(1), IndexType.MULTIKEY, name)
+        return cls(
+            [
+                (cls.extract_value(column), direction)
+                for column, direction in cls._extract_columns(sql)
+            ],
+            cls.extract_type(sql),
+            name,
+            cls.extract_where(sql),
+        )
+
+    @staticmethod
+    def _split_columns(sql: str) -> Tuple[str, str]:
+        """
+        The column list of a CREATE INDEX statement, and what follows it.
+        """
+        # The column list is in the first parenthesis outside of quotes
+        head = _split_sql(sql, "(")[0]
+        start = len(head) + 1
+        columns_sql = "".join(_split_sql(sql[start:], ","))
+        return columns_sql, sql[start + len(columns_sql) + 1 :]
+
+    @staticmethod
+    def _extract_columns(sql: str) -> List[Tuple[str, str]]:
+        columns_sql, _ = Index._split_columns(sql)
+        columns = []
+        for part in _split_sql(columns_sql, ","):
+            if part == ",":
+                continue
+            column, direction = part.strip(), "ASC"
+            if re.match(r"\w+\s*=", column):
+                # Option of a virtual table
+                continue
+            match = re.fullmatch(r"(.+?)\s+(ASC|DESC)", column, re.IGNORECASE)
+            if match:
+                column, direction = match.group(1), match.group(2).upper()
+            columns.append((column, direction))
+        return columns
+
+    @staticmethod
+    def extract_where(sql: str) -> Optional[str]:
+        _, rest = Index._split_columns(sql)
+        match = re.fullmatch(
+            r"\s*WHERE\s+(.+)", rest, re.IGNORECASE | re.DOTALL
+        )
+        return match.group(1).strip() if match else None
+
     @staticmethod
     def extract_type(sql: str) -> IndexType:
-        if "UNIQUE" in sql:
+        if sql.startswith("CREATE UNIQUE"):
             return IndexType.UNIQUE
+        if sql.startswith("CREATE VIRTUAL TABLE"):
+            return IndexType.FULLTEXT
+        columns = Index._extract_columns(sql)
+        if any(column.startswith('"$.') for column, _ in columns):
+            return IndexType.COLUMN
         return IndexType.PATH
 
     @staticmethod
     def extract_value(sql: str) -> str:
-        if "json_extract" in sql:
-            match = re.search(r"json_extract\(.+, '\$\.(.+)'", sql)
-            return match.group(1) if match else ""
+        """
+        Path of an indexed column, or of the first one of a CREATE INDEX
+        statement.
+        """
+        if sql.startswith("CREATE"):
+            sql = Index._extract_columns(sql)[0][0]
+        match = re.fullmatch(r"json_extract\(data, '\$\.(.+)'\)", sql)
+        if match:
+            return match.group(1)
+        if sql == "doc_id":
+            return "id"
+        match = re.fullmatch(r'"\$\.(.+)"', sql)
+        if match:
+            return match.group(1)
+        # Column of a full-text index
+        match = re.fullmatch(r'"(.+)"', sql)
+        if match:
+            return match.group(1)
         raise ValueError("Invalid index SQL")
@@ -0,0 +1,19 @@
+from bosc.query.aggregate.accumulators import (
+    Avg,
+    Count,
+    Distinct,
+    Max,
+    Min,
+    Push,
+    Sum,
+)
+
+__all__ = [
+    "Sum",
+    "Avg",
+    "Min",
+    "Max",
+    "Count",
+    "Distinct",
+    "Push",
+]
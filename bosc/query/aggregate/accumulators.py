@@ -0,0 +1,71 @@
+from typing import Optional
+
+from bosc.query.base import Accumulator, json_value_sql
+
+
+class FieldAccumulator(Accumulator):
+    function = ""
+
+    def __init__(self, field):
+        # Plain str, as ExpressionField overrides comparisons
+        self.field = str(field)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.field == other.field
+
+    def to_sql_aggregate(self):
+        return f"{self.function}(json_extract(data, '$.{self.field}'))"
+
+    def shape(self):
+        return type(self), self.field
+
+
+class Sum(FieldAccumulator):
+    function = "SUM"
+
+
+class Avg(FieldAccumulator):
+    function = "AVG"
+
+
+class Min(FieldAccumulator):
+    function = "MIN"
+
+
+class Max(FieldAccumulator):
+    function = "MAX"
+
+
+class Count(FieldAccumulator):
+    """
+    Number of documents in the group, or of those where the field is set
+    and not null.
+    """
+
+    function = "COUNT"
+
+    def __init__(self, field: Optional[str] = None):
+        self.field = None if field is None else str(field)
+
+    def to_sql_aggregate(self):
+        if self.field is None:
+            return "COUNT(*)"
+        return super().to_sql_aggregate()
+
+
+class Push(FieldAccumulator):
+    """
+    List of the values of the field in the group, null where it is missing.
+    """
+
+    def to_sql_aggregate(self):
+        return f"json_group_array({json_value_sql(self.field)})"
+
+
+class Distinct(FieldAccumulator):
+    """
+    List of the distinct values of the field in the group.
+    """
+
+    def to_sql_aggregate(self):
+        return f"json_group_array(DISTINCT {json_value_sql(self.field)})"
@@ -1,12 +1,69 @@
+import sqlite3
+from typing import Hashable, List, Optional
+
+
 class Query:
     def to_sql(self):
         raise NotImplementedError(
             "This method should be implemented by subclasses."
         )
 
+    def shape(self) -> Optional[Hashable]:
+        """
+        Structural key of the query. Queries of the same shape compile to
+        the same SQL and only differ in params(). None means the SQL of the
+        query can't be reused.
+        """
+        return None
+
+    def params(self) -> List:
+        return self.to_sql()[1]
+
 
 class UpdateOperation:
     def to_sql_update(self):
         raise NotImplementedError(
             "This method should be implemented by subclasses."
         )
+
+    def shape(self) -> Optional[Hashable]:
+        """
+        Structural key of the operation, see Query.shape.
+        """
+        return None
+
+    def params(self) -> List:
+        return self.to_sql_update()[1]
+
+
+class Accumulator:
+    """
+    Aggregate of a field over the documents of a group.
+    """
+
+    def to_sql_aggregate(self) -> str:
+        raise NotImplementedError(
+            "This method should be implemented by subclasses."
+        )
+
+    def shape(self) -> Optional[Hashable]:
+        """
+        Structural key of the accumulator, see Query.shape.
+        """
+        return None
+
+
+def json_value_sql(field: str) -> str:
+    """
+    JSON value of a field, to be embedded by json_object or
+    json_group_array. The -> operator keeps booleans and nested values as
+    JSON. json_extract, its only counterpart before SQLite 3.38, returns
+    booleans as integers.
+    """
+    if sqlite3.sqlite_version_info >= (3, 38, 0):
+        return f"data -> '$.{field}'"
+    value = f"json_extract(data, '$.{field}')"
+    return (
+        f"CASE json_type(data, '$.{field}') WHEN 'true' THEN json('true') "
+        f"WHEN 'false' THEN json('false') ELSE {value} END"
+    )
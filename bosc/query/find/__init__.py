@@ -1,4 +1,6 @@
+from bosc.query.find.array import All, Contains, ElemMatch, Size
 from bosc.query.find.comparison import Eq, Gt, Gte, In, Lt, Lte, Neq, Nin
+from bosc.query.find.fulltext import Match
 from bosc.query.find.logical import And, Or
 
 __all__ = [
@@ -12,4 +14,9 @@ __all__ = [
     "Nin",
     "And",
     "Or",
+    "Match",
+    "Contains",
+    "All",
+    "Size",
+    "ElemMatch",
 ]
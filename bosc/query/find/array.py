@@ -0,0 +1,156 @@
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from bosc.encoder import encode
+from bosc.query.base import Query
+from bosc.query.find.comparison import without_id_column
+
+# Number of ElemMatch queries around the conditions being compiled
+_element_depth = ContextVar("element_depth", default=0)
+
+
+@contextmanager
+def _nested_elements() -> Iterator[None]:
+    """
+    Compile the conditions inside the block one array deeper.
+    """
+    token = _element_depth.set(_element_depth.get() + 1)
+    try:
+        yield
+    finally:
+        _element_depth.reset(token)
+
+
+def element_alias() -> str:
+    """
+    Alias of the elements of an array in its condition. Arrays inside
+    ElemMatch queries have their own, so that they don't hide the elements
+    of the arrays around them.
+    """
+    depth = _element_depth.get()
+    return f"element_{depth}" if depth else "element"
+
+
+def elements_head(field: str) -> str:
+    """
+    Start of the condition of elements_sql, up to the condition on the
+    element.
+    """
+    return (
+        f"EXISTS (SELECT 1 FROM json_each(data, '$.{field}') "
+        f"AS {element_alias()} WHERE "
+    )
+
+
+def elements_sql(field: str, condition: str) -> str:
+    """
+    Condition true when an element of the array at the field matches the
+    condition on the value and type of the element, see element_alias. A
+    multikey index on the field turns it into a lookup of its table, see
+    Collection._use_columns.
+    """
+    return f"{elements_head(field)}{condition})"
+
+
+class ArrayQuery(Query):
+    def __init__(self, field, value):
+        self.field = str(field)
+        self.value = encode(value)
+
+    def __eq__(self, other):
+        return (
+            type(self) is type(other)
+            and self.field == other.field
+            and self.value == other.value
+        )
+
+    def shape(self):
+        return type(self), self.field
+
+    def params(self):
+        return [self.value]
+
+
+class Contains(ArrayQuery):
+    """
+    Documents whose array at the field has the value as an element.
+    """
+
+    def to_sql(self):
+        return (
+            elements_sql(self.field, f"{element_alias()}.value = ?"),
+            self.params(),
+        )
+
+
+class All(ArrayQuery):
+    """
+    Documents whose array at the field has every one of the values.
+    """
+
+    def __init__(self, field, values):
+        super().__init__(field, list(values))
+        if not self.value:
+            raise ValueError("All needs at least one value")
+
+    def to_sql(self):
+        condition = elements_sql(self.field, f"{element_alias()}.value = ?")
+        return (
+            " AND ".join([condition] * len(self.value)),
+            self.params(),
+        )
+
+    def shape(self):
+        return type(self), self.field, len(self.value)
+
+    def params(self):
+        return list(self.value)
+
+
+class Size(ArrayQuery):
+    """
+    Documents whose array at the field has exactly size elements.
+    """
+
+    def to_sql(self):
+        return f"json_array_length(data, '$.{self.field}') = ?", self.params()
+
+
+class ElemMatch(Query):
+    """
+    Documents with an object in the array at the field matching the
+    query, whose fields are those of the object. Elements that aren't
+    objects never match.
+    """
+
+    def __init__(self, field, query: Query):
+        self.field = str(field)
+        self.query = query
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, ElemMatch)
+            and self.field == other.field
+            and self.query == other.query
+        )
+
+    def shape(self):
+        shape = self.query.shape()
+        if shape is None:
+            return None
+        return type(self), self.field, shape
+
+    def params(self):
+        with without_id_column():
+            return self.query.params()
+
+    def to_sql(self):
+        alias = element_alias()
+        with without_id_column(), _nested_elements():
+            sql, params = self.query.to_sql()
+        # Read the fields of the element instead of those of the document
+        sql = re.sub(r"\b(json_\w+)\(data, ", rf"\1({alias}.value, ", sql)
+        condition = f"{alias}.type = 'object' AND ({sql})"
+        return elements_sql(self.field, condition), params
@@ -1,59 +1,134 @@
-from bosc.encoder import encode
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from bosc.encoder import doc_key, encode
 from bosc.query.base import Query
 
+# Document ids are stored in their own indexed column
+ID_FIELD = "id"
+ID_COLUMN = "doc_id"
+
+# Off while compiling conditions on the elements of an array, whose id
+# fields aren't document ids, see ElemMatch
+_id_column_enabled = ContextVar("id_column_enabled", default=True)
+
+
+@contextmanager
+def without_id_column() -> Iterator[None]:
+    """
+    Compare id fields as any other field inside the block.
+    """
+    token = _id_column_enabled.set(False)
+    try:
+        yield
+    finally:
+        _id_column_enabled.reset(token)
+
 
 class ComparisonQuery(Query):
+    # Whether comparing ids can use the id column, i.e. only needs equality
+    on_id_column = False
+    # Condition used instead when comparing with None, as comparing with
+    # NULL is never true
+    null_condition = None
+
     def __init__(self, field, value):
-        self.field = encode(field)
+        self.field = str(field)
         self.value = encode(value)
 
     def __eq__(self, other):
         return self.field == other.field and self.value == other.value
 
+    def _uses_id_column(self) -> bool:
+        return (
+            self.on_id_column
+            and self.field == ID_FIELD
+            and _id_column_enabled.get()
+        )
+
+    def _column(self) -> str:
+        if self._uses_id_column():
+            return ID_COLUMN
+        return f"json_extract(data, '$.{self.field}')"
+
+    def _is_null_check(self) -> bool:
+        return self.null_condition is not None and self.value is None
+
+    def shape(self):
+        return type(self), self.field, self._is_null_check()
+
+    def params(self):
+        if self._is_null_check():
+            return []
+        if self._uses_id_column():
+            return [doc_key(self.value)]
+        return [self.value]
+
 
 class Eq(ComparisonQuery):
+    on_id_column = True
+    null_condition = "IS NULL"
+
     def to_sql(self):
-        return f"json_extract(data, '$.{self.field}') = ?", [self.value]
+        if self._is_null_check():
+            return f"{self._column()} {self.null_condition}", []
+        return f"{self._column()} = ?", self.params()
 
 
 class Neq(ComparisonQuery):
+    on_id_column = True
+    null_condition = "IS NOT NULL"
+
     def to_sql(self):
-        return f"json_extract(data, '$.{self.field}') != ?", [self.value]
+        if self._is_null_check():
+            return f"{self._column()} {self.null_condition}", []
+        return f"{self._column()} != ?", self.params()
 
 
 class Gt(ComparisonQuery):
     def to_sql(self):
-        return f"json_extract(data, '$.{self.field}') > ?", [self.value]
+        return f"{self._column()} > ?", self.params()
 
 
 class Gte(ComparisonQuery):
     def to_sql(self):
-        return f"json_extract(data, '$.{self.field}') >= ?", [self.value]
+        return f"{self._column()} >= ?", self.params()
 
 
 class Lt(ComparisonQuery):
     def to_sql(self):
-        return f"json_extract(data, '$.{self.field}') < ?", [self.value]
+        return f"{self._column()} < ?", self.params()
 
 
 class Lte(ComparisonQuery):
     def to_sql(self):
-        return f"json_extract(data, '$.{self.field}') <= ?", [self.value]
+        return f"{self._column()} <= ?", self.params()
+
+
+class MembershipQuery(ComparisonQuery):
+    on_id_column = True
 
+    def shape(self):
+        return type(self), self.field, len(self.value)
 
-class In(ComparisonQuery):
+    def params(self):
+        if self._uses_id_column():
+            return [doc_key(value) for value in self.value]
+        return list(self.value)
+
+    def _placeholders(self) -> str:
+        return ", ".join(["?"] * len(self.value))
+
+
+class In(MembershipQuery):
     def to_sql(self):
-        placeholders = ", ".join(["?"] * len(self.value))
-        return (
-            f"json_extract(data, '$.{self.field}') IN ({placeholders})",
-            self.value,
-        )
+        return f"{self._column()} IN ({self._placeholders()})", self.params()
 
 
-class Nin(ComparisonQuery):
+class Nin(MembershipQuery):
     def to_sql(self):
-        placeholders = ", ".join(["?"] * len(self.value))
         return (
-            f"json_extract(data, '$.{self.field}') NOT IN ({placeholders})",
-            self.value,
+            f"{self._column()} NOT IN ({self._placeholders()})",
+            self.params(),
         )
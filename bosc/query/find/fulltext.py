@@ -0,0 +1,48 @@
+from typing import Optional, Sequence, Union
+
+from bosc.index import Index, IndexType
+from bosc.query.base import Query
+
+
+class Match(Query):
+    """
+    Documents matching a full-text search of the FTS5 index on the fields,
+    in the FTS5 query syntax. The index is the one Index(fields,
+    IndexType.FULLTEXT) creates, unless its name is given. A search can be
+    limited to one of its fields with a column filter, like
+    '"title" : python'.
+
+    Given as order_by, it also sorts the found documents by relevance.
+    """
+
+    def __init__(
+        self,
+        fields: Union[str, Sequence[str]],
+        text: str,
+        index_name: Optional[str] = None,
+    ):
+        self.fields = fields
+        self.text = text
+        self.index_name = index_name or Index(fields, IndexType.FULLTEXT).name
+
+    def __eq__(self, other):
+        return self.index_name == other.index_name and self.text == other.text
+
+    def search_sql(self) -> str:
+        """
+        Row ids of the matching documents and their bm25 rank, lower for
+        better matches.
+        """
+        return f'SELECT rowid, rank FROM "{self.index_name}" WHERE "{self.index_name}" MATCH ?'
+
+    def to_sql(self):
+        return (
+            f'id IN (SELECT rowid FROM "{self.index_name}" WHERE "{self.index_name}" MATCH ?)',
+            self.params(),
+        )
+
+    def shape(self):
+        return type(self), self.index_name
+
+    def params(self):
+        return [self.text]
@@ -5,6 +5,15 @@ class LogicalQuery(Query):
     def __init__(self, *queries):
         self.queries = queries
 
+    def shape(self):
+        shapes = tuple(query.shape() for query in self.queries)
+        if None in shapes:
+            return None
+        return type(self), shapes
+
+    def params(self):
+        return [param for query in self.queries for param in query.params()]
+
 
 class And(LogicalQuery):
     def to_sql(self):
@@ -1,8 +1,33 @@
-from bosc.query.update.values import Inc, Now, RemoveField, Set
+from bosc.query.update.values import (
+    AddToSet,
+    Inc,
+    Max,
+    Merge,
+    Min,
+    Mul,
+    Now,
+    Pull,
+    Push,
+    RemoveField,
+    Rename,
+    Set,
+    SetPaths,
+    Unset,
+)
 
 __all__ = [
     "Set",
     "Inc",
     "Now",
     "RemoveField",
+    "Push",
+    "Pull",
+    "AddToSet",
+    "Merge",
+    "Min",
+    "Max",
+    "Mul",
+    "Rename",
+    "Unset",
+    "SetPaths",
 ]
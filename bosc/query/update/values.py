@@ -1,19 +1,28 @@
+import json
+from typing import Any, Dict, Optional, Sequence
+
 from bosc.encoder import encode
 from bosc.query.base import UpdateOperation
 
 
 class Set(UpdateOperation):
     def __init__(self, field, value):
-        self.field = encode(field)
+        self.field = str(field)
         self.value = encode(value)
 
     def to_sql_update(self):
         return f"json_set(data, '$.{self.field}', ?)", [self.value]
 
+    def shape(self):
+        return Set, self.field
+
+    def params(self):
+        return [self.value]
+
 
 class Inc(UpdateOperation):
     def __init__(self, field, increment_by=1):
-        self.field = field
+        self.field = str(field)
         self.increment_by = increment_by
 
     def to_sql_update(self):
@@ -22,10 +31,16 @@ class Inc(UpdateOperation):
             [self.increment_by],
         )
 
+    def shape(self):
+        return Inc, self.field
+
+    def params(self):
+        return [self.increment_by]
+
 
 class Now(UpdateOperation):
     def __init__(self, field):
-        self.field = field
+        self.field = str(field)
 
     def to_sql_update(self):
         return (
@@ -33,10 +48,324 @@ class Now(UpdateOperation):
             [],
         )
 
+    def shape(self):
+        return Now, self.field
+
+    def params(self):
+        return []
+
 
 class RemoveField(UpdateOperation):
     def __init__(self, field):
-        self.field = field
+        self.field = str(field)
 
     def to_sql_update(self):
         return f"json_remove(data, '$.{self.field}')", []
+
+    def shape(self):
+        return RemoveField, self.field
+
+    def params(self):
+        return []
+
+
+def _element_sql() -> str:
+    """
+    JSON value of an element of json_each, as its value column holds
+    objects and arrays as text and booleans as integers.
+    """
+    return (
+        "CASE type WHEN 'true' THEN json('true') WHEN 'false' "
+        "THEN json('false') WHEN 'object' THEN json(value) "
+        "WHEN 'array' THEN json(value) ELSE value END"
+    )
+
+
+def _element_json_sql() -> str:
+    """
+    JSON text of an element of json_each, to compare elements by type and
+    value, including objects and arrays.
+    """
+    return f"json_quote({_element_sql()})"
+
+
+def _append_sql(field: str, count: int) -> str:
+    """
+    The array at the field with count values, given as JSON parameters,
+    appended. A missing array is created.
+    """
+    values = ", ".join(["'$[#]', json(?)"] * count)
+    return f"json_insert(COALESCE(json_extract(data, '$.{field}'), '[]'), {values})"
+
+
+class Push(UpdateOperation):
+    """
+    Append the values to the array at the field. With max_length, only
+    the last max_length elements are kept, capping the array.
+    """
+
+    def __init__(self, field, *values, max_length: Optional[int] = None):
+        if not values:
+            raise ValueError("Push needs at least one value")
+        self.field = str(field)
+        self.values = [json.dumps(encode(value)) for value in values]
+        self.max_length = max_length
+
+    def to_sql_update(self):
+        array = _append_sql(self.field, len(self.values))
+        if self.max_length is not None:
+            # Pushing to a full array only drops its first element, which
+            # is much cheaper than slicing it
+            array = (
+                "(SELECT CASE WHEN json_array_length(array) <= ? THEN json(array) "
+                "WHEN json_array_length(array) = ? + 1 THEN json_remove(array, '$[0]') "
+                f"ELSE (SELECT json_group_array({_element_sql()}) FROM json_each(array) "
+                f"WHERE key >= json_array_length(array) - ?) END FROM (SELECT {array} AS array))"
+            )
+        return f"json_set(data, '$.{self.field}', {array})", self.params()
+
+    def shape(self):
+        return Push, self.field, len(self.values), self.max_length is None
+
+    def params(self):
+        if self.max_length is None:
+            return list(self.values)
+        return [self.max_length] * 3 + self.values
+
+
+class Pull(UpdateOperation):
+    """
+    Remove every element equal to the value from the array at the field.
+    """
+
+    def __init__(self, field, value):
+        self.field = str(field)
+        self.value = encode(value)
+
+    def to_sql_update(self):
+        return (
+            (
+                f"CASE json_type(data, '$.{self.field}') WHEN 'array' THEN "
+                f"json_set(data, '$.{self.field}', (SELECT json_group_array({_element_sql()}) "
+                f"FROM json_each(data, '$.{self.field}') WHERE {_element_json_sql()} != json(?))) "
+                "ELSE data END"
+            ),
+            self.params(),
+        )
+
+    def shape(self):
+        return Pull, self.field
+
+    def params(self):
+        return [json.dumps(self.value)]
+
+
+class AddToSet(UpdateOperation):
+    """
+    Append the value to the array at the field, unless it already has it.
+    """
+
+    def __init__(self, field, value):
+        self.field = str(field)
+        self.value = encode(value)
+
+    def to_sql_update(self):
+        return (
+            (
+                f"CASE WHEN EXISTS (SELECT 1 FROM json_each(data, '$.{self.field}') "
+                f"WHERE {_element_json_sql()} = json(?)) THEN data ELSE json_set(data, '$.{self.field}', "
+                f"{_append_sql(self.field, 1)}) END"
+            ),
+            self.params(),
+        )
+
+    def shape(self):
+        return AddToSet, self.field
+
+    def params(self):
+        value = json.dumps(self.value)
+        return [value, value]
+
+
+class Merge(UpdateOperation):
+    """
+    Merge the object into the document, or into the object at the field,
+    as a JSON merge patch: its fields are set, recursively, and its None
+    fields are removed.
+    """
+
+    def __init__(self, value: dict, field=None):
+        self.value = json.dumps(encode(value))
+        self.field = None if field is None else str(field)
+
+    def to_sql_update(self):
+        if self.field is None:
+            return "json_patch(data, ?)", [self.value]
+        return (
+            (
+                f"json_set(data, '$.{self.field}', json_patch("
+                f"COALESCE(json_extract(data, '$.{self.field}'), '{{}}'), ?))"
+            ),
+            [self.value],
+        )
+
+    def shape(self):
+        return Merge, self.field
+
+    def params(self):
+        return [self.value]
+
+
+class Min(UpdateOperation):
+    """
+    Set the field to the value if it is lower than the current one, or if
+    the field is missing.
+    """
+
+    comparison = "<="
+
+    def __init__(self, field, value):
+        self.field = str(field)
+        self.value = encode(value)
+
+    def to_sql_update(self):
+        return (
+            (
+                f"CASE WHEN json_extract(data, '$.{self.field}') {self.comparison} ? "
+                f"THEN data ELSE json_set(data, '$.{self.field}', ?) END"
+            ),
+            self.params(),
+        )
+
+    def shape(self):
+        return type(self), self.field
+
+    def params(self):
+        return [self.value, self.value]
+
+
+class Max(Min):
+    """
+    Set the field to the value if it is greater than the current one, or
+    if the field is missing.
+    """
+
+    comparison = ">="
+
+
+class Mul(UpdateOperation):
+    """
+    Multiply the field by the factor. A missing field is set to 0.
+    """
+
+    def __init__(self, field, factor):
+        self.field = str(field)
+        self.factor = factor
+
+    def to_sql_update(self):
+        return (
+            f"json_set(data, '$.{self.field}', COALESCE(json_extract(data, '$.{self.field}'), 0) * ?)",
+            [self.factor],
+        )
+
+    def shape(self):
+        return Mul, self.field
+
+    def params(self):
+        return [self.factor]
+
+
+class Rename(UpdateOperation):
+    """
+    Move the value of the field to new_field. Nothing changes when the
+    field is missing.
+    """
+
+    def __init__(self, field, new_field):
+        self.field = str(field)
+        self.new_field = str(new_field)
+
+    def to_sql_update(self):
+        return (
+            (
+                f"CASE WHEN json_type(data, '$.{self.field}') IS NULL THEN data "
+                f"ELSE json_remove(json_set(data, '$.{self.new_field}', "
+                f"json_extract(data, '$.{self.field}')), '$.{self.field}') END"
+            ),
+            [],
+        )
+
+    def shape(self):
+        return Rename, self.field, self.new_field
+
+    def params(self):
+        return []
+
+
+class Unset(UpdateOperation):
+    """
+    Remove the fields.
+    """
+
+    def __init__(self, *fields):
+        if not fields:
+            raise ValueError("Unset needs at least one field")
+        self.fields = tuple(str(field) for field in fields)
+
+    def to_sql_update(self):
+        paths = ", ".join(f"'$.{field}'" for field in self.fields)
+        return f"json_remove(data, {paths})", []
+
+    def shape(self):
+        return Unset, self.fields
+
+    def params(self):
+        return []
+
+
+class SetPaths(UpdateOperation):
+    """
+    Set several paths and remove others, with a single json_set and
+    json_remove. The paths are bound as parameters, so they can be any
+    JSON path relative to the document, like 'address."zip code"'.
+    """
+
+    def __init__(self, values: Dict[str, Any], removed: Sequence[str] = ()):
+        if not values and not removed:
+            raise ValueError("SetPaths needs at least one path")
+        self.values = {path: encode(value) for path, value in values.items()}
+        self.removed = tuple(removed)
+
+    @staticmethod
+    def _is_json(value) -> bool:
+        # Bound as JSON text, as SQLite would store booleans as integers
+        # and can't bind containers
+        return isinstance(value, (bool, dict, list))
+
+    def to_sql_update(self):
+        sql = "data"
+        if self.values:
+            pairs = ", ".join(
+                "?, json(?)" if self._is_json(value) else "?, ?"
+                for value in self.values.values()
+            )
+            sql = f"json_set({sql}, {pairs})"
+        if self.removed:
+            paths = ", ".join(["?"] * len(self.removed))
+            sql = f"json_remove({sql}, {paths})"
+        return sql, self.params()
+
+    def shape(self):
+        return (
+            SetPaths,
+            tuple(self._is_json(value) for value in self.values.values()),
+            len(self.removed),
+        )
+
+    def params(self):
+        params = []
+        for path, value in self.values.items():
+            params.append(f"$.{path}")
+            params.append(json.dumps(value) if self._is_json(value) else value)
+        params.extend(f"$.{path}" for path in self.removed)
+        return params
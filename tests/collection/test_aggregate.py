@@ -0,0 +1,126 @@
+import json
+
+import pytest
+
+from bosc.query.aggregate import Avg, Count, Distinct, Max, Min, Push, Sum
+from bosc.query.base import Accumulator
+from bosc.query.find.comparison import Gt
+
+
+class TestAggregate:
+    def test_group_by(self, collection, documents):
+        result = collection.aggregate(
+            group_by="address.state",
+            accumulators={
+                "count": Count(),
+                "total": Sum("age"),
+                "average": Avg("age"),
+                "youngest": Min("age"),
+                "oldest": Max("age"),
+            },
+        )
+        assert result == [
+            {
+                "address.state": "CA",
+                "count": 2,
+                "total": 49,
+                "average": 24.5,
+                "youngest": 22,
+                "oldest": 27,
+            },
+            {
+                "address.state": "IL",
+                "count": 1,
+                "total": 30,
+                "average": 30.0,
+                "youngest": 30,
+                "oldest": 30,
+            },
+            {
+                "address.state": "NY",
+                "count": 2,
+                "total": 65,
+                "average": 32.5,
+                "youngest": 25,
+                "oldest": 40,
+            },
+        ]
+
+    def test_query_and_several_fields(self, collection, documents):
+        result = collection.aggregate(
+            Gt("age", 22),
+            ["address.state", "name"],
+            {"count": Count()},
+        )
+        assert result == [
+            {"address.state": "CA", "name": "Linda", "count": 1},
+            {"address.state": "IL", "name": "Joe", "count": 1},
+            {"address.state": "NY", "name": "John", "count": 2},
+        ]
+
+    def test_without_group_by(self, collection, documents):
+        result = collection.aggregate(
+            accumulators={"count": Count(), "total": Sum("age")}
+        )
+        assert result == [{"count": 5, "total": 144}]
+
+    def test_push_and_distinct(self, collection):
+        collection.insert_many(
+            [
+                {"group": 1, "tag": "a", "flag": True},
+                {"group": 1, "tag": "a", "flag": False},
+                {"group": 1, "tag": {"nested": 1}},
+                {"group": 2, "tag": "b"},
+            ]
+        )
+        result = collection.aggregate(
+            group_by="group",
+            accumulators={
+                "tags": Distinct("tag"),
+                "flags": Push("flag"),
+                "flagged": Count("flag"),
+            },
+        )
+        assert result[0]["group"] == 1
+        assert sorted(map(json.dumps, result[0]["tags"])) == [
+            '"a"',
+            '{"nested": 1}',
+        ]
+        assert result[0]["flags"] == [True, False, None]
+        assert result[0]["flagged"] == 2
+        assert result[1] == {
+            "group": 2,
+            "tags": ["b"],
+            "flags": [None],
+            "flagged": 0,
+        }
+
+    def test_raw(self, collection, documents):
+        result = collection.aggregate(
+            group_by="name", accumulators={"count": Count()}, raw=True
+        )
+        assert json.loads(result[0]) == {"name": "Jane", "count": 1}
+
+    def test_name_conflict(self, collection):
+        with pytest.raises(ValueError):
+            collection.aggregate(
+                group_by="name", accumulators={"name": Count()}
+            )
+
+    def test_statement_cache(self, collection, documents):
+        class Custom(Accumulator):
+            def to_sql_aggregate(self):
+                return "GROUP_CONCAT(json_extract(data, '$.name'), ',')"
+
+        collection.aggregate(group_by="name", accumulators={"n": Count()})
+        collection.aggregate(group_by="name", accumulators={"n": Count()})
+        assert len(collection._statements) == 1
+        result = collection.aggregate(accumulators={"names": Custom()})
+        assert len(collection._statements) == 1
+        assert sorted(result[0]["names"].split(",")) == [
+            "Jane",
+            "Joe",
+            "John",
+            "John",
+            "Linda",
+        ]
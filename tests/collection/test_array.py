@@ -0,0 +1,170 @@
+import pytest
+
+from bosc.collection import OnConflict
+from bosc.database import Database
+from bosc.index import Index, IndexType
+from bosc.query.find.array import All, Contains, ElemMatch, Size
+from bosc.query.find.comparison import Eq, Gt, In, Neq, Nin
+from bosc.query.find.logical import And, Or
+from bosc.query.update.values import RemoveField
+
+
+@pytest.fixture
+def orders(collection):
+    collection.insert_many(
+        [
+            {
+                "id": 1,
+                "tags": ["new", "gift"],
+                "items": [{"status": "open", "qty": 1}, "note"],
+            },
+            {
+                "id": 2,
+                "tags": ["gift", "bulk", None, "gift"],
+                "items": [{"status": "closed", "qty": 5}],
+            },
+            {"id": 3, "tags": "new", "items": []},
+        ]
+    )
+    return collection
+
+
+QUERIES = [
+    (Contains("tags", "new"), [1, 3]),
+    (Contains("tags", "none"), []),
+    (All("tags", ["new", "gift"]), [1]),
+    (Size("tags", 4), [2]),
+    (ElemMatch("items", And(Eq("status", "open"), Gt("qty", 0))), [1]),
+    (ElemMatch("items", Gt("qty", 2)), [2]),
+    (Or(Contains("tags", "bulk"), Size("items", 0)), [2, 3]),
+]
+
+
+def find_ids(collection, query):
+    return [
+        document["id"] for document in collection.find(query, order_by="id")
+    ]
+
+
+class TestArrayQueries:
+    @pytest.mark.parametrize("query,expected", QUERIES)
+    def test_queries(self, orders, query, expected):
+        assert find_ids(orders, query) == expected
+
+    @pytest.mark.parametrize("query,expected", QUERIES)
+    def test_queries_with_multikey_indexes(self, orders, query, expected):
+        orders.create_index(Index("tags", IndexType.MULTIKEY))
+        orders.create_index(Index("items", IndexType.MULTIKEY))
+        assert find_ids(orders, query) == expected
+
+    def test_elem_match_on_element_ids(self, collection):
+        collection.insert_many(
+            [
+                {"id": "a", "items": [{"id": "b"}, {"id": 1}]},
+                {"id": "b", "items": [{"id": "c"}]},
+            ]
+        )
+        queries = [
+            (ElemMatch("items", Eq("id", "b")), ["a"]),
+            (ElemMatch("items", In("id", ["c", 1])), ["a", "b"]),
+            (ElemMatch("items", Neq("id", "b")), ["a", "b"]),
+            (ElemMatch("items", Nin("id", ["b", 1])), ["b"]),
+            (And(Eq("id", "b"), ElemMatch("items", Eq("id", "c"))), ["b"]),
+        ]
+        for _ in range(2):
+            for query, expected in queries:
+                assert find_ids(collection, query) == expected
+
+    def test_nested_array_queries(self, collection):
+        collection.insert_many(
+            [
+                {
+                    "id": "a",
+                    "orders": [
+                        {"tags": ["x"], "items": [{"sku": "a", "n": 1}]},
+                        {"tags": ["y", "z"], "items": []},
+                    ],
+                },
+                {
+                    "id": "b",
+                    "orders": [{"tags": ["y"], "items": [{"sku": "b"}]}],
+                },
+            ]
+        )
+        queries = [
+            (ElemMatch("orders", Contains("tags", "x")), ["a"]),
+            (ElemMatch("orders", All("tags", ["y", "z"])), ["a"]),
+            (ElemMatch("orders", Size("items", 0)), ["a"]),
+            (ElemMatch("orders", ElemMatch("items", Eq("sku", "a"))), ["a"]),
+            (
+                ElemMatch(
+                    "orders",
+                    And(
+                        Contains("tags", "y"),
+                        ElemMatch("items", Eq("sku", "b")),
+                    ),
+                ),
+                ["b"],
+            ),
+            (ElemMatch("orders", ElemMatch("items", Gt("n", 1))), []),
+        ]
+        for query, expected in queries:
+            assert find_ids(collection, query) == expected
+        collection.create_index(Index("orders", IndexType.MULTIKEY))
+        for query, expected in queries:
+            assert find_ids(collection, query) == expected
+
+    def test_all_needs_values(self):
+        with pytest.raises(ValueError):
+            All("tags", [])
+
+
+class TestMultikeyIndexes:
+    def test_invalid_index(self):
+        with pytest.raises(ValueError):
+            Index(["tags", "items"], IndexType.MULTIKEY)
+        with pytest.raises(ValueError):
+            Index("tags", IndexType.MULTIKEY, where=Gt("qty", 1))
+
+    def test_lookup_uses_table(self, orders):
+        orders.create_index(Index("tags", IndexType.MULTIKEY))
+        sql, params = orders._find_sql(
+            Contains("tags", "gift"), None, "ASC", None, None
+        )
+        plan = orders.connection.execute(
+            f"EXPLAIN QUERY PLAN {sql}", params
+        ).fetchall()
+        assert any(
+            "SEARCH element USING PRIMARY KEY" in row[3] for row in plan
+        )
+
+    def test_sync_on_writes(self, orders):
+        orders.create_index(Index("tags", IndexType.MULTIKEY))
+        orders.update(Eq("id", 1), RemoveField("tags"))
+        orders.delete(Eq("id", 2))
+        orders.insert(
+            {"id": 3, "tags": ["bulk", None], "items": []},
+            OnConflict.REPLACE,
+        )
+        orders.insert({"id": 4, "tags": ["gift"]})
+        assert find_ids(orders, Contains("tags", "new")) == []
+        assert find_ids(orders, Contains("tags", "gift")) == [4]
+        assert find_ids(orders, Contains("tags", "bulk")) == [3]
+        rows = orders.connection.execute(
+            'SELECT value FROM "idx_multikey_tags" ORDER BY value'
+        ).fetchall()
+        assert rows == [("bulk",), ("gift",)]
+
+    def test_get_and_drop_index(self, orders):
+        index = Index("tags", IndexType.MULTIKEY)
+        orders.create_index(index)
+        assert orders.get_indexes()[1] == index
+        # Loaded when the collection is opened
+        database = Database("test_db")
+        assert database.test_collection._multikeys == {"tags": index.name}
+        database.close()
+        orders.sync_indexes(orders.get_indexes())
+        orders.drop_index(index)
+        assert len(orders.get_indexes()) == 1
+        assert orders._multikeys == {}
+        assert find_ids(orders, Contains("tags", "gift")) == [1, 2]
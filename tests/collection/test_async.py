@@ -0,0 +1,138 @@
+import asyncio
+from sqlite3 import IntegrityError
+
+import pytest
+
+from bosc.aio import AsyncDatabase
+from bosc.bulk import DeleteOne, InsertOne
+from bosc.collection import OnConflict
+from bosc.query.aggregate import Sum
+from bosc.query.find.comparison import Eq, Gt
+from bosc.query.update.values import Set
+
+
+@pytest.fixture
+def async_collection(db):
+    return AsyncDatabase(db).test_collection
+
+
+class TestAsyncCollection:
+    def test_insert_and_find(self, async_collection):
+        async def main():
+            await async_collection.insert({"name": "John", "age": 25})
+            await async_collection.insert_many(
+                [{"name": "Jane", "age": 30}, {"name": "Joe", "age": 35}]
+            )
+            assert await async_collection.count() == 3
+            result = await async_collection.find(Gt("age", 25))
+            assert [doc["name"] for doc in result] == ["Jane", "Joe"]
+            result = await async_collection.find_one(Eq("name", "John"))
+            assert result["age"] == 25
+            assert await async_collection.get(result["id"]) == result
+            assert await async_collection.get_many([result["id"]]) == [result]
+            page, token = await async_collection.find_page(order_by="age")
+            assert [doc["age"] for doc in page] == [25, 30, 35]
+            assert token is None
+            result = await async_collection.aggregate(
+                accumulators={"total": Sum("age")}
+            )
+            assert result == [{"total": 90}]
+
+        asyncio.run(main())
+
+    def test_concurrent_inserts_are_batched(self, async_collection):
+        async def main():
+            return await asyncio.gather(
+                *[
+                    async_collection.insert({"id": i, "name": "John"})
+                    for i in range(50)
+                ]
+            )
+
+        result = asyncio.run(main())
+        assert [doc["id"] for doc in result] == list(range(50))
+        assert async_collection.get_collection().count() == 50
+
+    def test_concurrent_insert_conflicts(self, async_collection):
+        async_collection.get_collection().insert({"id": 1, "name": "John"})
+
+        async def main():
+            return await asyncio.gather(
+                async_collection.insert({"id": 1, "name": "Jane"}),
+                async_collection.insert({"id": 2, "name": "Jane"}),
+                async_collection.insert(
+                    {"id": 1, "name": "Jane"}, OnConflict.IGNORE
+                ),
+                async_collection.insert(
+                    {"id": 3, "name": "Jane"}, OnConflict.IGNORE
+                ),
+                return_exceptions=True,
+            )
+
+        result = asyncio.run(main())
+        assert isinstance(result[0], IntegrityError)
+        assert result[1]["id"] == 2
+        assert result[2]["name"] == "John"
+        assert result[3]["name"] == "Jane"
+        assert async_collection.get_collection().count() == 3
+
+    def test_update_and_delete(self, async_collection):
+        async def main():
+            await async_collection.insert({"name": "John", "age": 25})
+            await async_collection.insert({"name": "John", "age": 30})
+            await async_collection.update(Eq("name", "John"), Set("age", 40))
+            assert await async_collection.count(Eq("age", 40)) == 2
+            document = await async_collection.find_one_and_update(
+                Eq("age", 40), Set("age", 50), return_new=False
+            )
+            assert document["age"] == 40
+            deleted = await async_collection.find_one_and_delete(Eq("age", 50))
+            assert deleted["id"] == document["id"]
+            result = await async_collection.bulk_write(
+                [InsertOne({"id": 1}), DeleteOne(Eq("id", 1))]
+            )
+            assert result.counts == [1, 1]
+            assert await async_collection.count() == 1
+            await async_collection.delete()
+            assert await async_collection.count() == 0
+
+        asyncio.run(main())
+
+    def test_iter_find(self, async_collection):
+        async_collection.get_collection().insert_many(
+            [{"id": i, "age": i} for i in range(25)]
+        )
+
+        async def main():
+            ages = []
+            async for doc in async_collection.iter_find(
+                Gt("age", 4), order_by="age", batch_size=7
+            ):
+                ages.append(doc["age"])
+            first = None
+            async for doc in async_collection.iter_find(batch_size=7):
+                first = doc
+                break
+            return ages, first
+
+        ages, first = asyncio.run(main())
+        assert ages == list(range(5, 25))
+        assert first["id"] == 0
+
+    def test_iter_find_in_memory(self):
+        database = AsyncDatabase(":memory:", pool_size=2)
+        collection = database.test_collection
+
+        async def main():
+            await collection.insert_many([{"id": i} for i in range(10)])
+            ids = []
+            async for doc in collection.iter_find(batch_size=3):
+                ids.append(doc["id"])
+                await collection.update(Eq("id", doc["id"]), Set("seen", 1))
+                if len(ids) == 5:
+                    break
+            assert await collection.count(Eq("seen", 1)) == 5
+            await database.close()
+            return ids
+
+        assert asyncio.run(main()) == [0, 1, 2, 3, 4]
@@ -0,0 +1,113 @@
+from sqlite3 import IntegrityError
+
+import pytest
+
+from bosc.bulk import (
+    BulkWriteResult,
+    DeleteMany,
+    DeleteOne,
+    InsertOne,
+    ReplaceOne,
+    UpdateMany,
+    UpdateOne,
+)
+from bosc.query.find.comparison import Eq, Gt
+from bosc.query.update.values import Inc, Set
+
+
+@pytest.fixture
+def stored(collection):
+    collection.insert_many(
+        [{"id": number, "group": number % 2, "n": 0} for number in range(6)]
+    )
+    return collection
+
+
+class TestBulkWrite:
+    def test_mixed_operations(self, stored):
+        result = stored.bulk_write(
+            [
+                InsertOne({"id": 10, "group": 0, "n": 0}),
+                InsertOne({"id": 11, "group": 1, "n": 0}),
+                UpdateOne(Eq("id", 1), Inc("n", 5)),
+                UpdateMany(Eq("group", 0), Set("n", 1)),
+                ReplaceOne({"id": 2, "name": "two"}),
+                ReplaceOne({"id": 12, "name": "twelve"}),
+                ReplaceOne({"id": 13}, upsert=False),
+                DeleteOne(Eq("id", 3)),
+                DeleteMany(Gt("n", 4)),
+                UpdateOne(Eq("id", 100), Inc("n")),
+            ]
+        )
+        assert result == BulkWriteResult(
+            counts=[1, 1, 1, 4, 1, 1, 0, 1, 1, 0],
+            inserted_count=2,
+            updated_count=6,
+            deleted_count=2,
+            upserted_count=1,
+        )
+        documents = {document["id"]: document for document in stored.find()}
+        assert sorted(documents) == [0, 2, 4, 5, 10, 11, 12]
+        assert documents[2] == {"id": 2, "name": "two"}
+        assert documents[10]["n"] == 1
+        assert documents[11]["n"] == 0
+
+    def test_upserts(self, stored):
+        operations = [
+            ReplaceOne({"id": 0, "n": 1}),
+            ReplaceOne({"id": 20, "n": 1}),
+            ReplaceOne({"id": 20, "n": 2}),
+            ReplaceOne({"id": 21}, upsert=False),
+        ]
+        result = stored.bulk_write(operations)
+        assert result == BulkWriteResult(
+            counts=[1, 1, 1, 0], updated_count=2, upserted_count=1
+        )
+        assert stored.get(20) == {"id": 20, "n": 2}
+        result = stored.bulk_write(operations[:2], ordered=False)
+        assert (result.updated_count, result.upserted_count) == (2, 0)
+
+    def test_ordered(self, stored):
+        operations = [
+            UpdateOne(Eq("id", 0), Set("n", 1)),
+            DeleteMany(Eq("n", 1)),
+            UpdateOne(Eq("id", 2), Set("n", 1)),
+        ]
+        result = stored.bulk_write(operations)
+        assert result.counts == [1, 1, 1]
+        assert stored.count(Eq("n", 1)) == 1
+
+    def test_unordered_groups_statements(self, stored, conn):
+        statements = []
+        stored.connection.set_trace_callback(statements.append)
+        operations = [
+            UpdateOne(Eq("id", 0), Set("n", 1)),
+            DeleteMany(Eq("n", 1)),
+            UpdateOne(Eq("id", 2), Set("n", 1)),
+        ]
+        result = stored.bulk_write(operations, ordered=False)
+        stored.connection.set_trace_callback(None)
+        assert result.counts == [1, 2, 1]
+        assert stored.count() == 4
+        assert [sql.split()[0] for sql in statements] == [
+            "BEGIN",
+            "UPDATE",
+            "UPDATE",
+            "DELETE",
+            "COMMIT",
+        ]
+
+    def test_error_rolls_back(self, stored):
+        with pytest.raises(IntegrityError):
+            stored.bulk_write(
+                [
+                    InsertOne({"id": 20}),
+                    UpdateMany(None, Set("n", 1)),
+                    InsertOne({"id": 0}),
+                ]
+            )
+        assert stored.get(20) is None
+        assert stored.count(Eq("n", 1)) == 0
+
+    def test_empty(self, stored):
+        assert stored.bulk_write([]) == BulkWriteResult()
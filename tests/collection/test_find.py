@@ -1,4 +1,12 @@
+import json
+import sqlite3
+
+import pytest
+
+from bosc import collection as collection_module
 from bosc.collection import OrderDirection
+from bosc.database import Database
+from bosc.query.base import Query
 from bosc.query.find.comparison import Eq, Gt, Gte, In, Lt, Lte, Neq, Nin
 from bosc.query.find.logical import And, Or
 
@@ -172,3 +180,240 @@ class TestFindOne:
         result = collection.find(Eq("name", "John"), limit=1, offset=1)
         assert len(result) == 1
         assert result[0]["age"] == 40
+
+    def test_none(self, collection, documents):
+        collection.insert({"name": None})
+        collection.insert({"age": 1})
+        assert collection.count(Eq("name", None)) == 2
+        assert collection.count(Neq("name", None)) == 5
+        assert collection.count(Eq("name", "John")) == 2
+
+
+class TestGetMany:
+    def test_get_many(self, collection, documents):
+        ids = [documents[3]["id"], "missing", documents[0]["id"]]
+        assert collection.get_many(ids) == [documents[3], None, documents[0]]
+        assert collection.get_many([]) == []
+        raw = collection.get_many(ids[:2], raw=True)
+        assert json.loads(raw[0]) == documents[3]
+        assert raw[1] is None
+
+    def test_chunks(self, collection, monkeypatch):
+        monkeypatch.setattr(collection_module, "GET_MANY_CHUNK_SIZE", 2)
+        collection.insert_many([{"id": i} for i in range(5)])
+        result = collection.get_many([4, 3, 2, 1, 0, 5, 4])
+        assert result == [{"id": i} for i in (4, 3, 2, 1, 0)] + [
+            None,
+            {"id": 4},
+        ]
+
+
+class TestFindPage:
+    def walk(self, collection, **kwargs):
+        pages, token = [], None
+        while True:
+            page, token = collection.find_page(after=token, **kwargs)
+            pages.append([doc["name"] for doc in page])
+            if token is None:
+                return pages
+
+    def test_pages(self, collection, documents):
+        assert self.walk(collection, order_by="age", limit=2) == [
+            ["Jane", "John"],
+            ["Linda", "Joe"],
+            ["John"],
+        ]
+        assert self.walk(collection, limit=5) == [
+            ["John", "Jane", "Joe", "John", "Linda"]
+        ]
+
+    def test_query_and_direction(self, collection, documents):
+        pages = self.walk(
+            collection,
+            query=Neq("name", "Joe"),
+            order_by=["name", "age"],
+            order_direction=OrderDirection.DESC,
+            limit=2,
+        )
+        assert pages == [["Linda", "John"], ["John", "Jane"]]
+        page, _ = collection.find_page(order_by="age", limit=1, raw=True)
+        assert json.loads(page[0])["name"] == "Jane"
+
+    def test_missing_sort_keys(self, collection):
+        collection.insert_many(
+            [{"name": "A", "age": 2}, {"name": "B"}, {"name": "C", "age": 1}]
+            + [{"name": "D"}, {"name": "E", "age": 2}]
+        )
+        for direction, expected in (
+            ("ASC", ["B", "D", "C", "A", "E"]),
+            ("DESC", ["E", "A", "C", "D", "B"]),
+        ):
+            pages = self.walk(
+                collection, order_by="age", order_direction=direction, limit=1
+            )
+            assert [name for page in pages for name in page] == expected
+
+    def test_invalid_token(self, collection, documents):
+        _, token = collection.find_page(order_by="age", limit=1)
+        with pytest.raises(ValueError):
+            collection.find_page(order_by="name", after=token)
+        with pytest.raises(ValueError):
+            collection.find_page(order_by="age", after="not a token")
+
+    @pytest.mark.parametrize("limit", [0, -1])
+    def test_invalid_limit(self, collection, documents, limit):
+        with pytest.raises(ValueError):
+            collection.find_page(order_by="age", limit=limit)
+
+
+class TestProjection:
+    def test_find(self, collection, documents):
+        result = collection.find(
+            Eq("name", "John"), projection=["name", "address"]
+        )
+        assert (
+            result
+            == [
+                {
+                    "name": "John",
+                    "address": {"city": "New York", "state": "NY"},
+                },
+            ]
+            * 2
+        )
+
+    def test_find_one_and_nested_fields(self, collection, documents):
+        result = collection.find_one(
+            Eq("name", "Jane"), projection=["id", "address.city"]
+        )
+        assert result == {
+            "id": documents[1]["id"],
+            "address.city": "Los Angeles",
+        }
+
+    def test_values_keep_their_types(self, collection):
+        collection.insert({"flag": True, "tags": ["a"], "empty": None})
+        result = collection.find_one(
+            projection=["flag", "tags", "empty", "missing"]
+        )
+        assert result == {
+            "flag": True,
+            "tags": ["a"],
+            "empty": None,
+            "missing": None,
+        }
+
+    def test_without_arrow_operator(self, collection, monkeypatch):
+        monkeypatch.setattr(sqlite3, "sqlite_version_info", (3, 37, 0))
+        collection.insert({"flag": False, "tags": ["a"], "name": "John"})
+        result = collection.find_one(projection=["flag", "tags", "name"])
+        assert result == {"flag": False, "tags": ["a"], "name": "John"}
+
+    def test_raw_and_iter_find(self, collection, documents):
+        raw = collection.find(order_by="age", projection=["age"], raw=True)
+        assert [json.loads(doc) for doc in raw] == [
+            {"age": age} for age in (22, 25, 27, 30, 40)
+        ]
+        result = collection.iter_find(
+            order_by="age", projection=["age"], batch_size=2
+        )
+        assert [doc["age"] for doc in result] == [22, 25, 27, 30, 40]
+
+    def test_projection_is_part_of_the_statement_key(
+        self, collection, documents
+    ):
+        collection.find(projection=["name"])
+        collection.find(projection=["age"])
+        collection.find()
+        assert len(collection._statements) == 3
+
+
+class TestStatementCache:
+    def test_same_shape_reuses_sql(self, collection, documents):
+        assert collection.find(Eq("name", "John"), limit=1) == documents[:1]
+        assert len(collection._statements) == 1
+        result = collection.find(Eq("name", "Jane"), offset=0, limit=5)
+        assert result == [documents[1]]
+        assert len(collection._statements) == 1
+        assert collection.find(Eq("age", 22), limit=5) == [documents[1]]
+        assert len(collection._statements) == 2
+
+    def test_limit_and_offset_are_parameters(self, collection, documents):
+        sql, params = collection._find_sql(
+            Gt("age", 25), "age", OrderDirection.DESC, 1, 2
+        )
+        assert "?" in sql.split("LIMIT")[1]
+        assert params == [25, 2, 1]
+        result = collection.find(offset=3)
+        assert result == documents[3:]
+        result = collection.find(Gt("age", 25), "age", "DESC", 1, 2)
+        assert [doc["age"] for doc in result] == [30, 27]
+
+    def test_shapes(self):
+        assert Eq("a", 1).shape() == Eq("a", 2).shape()
+        assert Eq("a", 1).shape() != Neq("a", 1).shape()
+        assert In("a", [1, 2]).shape() != In("a", [1]).shape()
+        query = And(Eq("a", 1), Or(Gt("b", 2), Lt("b", 0)))
+        assert query.params() == query.to_sql()[1] == [1, 2, 0]
+
+    def test_unknown_shape_is_not_cached(self, collection, documents):
+        class Custom(Query):
+            def to_sql(self):
+                return "json_extract(data, '$.age') > ?", [26]
+
+        assert collection.count(Custom()) == 3
+        assert collection.count(And(Custom(), Eq("name", "John"))) == 1
+        assert collection._statements == {}
+
+
+class TestIterFind:
+    def test_iter_find(self, collection, documents):
+        result = collection.iter_find(Eq("name", "John"), batch_size=1)
+        assert not isinstance(result, list)
+        result = list(result)
+        assert len(result) == 2
+        assert result[0]["age"] == 25
+        assert result[1]["age"] == 40
+
+    def test_iter_find_order_limit_offset(self, collection, documents):
+        result = collection.iter_find(
+            order_by="age",
+            order_direction=OrderDirection.DESC,
+            offset=1,
+            limit=3,
+            batch_size=2,
+        )
+        assert [doc["age"] for doc in result] == [30, 27, 25]
+
+    def test_iter_find_break_releases_connection(self, documents):
+        db = Database("test_db", pool_size=1)
+        collection = db.test_collection
+        for doc in collection.iter_find(batch_size=2):
+            break
+        # With a single reader connection this would block if the cursor
+        # of the abandoned iteration still held it.
+        assert collection.count() == 5
+        db.close()
+
+
+class TestRaw:
+    def test_find_raw(self, collection, documents):
+        result = collection.find(Eq("name", "John"), raw=True)
+        assert len(result) == 2
+        assert all(isinstance(doc, str) for doc in result)
+        assert [json.loads(doc) for doc in result] == collection.find(
+            Eq("name", "John")
+        )
+
+    def test_find_one_raw(self, collection, documents):
+        result = collection.find_one(Eq("name", "Jane"), raw=True)
+        assert json.loads(result) == collection.find_one(Eq("name", "Jane"))
+        assert collection.find_one(Eq("name", "Nobody"), raw=True) is None
+
+    def test_get_raw(self, collection, documents):
+        result = collection.get(documents[0]["id"], raw=True)
+        assert json.loads(result) == documents[0]
+
+    def test_iter_find_raw(self, collection, documents):
+        result = list(collection.iter_find(raw=True, batch_size=2))
+        assert [json.loads(doc) for doc in result] == collection.find()
@@ -0,0 +1,124 @@
+import pytest
+
+from bosc.collection import OnConflict, OrderDirection
+from bosc.index import Index, IndexType
+from bosc.query.find.comparison import Eq, Gt
+from bosc.query.find.fulltext import Match
+from bosc.query.find.logical import And, Or
+from bosc.query.update.values import Set
+
+FIELDS = ["title", "meta.body"]
+
+
+@pytest.fixture
+def articles(collection):
+    collection.insert_many(
+        [
+            {
+                "id": 1,
+                "title": "Python tips",
+                "meta": {"body": "Faster loops and comprehensions"},
+                "views": 10,
+            },
+            {
+                "id": 2,
+                "title": "Rust for Python developers",
+                "meta": {"body": "Python bindings with Python tooling"},
+                "views": 30,
+            },
+            {
+                "id": 3,
+                "title": "SQLite internals",
+                "meta": {"body": "Pages, cursors and the btree"},
+                "views": 20,
+            },
+        ]
+    )
+    collection.create_index(Index(FIELDS, IndexType.FULLTEXT))
+    return collection
+
+
+def ids(documents):
+    return [document["id"] for document in documents]
+
+
+def integrity_check(collection):
+    name = Index(FIELDS, IndexType.FULLTEXT).name
+    collection.connection.execute(
+        f"""INSERT INTO "{name}"("{name}") VALUES ('integrity-check')"""
+    )
+
+
+class TestFulltext:
+    def test_create_indexes_existing_documents(self, articles):
+        assert sorted(ids(articles.find(Match(FIELDS, "python")))) == [1, 2]
+        assert ids(articles.find(Match(FIELDS, "btree"))) == [3]
+        assert articles.count(Match(FIELDS, "java")) == 0
+
+    def test_get_indexes(self, articles):
+        indexes = articles.get_indexes()
+        assert indexes[1] == Index(FIELDS, IndexType.FULLTEXT)
+        assert indexes[1].name.startswith("idx_fulltext_title_meta_body_")
+        assert indexes[1].value == ("title", "meta.body")
+        articles.sync_indexes(indexes)
+        assert articles.get_indexes() == indexes
+
+    def test_partial_is_rejected(self):
+        with pytest.raises(ValueError):
+            Index(FIELDS, IndexType.FULLTEXT, where=Gt("views", 1))
+
+    def test_index_on_another_collection(self, articles, db):
+        with pytest.raises(ValueError):
+            db.other_collection.create_index(Index(FIELDS, IndexType.FULLTEXT))
+
+    def test_sync_on_writes(self, articles):
+        articles.insert({"id": 4, "title": "Go", "meta": {"body": "python"}})
+        articles.update(Eq("id", 1), Set("title", "Loops"))
+        articles.delete(Eq("id", 2))
+        articles.insert(
+            {"id": 3, "title": "Python internals", "meta": {"body": ""}},
+            OnConflict.REPLACE,
+        )
+        assert sorted(ids(articles.find(Match(FIELDS, "python")))) == [3, 4]
+        assert articles.count(Match(FIELDS, "btree")) == 0
+        assert ids(articles.find(Match(FIELDS, "loops"))) == [1]
+        integrity_check(articles)
+
+    def test_column_filter(self, articles):
+        found = articles.find(Match(FIELDS, '"meta.body" : python'))
+        assert ids(found) == [2]
+
+    def test_and_or(self, articles):
+        found = articles.find(And(Match(FIELDS, "python"), Gt("views", 20)))
+        assert ids(found) == [2]
+        found = articles.find(
+            Or(Match(FIELDS, "btree"), Eq("id", 1)), order_by="id"
+        )
+        assert ids(found) == [1, 3]
+
+    def test_order_by_rank(self, articles):
+        match = Match(FIELDS, "python")
+        assert ids(articles.find(order_by=match)) == [2, 1]
+        found = articles.find(
+            order_by=match, order_direction=OrderDirection.DESC
+        )
+        assert ids(found) == [1, 2]
+        found = articles.find(Gt("views", 0), order_by=match, limit=1)
+        assert ids(found) == [2]
+        assert articles.find_one(Eq("id", 1), order_by=match)["id"] == 1
+
+    def test_drop_index(self, articles, conn):
+        articles.drop_index(Index(FIELDS, IndexType.FULLTEXT))
+        assert len(articles.get_indexes()) == 1
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE name LIKE 'idx_fulltext%'"
+        )
+        assert cursor.fetchall() == []
+        articles.insert({"id": 5, "title": "Python"})
+
+    def test_drop_collection(self, articles, db, conn):
+        db.drop_collection(articles.collection_name)
+        cursor = conn.cursor()
+        cursor.execute("SELECT name FROM sqlite_master WHERE type != 'index'")
+        assert cursor.fetchall() == []
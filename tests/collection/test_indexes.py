@@ -1,4 +1,11 @@
+import pytest
+
+from bosc.collection import OrderDirection
+from bosc.database import Database
 from bosc.index import Index, IndexType
+from bosc.query.find.comparison import Eq, Gt, In, Neq
+from bosc.query.find.logical import And
+from bosc.query.update.values import Inc
 
 
 class TestIndexes:
@@ -26,14 +33,14 @@ class TestIndexes:
         collection.drop_index("idx_path_address_city")
         indxes = collection.get_indexes()
         assert len(indxes) == 1
-        assert indxes[0].name == "idx_unique_id"
+        assert indxes[0].name == "idx_test_collection_unique_id"
 
         get_index_sql = "SELECT sql FROM sqlite_master WHERE type='index'"
         cursor = conn.cursor()
         cursor.execute(get_index_sql)
         result = cursor.fetchall()
         assert result[0] == (
-            """CREATE UNIQUE INDEX "idx_unique_id" ON "test_collection" (json_extract(data, '$.id'))""",
+            """CREATE UNIQUE INDEX "idx_test_collection_unique_id" ON "test_collection" (doc_id)""",
         )
 
     def test_drop_index_by_index(self, collection, conn):
@@ -49,14 +56,14 @@ class TestIndexes:
         )
         indxes = collection.get_indexes()
         assert len(indxes) == 1
-        assert indxes[0].name == "idx_unique_id"
+        assert indxes[0].name == "idx_test_collection_unique_id"
 
         get_index_sql = "SELECT sql FROM sqlite_master WHERE type='index'"
         cursor = conn.cursor()
         cursor.execute(get_index_sql)
         result = cursor.fetchall()
         assert result[0] == (
-            """CREATE UNIQUE INDEX "idx_unique_id" ON "test_collection" (json_extract(data, '$.id'))""",
+            """CREATE UNIQUE INDEX "idx_test_collection_unique_id" ON "test_collection" (doc_id)""",
         )
 
     def test_sync_indexes(self, collection, conn):
@@ -90,4 +97,163 @@ class TestIndexes:
         assert len(indxes) == 3
         assert indxes[0].name == "idx_path_address_city"
         assert indxes[1].name == "idx_path_age"
-        assert indxes[2].name == "idx_unique_id"
+        assert indxes[2].name == "idx_test_collection_unique_id"
+
+
+class TestColumnIndexes:
+    def test_create_and_drop(self, collection, conn, documents):
+        index = Index("address.city", IndexType.COLUMN)
+        collection.create_index(index)
+        indexes = collection.get_indexes()
+        assert indexes[0].name == "idx_column_address_city"
+        assert indexes[0] == index
+
+        cursor = conn.cursor()
+        cursor.execute(
+            'SELECT "$.address.city" FROM test_collection ORDER BY id'
+        )
+        assert [row[0] for row in cursor.fetchall()] == [
+            doc["address"]["city"] for doc in documents
+        ]
+
+        collection.drop_index(index)
+        assert collection.get_indexes() == [Index("id", IndexType.UNIQUE)]
+        cursor.execute("PRAGMA table_xinfo(test_collection)")
+        assert [row[1] for row in cursor.fetchall()] == [
+            "id",
+            "doc_id",
+            "data",
+        ]
+
+    def test_queries_use_the_column(self, collection, documents):
+        collection.find(Gt("age", 25), order_by="age")
+        collection.create_index(Index("age", IndexType.COLUMN))
+        # Statements compiled before the column existed are forgotten
+        assert collection._statements == {}
+
+        sql, _ = collection._find_sql(Gt("age", 25), "age", "ASC", None, None)
+        assert sql == (
+            'SELECT data FROM test_collection WHERE test_collection."$.age" > ? '
+            'ORDER BY test_collection."$.age" ASC'
+        )
+        plan = collection.connection.execute(
+            f"EXPLAIN QUERY PLAN {sql}", [25]
+        ).fetchall()
+        assert "idx_column_age" in plan[0][3]
+        result = collection.find(Gt("age", 25), order_by="age")
+        assert [doc["age"] for doc in result] == [27, 30, 40]
+        collection.update(Gt("age", 25), Inc("age"))
+        assert collection.count(Gt("age", 40)) == 1
+
+    def test_sync_and_other_connections(self, db, collection, documents):
+        indexes = [
+            Index("id", IndexType.UNIQUE),
+            Index("name", IndexType.COLUMN),
+        ]
+        collection.sync_indexes(indexes)
+        collection.sync_indexes(indexes)
+        assert collection.get_indexes() == [indexes[1], indexes[0]]
+
+        other = Database("test_db")
+        other_collection = other.test_collection
+        assert other_collection._columns == {"name": '"$.name"'}
+        other_collection.drop_index("idx_column_name")
+        other.close()
+
+        # The dropped column is noticed through the schema version
+        assert db.test_collection._columns == {}
+        assert len(db.test_collection.find(Eq("name", "John"))) == 2
+
+    def test_id_has_its_own_column(self, collection):
+        with pytest.raises(ValueError):
+            collection.create_index(Index("id", IndexType.COLUMN))
+
+
+class TestCompoundAndPartialIndexes:
+    def test_compound_index(self, collection):
+        index = Index(["name", ("age", OrderDirection.DESC)])
+        assert index.name.startswith("idx_path_name_age_desc_")
+        collection.create_index(index)
+        assert collection.get_indexes()[0] == index
+        assert collection.get_indexes()[0].value == ("name", "age")
+
+        sql, _ = collection._find_sql(
+            And(Eq("name", "John"), Gt("age", 25)), "age", "DESC", None, 10
+        )
+        plan = collection.connection.execute(
+            f"EXPLAIN QUERY PLAN {sql}", ["John", 25, 10]
+        ).fetchall()
+        assert [row[3] for row in plan] == [
+            f"SEARCH test_collection USING INDEX {index.name} "
+            "(<expr>=? AND <expr>>?)"
+        ]
+
+    @pytest.mark.parametrize("index_type", [IndexType.PATH, IndexType.COLUMN])
+    def test_compound_and_nested_names(self, collection, index_type):
+        indexes = [
+            Index(["a", "b"], index_type),
+            Index("a.b", index_type),
+            Index([("a", "DESC")], index_type),
+            Index("a_desc", index_type),
+        ]
+        assert indexes[1].name == f"idx_{index_type.value}_a_b"
+        for index in indexes:
+            collection.create_index(index)
+        # With the id index
+        assert len(collection.get_indexes()) == 5
+        indexes.append(Index("id", IndexType.UNIQUE))
+        collection.sync_indexes(indexes)
+        created = collection.get_indexes()
+        assert len(created) == 5
+        assert all(index in created for index in indexes)
+
+    def test_partial_index(self, collection, documents):
+        collection.insert({"name": "Sam", "coupon": "it's (free)"})
+        index = Index("coupon", where=Neq("coupon", None))
+        collection.create_index(index)
+        assert collection.get_indexes()[0] == index
+
+        sql, _ = collection._find_sql(
+            Eq("coupon", "x"), None, "ASC", None, None
+        )
+        plan = collection.connection.execute(
+            f"EXPLAIN QUERY PLAN {sql}", ["x"]
+        ).fetchall()
+        assert index.name in plan[0][3]
+        assert collection.find(Eq("coupon", "it's (free)"))[0]["name"] == "Sam"
+
+    def test_where_literals(self, collection, documents):
+        index = Index(
+            ["address.state", "id"],
+            IndexType.UNIQUE,
+            where=And(Eq("name", "it's"), In("age", [1, 2.5]), Gt("x", True)),
+        )
+        assert index.where_sql() == (
+            "(json_extract(data, '$.name') = 'it''s') AND "
+            "(json_extract(data, '$.age') IN (1, 2.5)) AND "
+            "(json_extract(data, '$.x') > 1)"
+        )
+        collection.create_index(index)
+        [_, created] = collection.get_indexes()
+        assert created == index
+        assert created.where == index.where_sql()
+
+    def test_sync_indexes(self, collection):
+        indexes = [
+            Index("id", IndexType.UNIQUE),
+            Index(["name", "age"], where=Gt("age", 18)),
+            Index(["name", "age"], where=Gt("age", 21)),
+            Index(["age", "name"], IndexType.COLUMN),
+        ]
+        collection.sync_indexes(indexes)
+        assert len({index.name for index in indexes}) == 4
+        assert sorted(
+            collection.get_indexes(), key=lambda i: i.name
+        ) == sorted(indexes, key=lambda i: i.name)
+        collection.sync_indexes(indexes[:1])
+        assert collection.get_indexes() == indexes[:1]
+        assert collection._columns == {}
+
+    def test_invalid_direction(self):
+        with pytest.raises(ValueError):
+            Index([("name", "up")])
@@ -1,9 +1,13 @@
-from sqlite3 import IntegrityError
+import json
+import uuid
+from sqlite3 import IntegrityError, OperationalError
 
 import pytest
 
 from bosc.collection import OnConflict
-from bosc.query.find.comparison import Eq
+from bosc.database import Database
+from bosc.index import Index, IndexType
+from bosc.query.find.comparison import Eq, In, Neq, Nin
 
 
 class TestInsert:
@@ -154,3 +158,200 @@ class TestInsertMany:
                 ],
                 on_conflict=OnConflict.RAISE,
             )
+
+
+class TestUpsertMany:
+    KEY = ("source", "external_id")
+
+    @pytest.fixture
+    def records(self, collection):
+        collection.create_index(Index(self.KEY, IndexType.UNIQUE))
+        collection.insert_many(
+            [
+                {
+                    "id": 1,
+                    "source": "a",
+                    "external_id": 1,
+                    "meta": {"x": 1, "y": 1},
+                    "tags": [1],
+                },
+                {"id": 2, "source": "b", "external_id": 1, "name": "old"},
+            ]
+        )
+        return collection
+
+    def test_merge(self, records):
+        records.upsert_many(
+            [
+                {
+                    "id": 10,
+                    "source": "a",
+                    "external_id": 1,
+                    "meta": {"y": 2, "z": 3},
+                    "tags": [2],
+                },
+                {"source": "b", "external_id": 1, "name": None, "new": 1},
+                {"id": 3, "source": "a", "external_id": 2},
+            ],
+            key=self.KEY,
+        )
+        assert records.find(order_by="id") == [
+            {
+                "id": 1,
+                "source": "a",
+                "external_id": 1,
+                "meta": {"x": 1, "y": 2, "z": 3},
+                "tags": [2],
+            },
+            {"id": 2, "source": "b", "external_id": 1, "new": 1},
+            {"id": 3, "source": "a", "external_id": 2},
+        ]
+        assert records.get(10) is None
+
+    def test_replace(self, records):
+        records.upsert_many(
+            [{"source": "b", "external_id": 1, "value": 1}],
+            key=self.KEY,
+            merge=False,
+        )
+        assert records.get(2) == {
+            "source": "b",
+            "external_id": 1,
+            "value": 1,
+            "id": 2,
+        }
+        assert records.count() == 2
+
+    def test_upsert_on_id(self, records):
+        records.upsert_many([{"id": 2, "name": "new"}], key="id")
+        assert records.get(2)["name"] == "new"
+        assert records.get(2)["source"] == "b"
+
+    def test_key_needs_unique_index(self, records):
+        with pytest.raises(OperationalError):
+            records.upsert_many([{"name": "x"}], key="name")
+        with pytest.raises(ValueError):
+            records.upsert_many([{"name": "x"}], key=[])
+        with pytest.raises(IntegrityError):
+            records.upsert_many(
+                [{"id": 1, "source": "c", "external_id": 1}], key=self.KEY
+            )
+        assert records.count() == 2
+
+
+class TestLoad:
+    def test_load_iterable(self, collection):
+        progress = []
+        documents = (
+            {"id": number, "n": number} if number % 2 else f'{{"n": {number}}}'
+            for number in range(10)
+        )
+        loaded = collection.load(
+            documents,
+            chunk_size=4,
+            progress=lambda count, _: progress.append(count),
+        )
+        assert loaded == 10
+        assert progress == [4, 8, 10]
+        assert collection.get(3) == {"id": 3, "n": 3}
+        assert collection.count(Eq("n", 4)) == 1
+
+    def test_load_jsonl(self, collection, tmp_path):
+        path = tmp_path / "documents.jsonl"
+        path.write_text('{"id": 1, "n": 1}\n\n{"id": 2, "n": 2}\n')
+        assert collection.load(path) == 2
+        path.write_text('{"id": 1, "n": 10}\n{"id": 3, "n": 3}\n')
+        loaded = collection.load(str(path), on_conflict=OnConflict.IGNORE)
+        assert loaded == 1
+        assert collection.get(1)["n"] == 1
+        assert collection.count() == 3
+
+    def test_error_rolls_back(self, collection):
+        with pytest.raises(ValueError):
+            collection.load([{"id": 1}, "[]"], chunk_size=1)
+        with pytest.raises(IntegrityError):
+            collection.load([{"id": 2}, {"id": 2}], chunk_size=1)
+        with pytest.raises(ValueError):
+            collection.load([], chunk_size=0)
+        assert collection.count() == 0
+
+
+class TestIdColumn:
+    def test_uuid_ids(self, collection):
+        document = collection.insert({"name": "John"})
+        hyphenated = str(uuid.UUID(document["id"]))
+        assert collection.get(hyphenated) == document
+        assert collection.count(In("id", [document["id"], "other"])) == 1
+        assert collection.count(Nin("id", [hyphenated])) == 0
+        assert collection.count(Neq("id", 1)) == 1
+
+    def test_insert_many_assigns_ids(self, collection):
+        documents = [{"name": "John"}, {"id": 1, "name": "Jane"}]
+        collection.insert_many(documents)
+        assert collection.get(documents[0]["id"])["name"] == "John"
+        assert collection.get(1)["name"] == "Jane"
+        assert collection.get("1") is None
+
+    def test_id_index_per_collection(self, db):
+        first, second = db.first_collection, db.second_collection
+        for collection in (first, second):
+            assert [index.name for index in collection.get_indexes()] == [
+                f"idx_{collection.collection_name}_unique_id"
+            ]
+            collection.insert({"id": 1, "n": 1})
+            with pytest.raises(IntegrityError):
+                collection.insert({"id": 1})
+            collection.insert({"id": 1, "n": 2}, OnConflict.REPLACE)
+            collection.upsert_many([{"id": 1, "m": 3}], key="id")
+            assert collection.find() == [{"id": 1, "n": 2, "m": 3}]
+            sql, params = collection._find_sql(
+                Eq("id", 1), None, "ASC", None, 1
+            )
+            plan = collection.connection.execute(
+                f"EXPLAIN QUERY PLAN {sql}", params
+            ).fetchall()
+            assert "USING INDEX" in plan[0][3]
+
+    def test_rename_legacy_id_index(self, db, conn):
+        conn.execute(
+            "CREATE TABLE old_collection (id INTEGER PRIMARY KEY, doc_id, data JSON)"
+        )
+        conn.execute(
+            'CREATE UNIQUE INDEX "idx_unique_id" ON "old_collection" (doc_id)'
+        )
+        conn.commit()
+        indexes = db.old_collection.get_indexes()
+        assert [index.name for index in indexes] == [
+            "idx_old_collection_unique_id"
+        ]
+        legacy = conn.execute(
+            "SELECT name FROM sqlite_master WHERE name = 'idx_unique_id'"
+        ).fetchall()
+        assert legacy == []
+
+    def test_migrate_id_column(self, db, conn):
+        document_id = uuid.uuid4().hex
+        conn.execute(
+            "CREATE TABLE old_collection (id INTEGER PRIMARY KEY, data JSON)"
+        )
+        conn.execute(
+            'CREATE UNIQUE INDEX "idx_unique_id" ON "old_collection" '
+            "(json_extract(data, '$.id'))"
+        )
+        conn.executemany(
+            "INSERT INTO old_collection (data) VALUES (json(?))",
+            [
+                (json.dumps({"id": document_id, "name": "John"}),),
+                (json.dumps({"id": 1, "name": "Jane"}),),
+            ],
+        )
+        conn.commit()
+
+        collection = db.old_collection
+        assert collection.get(document_id)["name"] == "John"
+        assert collection.get(1)["name"] == "Jane"
+        assert collection.get_indexes() == [Index("id", IndexType.UNIQUE)]
+        with pytest.raises(IntegrityError):
+            collection.insert({"id": 1})
+        # Opening it again doesn't migrate twice
+        assert Database("test_db").old_collection.count() == 2
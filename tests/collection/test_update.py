@@ -1,7 +1,26 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+import pytest
+
+from bosc.collection import OrderDirection
+from bosc.index import Index, IndexType
 from bosc.query.find.comparison import Eq
-from bosc.query.update.values import Inc, Now, RemoveField, Set
+from bosc.query.update.values import (
+    AddToSet,
+    Inc,
+    Max,
+    Merge,
+    Min,
+    Mul,
+    Now,
+    Pull,
+    Push,
+    RemoveField,
+    Rename,
+    Set,
+    Unset,
+)
 
 
 class TestUpdate:
@@ -113,3 +132,211 @@ class TestUpdateOne:
         assert len(result) == 1
         assert result[0]["address"]["city"] == "San Francisco"
         assert result[0]["address"]["state"] == "NY"
+
+
+class TestFindOneAndUpdate:
+    @pytest.fixture
+    def jobs(self, collection):
+        collection.insert_many(
+            [
+                {
+                    "id": number,
+                    "priority": number % 7,
+                    "status": "pending",
+                    "attempts": 0,
+                }
+                for number in range(20)
+            ]
+        )
+        return collection
+
+    def test_find_one_and_update(self, jobs):
+        job = jobs.find_one_and_update(
+            Eq("status", "pending"),
+            Set("status", "running"),
+            Inc("attempts"),
+            order_by="priority",
+            order_direction=OrderDirection.DESC,
+        )
+        assert job == {
+            "id": 6,
+            "priority": 6,
+            "status": "running",
+            "attempts": 1,
+        }
+        assert jobs.get(6) == job
+        assert jobs.count(Eq("status", "running")) == 1
+
+    def test_return_old(self, jobs):
+        jobs.create_index(Index("priority", IndexType.COLUMN))
+        job = jobs.find_one_and_update(
+            Eq("status", "pending"),
+            Set("status", "running"),
+            order_by="priority",
+            return_new=False,
+        )
+        assert job == {
+            "id": 0,
+            "priority": 0,
+            "status": "pending",
+            "attempts": 0,
+        }
+        assert jobs.get(0)["status"] == "running"
+        raw = jobs.find_one_and_update(
+            Eq("id", 0), Set("status", "done"), return_new=False, raw=True
+        )
+        assert isinstance(raw, str)
+        assert jobs.get(0)["status"] == "done"
+
+    def test_nothing_found(self, jobs):
+        for return_new in (True, False):
+            job = jobs.find_one_and_update(
+                Eq("status", "done"),
+                Set("status", "running"),
+                return_new=return_new,
+            )
+            assert job is None
+        assert jobs.find_one_and_delete(Eq("status", "done")) is None
+        assert jobs.count(Eq("status", "pending")) == 20
+
+    def test_find_one_and_delete(self, jobs):
+        job = jobs.find_one_and_delete(
+            Eq("priority", 3), order_by="id", order_direction="DESC"
+        )
+        assert job["id"] == 17
+        assert jobs.get(17) is None
+        jobs.delete_one(Eq("priority", 3))
+        assert [job["id"] for job in jobs.find(Eq("priority", 3))] == [10]
+
+    def test_concurrent_claims(self, jobs):
+        def claim(_):
+            return jobs.find_one_and_update(
+                Eq("status", "pending"),
+                Set("status", "running"),
+                order_by="priority",
+            )
+
+        with ThreadPoolExecutor(8) as executor:
+            claimed = list(executor.map(claim, range(25)))
+        ids = [job["id"] for job in claimed if job is not None]
+        assert sorted(ids) == list(range(20))
+        assert claimed.count(None) == 5
+
+
+class TestUpdateOperators:
+    def update(self, collection, *operations):
+        collection.update(Eq("id", 1), *operations)
+        return collection.get(1)
+
+    def test_push(self, collection):
+        collection.insert({"id": 1, "log": [1, True]})
+        document = self.update(collection, Push("log", {"a": 1}, "b"))
+        assert document["log"] == [1, True, {"a": 1}, "b"]
+        document = self.update(collection, Push("log", 2, max_length=3))
+        assert document["log"] == [{"a": 1}, "b", 2]
+        document = self.update(collection, Push("log", 3, max_length=3))
+        assert document["log"] == ["b", 2, 3]
+        document = self.update(collection, Push("log", 4, max_length=5))
+        assert document["log"] == ["b", 2, 3, 4]
+        document = self.update(collection, Push("new", [1]))
+        assert document["new"] == [[1]]
+
+    def test_pull_and_add_to_set(self, collection):
+        collection.insert({"id": 1, "tags": ["a", "b", "a"]})
+        document = self.update(
+            collection,
+            Pull("tags", "a"),
+            AddToSet("tags", "b"),
+            AddToSet("tags", "c"),
+            Pull("missing", "a"),
+            AddToSet("new", "a"),
+        )
+        assert document == {"id": 1, "tags": ["b", "c"], "new": ["a"]}
+
+    def test_pull_and_add_to_set_json_values(self, collection):
+        collection.insert(
+            {"id": 1, "items": [{"a": 1}, [1, 2], True, 1, "1", None]}
+        )
+        document = self.update(
+            collection,
+            Pull("items", {"a": 1}),
+            Pull("items", [1, 2]),
+            Pull("items", True),
+            Pull("items", None),
+        )
+        assert document["items"] == [1, "1"]
+        document = self.update(
+            collection,
+            AddToSet("items", True),
+            AddToSet("items", 1),
+            AddToSet("items", {"a": [1]}),
+            AddToSet("items", {"a": [1]}),
+            AddToSet("items", [None]),
+            AddToSet("items", [None]),
+        )
+        assert document["items"] == [1, "1", True, {"a": [1]}, [None]]
+        document = self.update(collection, Pull("items", 1))
+        assert document["items"] == ["1", True, {"a": [1]}, [None]]
+
+    def test_merge(self, collection):
+        collection.insert({"id": 1, "profile": {"a": 1, "b": {"c": 2}}})
+        document = self.update(
+            collection,
+            Merge({"a": None, "b": {"d": 3}}, "profile"),
+            Merge({"active": True}),
+        )
+        assert document == {
+            "id": 1,
+            "profile": {"b": {"c": 2, "d": 3}},
+            "active": True,
+        }
+
+    def test_min_max_mul(self, collection):
+        collection.insert({"id": 1, "low": 5, "high": 5, "price": 2.5})
+        document = self.update(
+            collection,
+            Min("low", 3),
+            Min("high", 7),
+            Max("high", 9),
+            Max("low", 1),
+            Max("missing", 1),
+            Mul("price", 4),
+            Mul("count", 2),
+        )
+        assert document == {
+            "id": 1,
+            "low": 3,
+            "high": 9,
+            "price": 10.0,
+            "missing": 1,
+            "count": 0,
+        }
+
+    def test_rename_and_unset(self, collection):
+        collection.insert({"id": 1, "old": {"k": [1]}, "a": 1, "b": 2})
+        document = self.update(
+            collection,
+            Rename("old", "new"),
+            Rename("missing", "other"),
+            Unset("a", "b"),
+        )
+        assert document == {"id": 1, "new": {"k": [1]}}
+
+    def test_chained_operations_on_one_field(self, collection):
+        collection.insert({"id": 1, "count": 1})
+        collection.create_index(Index("count", IndexType.COLUMN))
+        document = self.update(
+            collection, Set("count", 5), Inc("count", 2), Mul("count", 3)
+        )
+        assert document["count"] == 21
+        # Cached statement, with the parameters in the same order
+        document = self.update(
+            collection, Set("count", 1), Inc("count", 1), Mul("count", 10)
+        )
+        assert document["count"] == 20
+
+    def test_invalid_operations(self):
+        with pytest.raises(ValueError):
+            Push("log")
+        with pytest.raises(ValueError):
+            Unset()
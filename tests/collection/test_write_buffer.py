@@ -0,0 +1,100 @@
+from concurrent.futures import ThreadPoolExecutor
+from sqlite3 import IntegrityError
+
+import pytest
+
+from bosc.buffer import WriteBuffer
+from bosc.collection import OnConflict
+from bosc.query.find.comparison import Eq
+from bosc.query.update import Set
+
+
+@pytest.fixture
+def buffer(collection):
+    buffer = collection.get_write_buffer(max_size=10, max_delay=0.01)
+    yield buffer
+    buffer.close()
+
+
+class TestWriteBuffer:
+    def test_insert(self, collection, buffer):
+        future = buffer.insert({"name": "John", "age": 25})
+        result = future.result(timeout=5)
+        assert result["name"] == "John"
+        assert collection.get(result["id"])["age"] == 25
+
+    def test_is_reused(self, collection, buffer):
+        assert collection.get_write_buffer() is buffer
+        buffer.close()
+        assert collection.get_write_buffer() is not buffer
+        collection.get_write_buffer().close()
+
+    def test_concurrent_inserts(self, collection, buffer):
+        def insert(number):
+            return buffer.insert({"number": number})
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = list(executor.map(insert, range(100)))
+        assert [f.result(timeout=5)["number"] for f in futures] == list(
+            range(100)
+        )
+        assert collection.count() == 100
+
+    def test_conflicts(self, collection, buffer):
+        collection.insert({"id": "1", "name": "John"})
+        raising = buffer.insert({"id": "1", "name": "Jane"})
+        inserted = buffer.insert({"id": "2", "name": "Jack"})
+        ignored = buffer.insert({"id": "1", "name": "Jim"}, OnConflict.IGNORE)
+        replaced = buffer.save({"id": "1", "name": "Joe"})
+        buffer.flush()
+        with pytest.raises(IntegrityError):
+            raising.result()
+        assert inserted.result()["name"] == "Jack"
+        assert ignored.result()["name"] == "John"
+        assert replaced.result()["name"] == "Joe"
+        assert collection.count() == 2
+        assert collection.get("1")["name"] == "Joe"
+
+    def test_updates_keep_order(self, collection, buffer):
+        buffer.insert({"id": "1", "name": "John"})
+        buffer.update_one(Eq("id", "1"), Set("name", "Jane"))
+        buffer.insert({"id": "2", "name": "Jack"})
+        buffer.delete_one(Eq("id", "2"))
+        buffer.insert({"id": "3", "name": "Jim"})
+        buffer.update(Eq("name", "Jim"), Set("age", 30))
+        last = buffer.delete(Eq("name", "Nobody"))
+        last.result(timeout=5)
+        assert {doc["id"]: doc.get("age") for doc in collection.find()} == {
+            "1": None,
+            "3": 30,
+        }
+        assert collection.get("1")["name"] == "Jane"
+
+    def test_closed(self, collection):
+        buffer = WriteBuffer(collection, max_delay=60)
+        future = buffer.insert({"name": "John"})
+        buffer.close()
+        assert future.done()
+        assert collection.count() == 1
+        with pytest.raises(RuntimeError):
+            buffer.insert({"name": "Jane"})
+
+    def test_flush_in_transaction(self, db, buffer):
+        with db.transaction():
+            with pytest.raises(RuntimeError):
+                buffer.flush()
+
+    def test_writes_in_transaction(self, db, collection, buffer):
+        with db.transaction():
+            with pytest.raises(RuntimeError):
+                buffer.insert({"name": "Jane"})
+            with pytest.raises(RuntimeError):
+                buffer.update(None, Set("name", "Jane"))
+        buffer.flush()
+        assert collection.count() == 0
+
+    def test_validation(self, collection, buffer):
+        with pytest.raises(ValueError):
+            buffer.insert([1, 2])
+        with pytest.raises(ValueError):
+            WriteBuffer(collection, max_size=0)
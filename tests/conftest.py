@@ -9,7 +9,9 @@ def db():
 
 
 @pytest.fixture(autouse=True)
-def cleanup(db):
+def cleanup(db, monkeypatch):
+    # Tests change the schema through several databases on the same file
+    monkeypatch.setattr("bosc.database.SCHEMA_CHECK_INTERVAL", 0.0)
     db.drop_all_collections()
     db.drop_all_indexes()
     yield
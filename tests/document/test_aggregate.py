@@ -0,0 +1,21 @@
+from bosc.query.aggregate import Avg, Count, Push
+from tests.document.models import Sample
+
+
+class TestAggregate:
+    def test_aggregate(self, samples):
+        result = Sample.aggregate(
+            Sample.age > 25,
+            group_by=Sample.name,
+            count=Count(),
+            average=Avg(Sample.age),
+            ages=Push(Sample.age),
+        )
+        assert result == [
+            {"name": "Jack", "count": 1, "average": 35.0, "ages": [35]},
+            {"name": "Jane", "count": 1, "average": 30.0, "ages": [30]},
+            {"name": "John", "count": 1, "average": 40.0, "ages": [40]},
+        ]
+
+    def test_without_group_by(self, samples):
+        assert Sample.aggregate(count=Count()) == [{"count": 4}]
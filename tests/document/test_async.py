@@ -0,0 +1,76 @@
+import asyncio
+
+from bosc import Document, Set
+from bosc.query.aggregate import Sum
+from tests.document.models import Sample
+
+
+class TestAsyncDocument:
+    def test_insert_and_find(self):
+        async def main():
+            await asyncio.gather(
+                Sample(name="John", age=25).ainsert(),
+                Sample(name="Jane", age=30).ainsert(),
+                Sample.ainsert_many([Sample(name="Jack", age=35)]),
+            )
+            assert await Sample.acount() == 3
+            result = await Sample.afind(Sample.age > 25, order_by="age")
+            assert [sample.name for sample in result] == ["Jane", "Jack"]
+            john = await Sample.afind_one(Sample.name == "John")
+            assert (await Sample.aget(john.id)) == john
+            assert await Sample.aget_many([john.id]) == [john]
+            result = await Sample.aaggregate(total=Sum(Sample.age))
+            assert result == [{"total": 90}]
+
+        asyncio.run(main())
+
+    def test_update_save_and_delete(self, samples):
+        async def main():
+            await Sample.aupdate(Sample.name == "John", Set("age", 50))
+            assert await Sample.acount(Sample.age == 50) == 2
+            await Sample.aupdate_one(Sample.name == "John", Set("age", 60))
+            john = await Sample.afind_one_and_update(
+                Sample.age == 60, Set("age", 65)
+            )
+            assert john.age == 65
+            john = await Sample.afind_one_and_delete(Sample.age == 65)
+            assert await Sample.aget(john.id) is None
+            jack = await Sample.afind_one(Sample.name == "Jack")
+            jack.age = 70
+            await jack.asave()
+            assert (await Sample.aget(jack.id)).age == 70
+            await jack.adelete()
+            await Sample.adelete_many(Sample.name == "John")
+            assert await Sample.acount() == 1
+
+        asyncio.run(main())
+
+    def test_aiter_find(self, samples):
+        async def main():
+            return [
+                sample.age
+                async for sample in Sample.aiter_find(
+                    Sample.age > 25, order_by="age", batch_size=2
+                )
+            ]
+
+        assert asyncio.run(main()) == [30, 35, 40]
+
+    def test_afind_page(self, samples):
+        async def main():
+            _, token = await Sample.afind_page(order_by="age", limit=3)
+            assert token is not None
+            return await Sample.afind_page(
+                order_by="age", after=token, limit=3
+            )
+
+        page, token = asyncio.run(main())
+        assert [sample.age for sample in page] == [40]
+        assert token is None
+
+    def test_database_is_shared(self):
+        class Other(Document):
+            bosc_database_path = "test_db"
+
+        assert Other.get_database() is Sample.get_database()
+        assert Other.get_async_database() is Sample.get_async_database()
@@ -5,10 +5,11 @@ from enum import Enum
 from typing import Any, Dict, List
 from uuid import UUID, uuid4
 
-from pydantic import BaseModel, SecretStr
+import pytest
+from pydantic import BaseModel, Field, SecretStr
 
 from bosc import Document
-from bosc.encoder import get_dict
+from bosc.encoder import Encoder, get_compiled_encoder, get_dict
 
 
 class ExampleEnum(Enum):
@@ -49,6 +50,38 @@ class FieldyModel(Document):
     bosc_database_path = "test_db"
 
 
+class CompilableModel(Document):
+    enum_field: ExampleEnum = ExampleEnum.OPTION_ONE
+    bytes_field: bytes = b"test"
+    datetime_field: datetime = datetime(
+        2023, 1, 1, 12, 0, 0, tzinfo=timezone.utc
+    )
+    date_field: date = date(2023, 1, 1)
+    timedelta_field: timedelta = timedelta(days=1)
+    uuid_field: UUID = uuid4()
+    ip_v4_address: ipaddress.IPv4Address = ipaddress.IPv4Address("192.168.1.1")
+    path_field: pathlib.PurePath = pathlib.Path("/test/path")
+    secret_str: SecretStr = SecretStr("secret_string")
+    nested_model: NestedModel = NestedModel()
+    nested_model_list: List[NestedModel] = [
+        NestedModel(),
+        NestedModel(name="Another Nested", count=20),
+    ]
+    dictionary: Dict[str, List[timedelta]] = {"key": [timedelta(hours=1)]}
+    aliased: int = Field(default=1, alias="alias")
+
+
+class CustomEncodersModel(Document):
+    datetime_field: datetime = datetime(2023, 1, 1, 12, 0, 0)
+    nested_model: NestedModel = NestedModel()
+
+    bosc_json_encoders = {datetime: lambda d: d.isoformat()}
+
+
+class NestedDocumentModel(Document):
+    nested: CustomEncodersModel = CustomEncodersModel()
+
+
 class TestEncoder:
     def test_encode(self):
         fieldy_model = FieldyModel()
@@ -104,3 +137,68 @@ class TestEncoder:
             "enum": "Option 2",
             "nested": {"name": "Nested Name", "count": 10},
         }
+
+
+class TestCompiledEncoder:
+    def test_compiled_matches_walker(self):
+        model = CompilableModel()
+        assert get_compiled_encoder(CompilableModel) is not None
+        assert get_dict(model) == Encoder().encode(model)
+
+    def test_exclude(self):
+        model = CompilableModel()
+        result = get_dict(model, exclude={"alias", "secret_str"})
+        assert "alias" not in result
+        assert "secret_str" not in result
+        assert "date_field" in result
+
+    def test_custom_encoders(self):
+        model = CustomEncodersModel()
+        assert get_compiled_encoder(CustomEncodersModel) is not None
+        assert get_dict(model)["datetime_field"] == "2023-01-01T12:00:00"
+        assert get_dict(model) == Encoder().encode(model)
+
+    def test_custom_encoders_change(self):
+        class Model(Document):
+            datetime_field: datetime = datetime(2023, 1, 1, 12, 0, 0)
+
+        first = get_compiled_encoder(Model)
+        Model.bosc_json_encoders = {datetime: lambda d: d.isoformat()}
+        assert get_compiled_encoder(Model) is not first
+        assert get_dict(Model())["datetime_field"] == "2023-01-01T12:00:00"
+
+    def test_fallback_to_walker(self):
+        # Dict[str, Any] and nested documents with their own encoders
+        # can't be compiled
+        assert get_compiled_encoder(FieldyModel) is None
+        assert get_compiled_encoder(NestedDocumentModel) is None
+        model = NestedDocumentModel()
+        assert get_dict(model) == Encoder().encode(model)
+
+
+class TestEncoderDispatch:
+    def test_most_specific_encoder(self):
+        class Base:
+            pass
+
+        class Child(Base):
+            pass
+
+        encoder = Encoder(
+            custom_encoders={Base: lambda _: "base", Child: lambda _: "child"}
+        )
+        assert encoder.encode([Base(), Child()]) == ["base", "child"]
+
+    def test_mutated_encoders(self):
+        custom_encoders = {datetime: lambda d: d.isoformat()}
+        value = datetime(2023, 1, 1, 12, 0, 0)
+        assert (
+            Encoder(custom_encoders=custom_encoders).encode(value)
+            == "2023-01-01T12:00:00"
+        )
+        custom_encoders[datetime] = lambda d: d.year
+        assert Encoder(custom_encoders=custom_encoders).encode(value) == 2023
+
+    def test_unsupported_type(self):
+        with pytest.raises(ValueError):
+            Encoder().encode(object())
@@ -1,4 +1,8 @@
-from bosc import Eq, Gt, Gte, Lt, Lte
+from uuid import uuid4
+
+from pydantic import BaseModel
+
+from bosc import Eq, Gt, Gte, Inc, Lt, Lte, Set
 from bosc.collection import OrderDirection
 from tests.document.models import Sample
 
@@ -114,3 +118,62 @@ class TestFind:
         assert result[0].age == 25
         assert result[1].name == "Jane"
         assert result[1].age == 30
+
+    def test_iter_find(self, samples):
+        result = Sample.iter_find(
+            Sample.age > 25, order_by="age", batch_size=2
+        )
+        assert [sample.age for sample in result] == [30, 35, 40]
+        for sample in Sample.iter_find():
+            assert isinstance(sample, Sample)
+            break
+
+    def test_get_many(self, samples):
+        ids = [samples[2].id, uuid4(), samples[0].id]
+        result = Sample.get_many(ids)
+        assert result[1] is None
+        assert [result[0].name, result[2].name] == ["Jack", "John"]
+
+    def test_find_page(self, samples):
+        page, token = Sample.find_page(
+            Sample.age > 25, order_by="age", limit=2
+        )
+        assert [sample.age for sample in page] == [30, 35]
+        page, token = Sample.find_page(
+            Sample.age > 25, order_by="age", after=token, limit=2
+        )
+        assert [sample.age for sample in page] == [40]
+        assert token is None
+
+    def test_model_field_expressions(self, samples):
+        # Fields as they are passed to queries, operators and order_by
+        for _ in range(2):
+            found = Sample.find(Gt(Sample.age, 20), order_by=Sample.age)
+            assert [sample.age for sample in found] == [25, 30, 35, 40]
+            page, _ = Sample.find_page(order_by=Sample.age, limit=2)
+            assert [sample.age for sample in page] == [25, 30]
+        Sample.update(Eq(Sample.name, "Jane"), Set(Sample.name, "Jill"))
+        Sample.update(Sample.name == "Jack", Inc(Sample.age))
+        oldest = Sample.find_one_and_update(
+            Sample.name == "John", Inc(Sample.age), order_by=Sample.age
+        )
+        assert oldest.age == 26
+        assert Sample.count(Sample.name == "Jill") == 1
+        assert Sample.find_one(Sample.name == "Jack").age == 36
+
+    def test_find_projection(self, samples):
+        class SampleName(BaseModel):
+            name: str
+
+        result = Sample.find(
+            Sample.age > 25, order_by="age", projection=SampleName
+        )
+        assert result == [
+            SampleName(name="Jane"),
+            SampleName(name="Jack"),
+            SampleName(name="John"),
+        ]
+        result = Sample.find_one(Sample.age > 35, projection=SampleName)
+        assert result == SampleName(name="John")
+        result = Sample.iter_find(order_by="age", projection=SampleName)
+        assert isinstance(next(result), SampleName)
@@ -1,6 +1,8 @@
+import asyncio
 from sqlite3 import IntegrityError
 
 import pytest
+from pydantic import ValidationError
 
 from bosc import Document
 from bosc.collection import OnConflict
@@ -101,3 +103,49 @@ class TestInsertMany:
                 [sample_1, sample_2],
                 on_conflict=OnConflict.RAISE,
             )
+
+    def test_insert_in_transaction(self):
+        with pytest.raises(ZeroDivisionError):
+            with Sample.transaction():
+                Sample(name="John", age=25).insert()
+                1 / 0
+        with Sample.transaction():
+            Sample(name="Jane", age=30).insert()
+            Sample(name="Jack", age=35).insert()
+        assert Sample.count() == 2
+
+    def test_insert_buffered(self):
+        futures = [
+            Sample(name="John", age=age).insert_buffered() for age in range(10)
+        ]
+        for future in futures:
+            future.result(timeout=5)
+        assert Sample.count() == 10
+        Sample.get_write_buffer().close()
+
+
+class TestLoad:
+    def test_load(self, tmp_path):
+        path = tmp_path / "samples.jsonl"
+        path.write_text(
+            '{"name": "John", "age": 25}\n{"name": "Jane", "age": 30}\n'
+        )
+        documents = [Sample(name="Jack", age=35), {"name": "Jill", "age": 40}]
+        assert Sample.load(path) == 2
+        assert Sample.load(documents) == 2
+        assert Sample.find_one(Sample.name == "John").age == 25
+        assert Sample.count() == 4
+
+    def test_load_validation(self):
+        line = '{"name": "John", "age": "unknown"}'
+        with pytest.raises(ValidationError):
+            Sample.load([line])
+        assert Sample.count() == 0
+        assert Sample.load([line], validate=False) == 1
+        assert Sample.get_collection().find_one()["age"] == "unknown"
+
+    def test_aload(self):
+        async def main():
+            return await Sample.aload([{"name": "John", "age": 25}])
+
+        assert asyncio.run(main()) == 1
@@ -1,4 +1,9 @@
-from bosc import Set
+from typing import Any, Dict, List
+from uuid import uuid4
+
+import pytest
+
+from bosc import Document, Inc, OrderDirection, Set
 from tests.document.models import Sample
 
 
@@ -16,3 +21,113 @@ class TestUpdate:
         assert len(result) == 2
         assert result[0].age == 50
         assert result[1].age == 40
+
+    def test_find_one_and_update(self, samples):
+        found = Sample.find_one_and_update(
+            Sample.name == "John",
+            Inc("age", 1),
+            order_by="age",
+            order_direction=OrderDirection.DESC,
+        )
+        assert str(found.id) == samples[3].id
+        assert found.age == 41
+        found.name = "Johnny"
+        found.save()
+        assert Sample.get(found.id) == found
+        old = Sample.find_one_and_update(
+            Sample.name == "John", Set("age", 0), return_new=False
+        )
+        assert old.age == 25
+        assert Sample.get(old.id).age == 0
+
+    def test_find_one_and_delete(self, samples):
+        deleted = Sample.find_one_and_delete(order_by="age")
+        assert str(deleted.id) == samples[0].id
+        assert Sample.get(deleted.id) is None
+        assert Sample.find_one_and_delete(Sample.age > 100) is None
+
+
+class Profile(Document):
+    name: str
+    logins: int = 0
+    tags: List[str] = []
+    settings: Dict[str, Any] = {}
+
+    bosc_database_path = "test_db"
+
+
+class TestSave:
+    @pytest.fixture
+    def statements(self):
+        statements = []
+        connection = Profile.get_database().connection
+        connection.set_trace_callback(statements.append)
+        yield statements
+        connection.set_trace_callback(None)
+
+    def test_save_writes_changed_fields(self, statements):
+        profile = Profile(
+            name="John", tags=["a"], settings={"theme": "dark", "x y": 1}
+        ).insert()
+        loaded = Profile.get(profile.id)
+        assert loaded == Profile.model_validate(profile.model_dump())
+        loaded.logins += 1
+        loaded.tags.append("b")
+        loaded.settings["x y"] = 2
+        del loaded.settings["theme"]
+        statements.clear()
+        loaded.save()
+        assert [sql for sql in statements if sql.startswith("UPDATE")] == [
+            (
+                "UPDATE Profile SET data = json_remove(json_set(data, "
+                "'$.logins', 1, '$.tags', json('[\"a\", \"b\"]'), "
+                "'$.settings.\"x y\"', 2), '$.settings.theme') "
+                f"WHERE doc_id = x'{loaded.id.hex}'"
+            )
+        ]
+        assert Profile.get(profile.id) == loaded
+
+    def test_save_without_changes(self, statements):
+        profile = Profile(name="John").insert()
+        statements.clear()
+        profile.save()
+        assert statements == []
+
+    def test_save_new_document(self):
+        profile = Profile(name="John")
+        profile.save()
+        profile.logins = 3
+        profile.save()
+        assert Profile.get(profile.id).logins == 3
+
+    def test_save_deleted_document(self):
+        profile = Profile(name="John").insert()
+        Profile.get_collection().delete()
+        profile.logins = 3
+        profile.save()
+        assert Profile.get(profile.id).logins == 3
+
+    def test_save_changed_id(self):
+        Profile(name="John").insert()
+        found = Profile.find_one(Profile.name == "John")
+        found.id = uuid4()
+        found.save()
+        assert Profile.count() == 2
+
+    def test_save_keys_with_quotes(self, statements):
+        profile = Profile(
+            name="John", settings={"a": {'say "hi"': 1, "b": 1}}
+        ).insert()
+        profile.settings["a"]['say "hi"'] = 2
+        statements.clear()
+        profile.save()
+        [update] = [sql for sql in statements if sql.startswith("UPDATE")]
+        assert "'$.settings.a', json(" in update
+        assert Profile.get(profile.id).settings == profile.settings
+
+        profile.settings['top "level"'] = 1
+        profile.save()
+        assert Profile.get(profile.id).settings == profile.settings
+        del profile.settings['top "level"']
+        profile.save()
+        assert Profile.get(profile.id).settings == profile.settings
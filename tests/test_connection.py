@@ -0,0 +1,56 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from bosc.connection import ConnectionPool
+from bosc.database import Database
+
+
+class TestConnectionPool:
+    def test_pool_size_validation(self):
+        with pytest.raises(ValueError):
+            ConnectionPool("test_db", pool_size=0)
+
+    def test_reader_is_not_writer(self):
+        pool = ConnectionPool("test_db")
+        with pool.reader() as reader:
+            assert reader is not pool.writer_connection
+        pool.close()
+
+    def test_readers_are_reused(self):
+        pool = ConnectionPool("test_db")
+        with pool.reader() as first:
+            pass
+        with pool.reader() as second:
+            assert first is second
+        pool.close()
+
+    def test_reader_inside_writer_uses_writer(self):
+        pool = ConnectionPool("test_db")
+        with pool.writer() as writer:
+            assert pool.holds_writer()
+            with pool.reader() as reader:
+                assert reader is writer
+        assert not pool.holds_writer()
+        pool.close()
+
+    def test_in_memory_database(self):
+        db = Database(":memory:")
+        db.test_collection.insert({"name": "John"})
+        assert db.test_collection.count() == 1
+        db.close()
+
+
+class TestThreads:
+    def test_concurrent_reads_and_writes(self, db):
+        collection = db.test_collection
+
+        def work(number):
+            collection.insert({"name": "John", "number": number})
+            return collection.count()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            counts = list(executor.map(work, range(64)))
+
+        assert collection.count() == 64
+        assert all(1 <= count <= 64 for count in counts)
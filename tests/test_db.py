@@ -1,2 +1,142 @@
+import threading
+from sqlite3 import IntegrityError, OperationalError
+
+import pytest
+
+from bosc.connection import TransactionMode
+from bosc.database import Database
+
+
 class TestDatabase:
-    ...
+    def test_collection_is_cached(self, db):
+        assert db.test_collection is db["test_collection"]
+
+    def test_drop_collection_invalidates_cache(self, db):
+        collection = db.test_collection
+        collection.insert({"name": "John"})
+        db.drop_collection("test_collection")
+        assert db.test_collection is not collection
+        assert db.test_collection.count() == 0
+
+    def test_drop_by_other_connection_invalidates_cache(self, db):
+        collection = db.test_collection
+        collection.insert({"name": "John"})
+        Database("test_db").drop_all_collections()
+        assert db.test_collection is not collection
+        db.test_collection.insert({"name": "Jane"})
+        assert db.test_collection.count() == 1
+
+    def test_schema_checks_are_rate_limited(self, db, monkeypatch):
+        monkeypatch.setattr("bosc.database.SCHEMA_CHECK_INTERVAL", 60.0)
+        checks = []
+        get_schema_version = db._get_schema_version
+
+        def count_checks():
+            checks.append(1)
+            return get_schema_version()
+
+        monkeypatch.setattr(db, "_get_schema_version", count_checks)
+        collection = db.test_collection
+        for _ in range(3):
+            assert db.test_collection is collection
+        assert len(checks) == 1
+
+        # A dropped table is noticed after a statement fails on it
+        Database("test_db").drop_all_collections()
+        assert db.test_collection is collection
+        with pytest.raises(OperationalError):
+            collection.insert({"name": "John"})
+        db.test_collection.insert({"name": "Jane"})
+        assert db.test_collection is not collection
+        assert db.test_collection.count() == 1
+        assert len(checks) == 2
+
+    def test_collections_from_threads(self, db):
+        barrier = threading.Barrier(8)
+        found = []
+
+        def get_collections():
+            barrier.wait()
+            found.extend(db[f"collection_{i}"] for i in range(5))
+
+        threads = [threading.Thread(target=get_collections) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len({id(collection) for collection in found}) == 5
+        assert all(
+            db[collection.collection_name] is collection
+            for collection in found
+        )
+
+    def test_async_database_is_shared(self):
+        database = Database(":memory:")
+        async_database = database.get_async_database()
+        assert database.get_async_database() is async_database
+        database.close()
+        with pytest.raises(RuntimeError):
+            async_database.executor.submit(print)
+
+
+class TestTransaction:
+    def test_commit(self, db):
+        other = Database("test_db")
+        collection, other_collection = (
+            db.test_collection,
+            other.test_collection,
+        )
+        with db.transaction():
+            collection.insert({"name": "John"})
+            collection.insert({"name": "Jane"})
+            # Other connections don't see uncommitted changes
+            assert other_collection.count() == 0
+        assert other_collection.count() == 2
+
+    def test_rollback(self, db):
+        db.test_collection.insert({"name": "John"})
+        with pytest.raises(ZeroDivisionError):
+            with db.transaction():
+                db.test_collection.insert({"name": "Jane"})
+                assert db.test_collection.count() == 2
+                1 / 0
+        assert db.test_collection.count() == 1
+
+    def test_failed_statement_keeps_transaction(self, db):
+        with db.transaction():
+            document = db.test_collection.insert({"name": "John"})
+            with pytest.raises(IntegrityError):
+                db.test_collection.insert(document)
+            db.test_collection.insert({"name": "Jane"})
+        assert db.test_collection.count() == 2
+
+    def test_nested_rollback(self, db):
+        with db.transaction(TransactionMode.IMMEDIATE):
+            db.test_collection.insert({"name": "John"})
+            with pytest.raises(ZeroDivisionError):
+                with db.transaction():
+                    db.test_collection.insert({"name": "Jane"})
+                    1 / 0
+            db.test_collection.insert({"name": "Jack"})
+        names = {doc["name"] for doc in db.test_collection.find()}
+        assert names == {"John", "Jack"}
+
+    def test_rollback_of_created_collection(self, db):
+        with pytest.raises(ZeroDivisionError):
+            with db.transaction():
+                db.new_collection.insert({"name": "John"})
+                1 / 0
+        assert db.new_collection.count() == 0
+
+    def test_blocks_other_writers(self, db):
+        collection = db.test_collection
+        thread = threading.Thread(
+            target=collection.insert, args=({"name": "Jane"},)
+        )
+        with db.transaction():
+            collection.insert({"name": "John"})
+            thread.start()
+            thread.join(0.1)
+            assert thread.is_alive()
+        thread.join()
+        assert collection.count() == 2